@@ -8,31 +8,389 @@ for creating, updating, and retrieving user data, as well as processing audio re
 to generate note sequences viewable on the frontend.
 """
 
-import ast
+import hashlib
 import os
-import re
-from flask import Flask, request, jsonify, send_file
-from flask_mysqldb import MySQL
+from urllib.parse import urlencode
+from flask import Flask, request, jsonify, make_response, send_file
 from flask_cors import CORS
 from werkzeug.exceptions import HTTPException
 
-from audio_processing import Song, convert_m4a_to_wav, AudioAnalyzer
+from audio_processing import instrumentation
+from audio_processing import NOTE_FILE_EXTENSION, Song, decode_m4a_to_pcm, notes_to_text, read_notes, text_to_records, write_notes
+from audio_processing.metering import (METERING_FILE_EXTENSION, downsample_metering, load_metering,
+                                       metering_to_strings, parse_metering, save_metering)
+from audio_processing.transcription_cache import TranscriptionCache
+from db_client.flask_pool import FlaskConnectionPool
+from db_client.pool import PoolTimeout
+from jobs import JobQueue, JobQueueFull, JobStore
+from library import fetch_sequence, fetch_sequence_owners, fetch_user_library, set_folder_contents
+from library_cache import LibraryCache, MemoryBackend, RedisBackend
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics
+from profiling import Profiler
 
 NOTE_DATA_PATH = './note_data'
 AUDIO_DATA_PATH = './audio_data'
 METERING_DATA_PATH = './metering_data'
+JOB_DATA_PATH = './job_data'
+TRANSCRIPTION_CACHE_PATH = './transcription_cache'
+PROFILE_DATA_PATH = './profile_data'
+
+# analysis settings of every transcription, also part of the transcription cache key
+TRANSCRIPTION_SETTINGS = {"chunk_duration": 0.25, "pitch_engine": "fft"}
+
+# fields of a sequence that clients can select; notes and metering_data are read from files
+SEQUENCE_FIELDS = ('id', 'display_name', 'created', 'notes', 'metering_data')
+
+
+def remove_recording_files(filename):
+    """
+    Removes the saved recording, metering data and note file of a recording that was not transcribed,
+    so they do not stay forever and keep its filename taken.
+    """
+
+    for path in (f'{AUDIO_DATA_PATH}/{filename}.m4a', f'{METERING_DATA_PATH}/{filename}{METERING_FILE_EXTENSION}',
+                 f'{NOTE_DATA_PATH}/{filename}{NOTE_FILE_EXTENSION}'):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
 
 app = Flask(__name__)
-db = MySQL()
+db = FlaskConnectionPool()
 
 app.config['MYSQL_HOST'] = '127.0.0.1'
 app.config['MYSQL_USER'] = 'root'
 app.config['MYSQL_PASSWORD'] = os.getenv('MYSQL_ROOT_PASSWORD')
 app.config['MYSQL_DB'] = 'echo_db'
 app.config['MYSQL_PORT'] = 53346
+app.config['MYSQL_POOL_MIN_SIZE'] = int(os.getenv('MYSQL_POOL_MIN_SIZE', 1))
+app.config['MYSQL_POOL_MAX_SIZE'] = int(os.getenv('MYSQL_POOL_MAX_SIZE', 10))
+app.config['MYSQL_POOL_TIMEOUT'] = float(os.getenv('MYSQL_POOL_TIMEOUT', 5))
+app.config['MYSQL_POOL_HEALTH_CHECK_INTERVAL'] = float(os.getenv('MYSQL_POOL_HEALTH_CHECK_INTERVAL', 30))
+app.config['TRANSCRIPTION_WORKERS'] = int(os.getenv('TRANSCRIPTION_WORKERS', 2))
+app.config['TRANSCRIPTION_MAX_PENDING'] = int(os.getenv('TRANSCRIPTION_MAX_PENDING', 32))
+app.config['JOB_TTL'] = float(os.getenv('JOB_TTL', 7 * 24 * 3600))  # secs a finished job and its result are kept
+app.config['TRANSCRIPTION_CACHE_MAX_BYTES'] = int(os.getenv('TRANSCRIPTION_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+app.config['LIBRARY_CACHE_MAX_BYTES'] = int(os.getenv('LIBRARY_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['LIBRARY_CACHE_REDIS_URL'] = os.getenv('LIBRARY_CACHE_REDIS_URL')  # shares the cache between workers if set
+app.config['LIBRARY_CACHE_TTL'] = int(os.getenv('LIBRARY_CACHE_TTL', 3600))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0))  # fraction of requests profiled
+app.config['PROFILE_HEADER_TOKEN'] = os.getenv('PROFILE_HEADER_TOKEN')  # profiles requests sending it in X-Echo-Profile
+app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', 100))
 
 db.init_app(app)
 CORS(app)
+jobs = JobQueue(JobStore(JOB_DATA_PATH, app.config['JOB_TTL']), app.config['TRANSCRIPTION_WORKERS'],
+                app.config['TRANSCRIPTION_MAX_PENDING'], on_failure=lambda job: remove_recording_files(job["filename"]))
+transcription_cache = TranscriptionCache(TRANSCRIPTION_CACHE_PATH, app.config['TRANSCRIPTION_CACHE_MAX_BYTES'])
+
+if app.config['LIBRARY_CACHE_REDIS_URL']:
+    library_cache = LibraryCache(RedisBackend.from_url(app.config['LIBRARY_CACHE_REDIS_URL'], ttl=app.config['LIBRARY_CACHE_TTL']))
+else:
+    library_cache = LibraryCache(MemoryBackend(app.config['LIBRARY_CACHE_MAX_BYTES']))
+
+metrics = Metrics()
+metrics.init_app(app)
+instrumentation.set_observer(metrics)  # per-stage timings of the transcriptions
+profiler = Profiler(PROFILE_DATA_PATH, app.config['PROFILE_SAMPLE_RATE'], app.config['PROFILE_HEADER_TOKEN'],
+                    app.config['PROFILE_MAX_FILES'])
+profiler.init_app(app)
+
+
+def pool_metric(*keys):
+    """Returns a metrics callback reading pool stats, without creating the pool before the first request."""
+    def read():
+        if db.pool is None:
+            return None
+        stats = db.pool.stats()
+        return stats[keys[0]] if len(keys) == 1 else {(key,): stats[key] for key in keys}
+    return read
+
+
+metrics.callback('db_pool_connections', 'Open database connections by state.', pool_metric('in_use', 'idle'),
+                 label_names=('state',))
+metrics.callback('db_pool_max_connections', 'Maximum number of open database connections.', pool_metric('max_size'))
+metrics.callback('db_pool_waiting_requests', 'Requests waiting for a database connection.', pool_metric('waiting'))
+metrics.callback('db_pool_checkouts_total', 'Database connection checkouts.', pool_metric('checkouts'), 'counter')
+metrics.callback('db_pool_timeouts_total', 'Database connection checkouts that timed out.', pool_metric('timeouts'), 'counter')
+metrics.callback('db_pool_wait_seconds_total', 'Time spent waiting for a database connection.',
+                 pool_metric('wait_seconds_total'), 'counter')
+metrics.callback('transcription_jobs_pending', 'Transcription jobs queued or running.', jobs.pending)
+metrics.callback('transcription_cache_lookups_total', 'Transcription cache lookups by result.',
+                 lambda: {("hit",): transcription_cache.hits, ("miss",): transcription_cache.misses}, 'counter',
+                 ('result',))
+metrics.callback('transcription_cache_bytes', 'Size of the transcription cache entries.',
+                 lambda: transcription_cache.stats()["bytes"])
+metrics.callback('library_cache_lookups_total', 'User library cache lookups by result.',
+                 lambda: {("hit",): library_cache.hits, ("miss",): library_cache.misses}, 'counter', ('result',))
+metrics.callback('library_cache_bytes', 'Memory used by the user library cache.', lambda: library_cache.stats()["bytes"])
+
+
+def read_note_text(filename):
+    """
+    Reads the notes of a sequence as comma-delimited text for the frontend.
+
+    Notes are stored in the binary note format; sequences saved before it
+    was introduced are read from their legacy text file.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the sequence, without extension.
+
+    Returns
+    -------
+    str
+        The notes of the sequence, or an empty string if it has none.
+    """
+
+    notes_path = f'{NOTE_DATA_PATH}/{filename}{NOTE_FILE_EXTENSION}'
+    legacy_notes_path = f'{NOTE_DATA_PATH}/{filename}.txt'
+
+    if os.path.exists(notes_path):
+        return notes_to_text(read_notes(notes_path))
+
+    if os.path.exists(legacy_notes_path):
+        with open(legacy_notes_path, 'r') as f:
+            return f.read()
+
+    return ''
+
+
+def read_metering(filename, n_points=None):
+    """
+    Reads the metering data of a sequence as the list of strings sent to the frontend.
+
+    Metering data is stored as a float32 .npy file; sequences saved before
+    it was introduced are parsed from their legacy text file.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the sequence, without extension.
+    n_points : int, optional
+        The maximum number of points to return, see downsample_metering.
+
+    Returns
+    -------
+    list[str]
+        The metering data of the sequence, or an empty list if it has none.
+    """
+
+    metering_path = f'{METERING_DATA_PATH}/{filename}{METERING_FILE_EXTENSION}'
+    legacy_metering_path = f'{METERING_DATA_PATH}/{filename}.txt'
+
+    if os.path.exists(metering_path):
+        metering_data = load_metering(metering_path)
+    elif os.path.exists(legacy_metering_path):
+        with open(legacy_metering_path, 'r') as f:
+            metering_data = parse_metering(f.read())
+    else:
+        return []
+
+    if n_points:
+        metering_data = downsample_metering(metering_data, n_points)
+
+    return metering_to_strings(metering_data)
+
+
+def data_file_versions(filename):
+    """
+    Returns the version of the note and metering files of a sequence, without reading them.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the sequence, without extension.
+
+    Returns
+    -------
+    list
+        The modification time in ns and size of the note file and of the metering file
+        (or of their legacy text files), None for a missing file.
+    """
+
+    versions = []
+
+    for paths in ((f'{NOTE_DATA_PATH}/{filename}{NOTE_FILE_EXTENSION}', f'{NOTE_DATA_PATH}/{filename}.txt'),
+                  (f'{METERING_DATA_PATH}/{filename}{METERING_FILE_EXTENSION}', f'{METERING_DATA_PATH}/{filename}.txt')):
+        version = None
+
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+
+            version = (stat.st_mtime_ns, stat.st_size)
+            break
+
+        versions.append(version)
+
+    return versions
+
+
+def compute_etag(*parts):
+    """
+    Computes a strong ETag for a response from everything its content depends on.
+
+    Parameters
+    ----------
+    *parts
+        The database rows, file versions and request arguments the response is built from.
+
+    Returns
+    -------
+    str
+        A digest that changes whenever any of the parts does.
+    """
+
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def not_modified_response(etag):
+    """
+    Answers a conditional GET whose If-None-Match header matches the ETag.
+
+    Parameters
+    ----------
+    etag : str
+        The ETag of the current content of the requested resource.
+
+    Returns
+    -------
+    Response
+        An empty 304 response, or None if the client does not have the current content.
+    """
+
+    if not request.if_none_match.contains_weak(etag):
+        return None
+
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+def sequence_response_data(sequence, fields=SEQUENCE_FIELDS, metering_points=None):
+    """
+    Builds the data of a sequence sent to the frontend, reading only the requested files.
+
+    Parameters
+    ----------
+    sequence : dict
+        The sequence, as fetched by fetch_user_library or fetch_sequence.
+    fields : sequence of str
+        The fields to include among SEQUENCE_FIELDS. The id is always included.
+    metering_points : int, optional
+        The maximum number of metering points to return, see read_metering.
+
+    Returns
+    -------
+    dict
+        The selected fields of the sequence.
+    """
+
+    filename = sequence["filename"]
+    data = {"id": sequence["id"]}
+
+    for field in ('display_name', 'created'):
+        if field in fields:
+            data[field] = sequence[field]
+
+    if 'notes' in fields:
+        data["notes"] = read_note_text(filename)
+
+    if 'metering_data' in fields:
+        data["metering_data"] = read_metering(filename, metering_points)
+
+    return data
+
+
+def transcribe_recording(user, display_name, filename, metering_data):
+    """
+    Transcribes a saved recording into a note sequence and inserts it into the database.
+
+    Recordings whose audio was transcribed before are served from the transcription
+    cache, skipping their conversion and analysis.
+
+    Parameters
+    ----------
+    user : str
+        The email of the creator of the song.
+    display_name : str
+        The display name associated with the recording.
+    filename : str
+        The filename of the saved M4A recording, without extension.
+    metering_data : numpy.ndarray
+        The metering data associated with the recording.
+
+    Returns
+    -------
+    dict
+        The processed sequence data for the frontend.
+    """
+
+    recording_path = f'{AUDIO_DATA_PATH}/{filename}'
+
+    with metrics.stage('cache_lookup'):
+        cache_key = transcription_cache.key(f'{recording_path}.m4a', **TRANSCRIPTION_SETTINGS)
+        records = transcription_cache.get(cache_key)
+
+    if records is None:
+        sampling_rate, pcm_data = decode_m4a_to_pcm(recording_path)  # decoded in memory, no WAV written
+        sequence = Song.from_pcm(sampling_rate, pcm_data, **TRANSCRIPTION_SETTINGS)
+        records = sequence.audio_to_notes().to_records()
+        profiler.annotate(sequence.duration, sequence.sampling_rate)
+        transcription_cache.put(cache_key, records)
+
+    instrument = 1  # default playback instrument is unused, so default to 1 instead of `request.form.get('instrument', type=int)`
+    note_path = f'{NOTE_DATA_PATH}/{filename}{NOTE_FILE_EXTENSION}'
+
+    with metrics.stage('write_notes'):
+        write_notes(note_path, records)
+
+    with metrics.stage('db_insert'):
+        cursor = db.connection.cursor()
+        query = "INSERT INTO Sequences (instrument, bpm, creator, display_name, filename) VALUES (%s, %s, %s, %s, %s)"
+        cursor.execute(query, (instrument, 0, user, display_name, filename))  # use default value of 0 for BPM (currently uncalculated)
+        query = "SELECT LAST_INSERT_ID()"
+        cursor.execute(query)
+        record = cursor.fetchone()
+        record_id = record[0]
+        query = "SELECT * FROM Sequences WHERE sequence_id = %s"
+        cursor.execute(query, (record_id,))
+        raw_sequence_data = cursor.fetchone()
+        db.connection.commit()
+        cursor.close()
+
+    library_cache.invalidate(user)
+    sequence_id = raw_sequence_data[0]
+    created = raw_sequence_data[6]
+
+    return {
+        "id": sequence_id,
+        "display_name": display_name,
+        "created": created,
+        "notes": notes_to_text(records),
+        "metering_data": metering_to_strings(metering_data)
+    }
+
+
+def run_transcription_job(user, display_name, filename, metering_data):
+    """
+    Runs transcribe_recording in a job worker thread.
+
+    Returns
+    -------
+    dict
+        The processed sequence data, serialized the same way as a JSON response.
+    """
+
+    with app.app_context():
+        sequence_data = transcribe_recording(user, display_name, filename, metering_data)
+        return app.json.loads(app.json.dumps(sequence_data))
 
 
 @app.route('/get-user-data/<email>', methods=['GET'])
@@ -44,95 +402,136 @@ def get_user_data(email):
     ----------
     email : str
         The email address of the user to fetch data for.
+    metering_points : int, optional
+        Query string argument, the maximum number of metering points to return per sequence.
+    limit : int, optional
+        Query string argument, the maximum number of sequences to return. All of them by default.
+    cursor : int, optional
+        Query string argument, the next_cursor of the previous page of sequences.
+    fields : str, optional
+        Query string argument, the comma-separated sequence fields to return among
+        id, display_name, created, notes and metering_data. All of them by default,
+        e.g. `fields=display_name,created` returns the library index without any note data.
 
     Returns
     -------
     JSON response
-        A JSON response containing the user's data, including display name, sequences, and folders.
+        A JSON response containing the user's data, including display name, sequences, and folders,
+        and the next_cursor to request the next page of sequences with (null on the last page).
+        When paging, each folder only lists the ids of its sequences on the page.
+        The response has an ETag, and is an empty 304 response if it matches the If-None-Match header.
+        Responses are cached per user until one of the write routes changes their library.
     """
 
+    metering_points = request.args.get('metering_points', type=int)
+
+    if metering_points is not None and metering_points <= 0:
+        response = jsonify({"error": "metering_points must be positive"}), 400
+        response[0].headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    limit = request.args.get('limit', type=int)
+
+    if limit is not None and limit <= 0:
+        response = jsonify({"error": "limit must be positive"}), 400
+        response[0].headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    fields = request.args.get('fields')
+    fields = SEQUENCE_FIELDS if fields is None else fields.split(',')
+
+    if not set(fields) <= set(SEQUENCE_FIELDS):
+        response = jsonify({"error": f"fields must be among {', '.join(SEQUENCE_FIELDS)}"}), 400
+        response[0].headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    variant = urlencode(sorted(request.args.items(multi=True)))
+    cached = library_cache.get(email, variant)
+
+    if cached is not None:  # served without any query or file read
+        etag, body = cached
+        response = not_modified_response(etag)
+
+        if response is not None:
+            return response
+
+        response = app.response_class(body, mimetype=app.json.mimetype)
+        response.set_etag(etag)
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    generation = library_cache.generation(email)  # taken before reading, so data read before a write is not cached
     cursor = db.connection.cursor()
-    query = "SELECT * FROM Users WHERE email = %s"
-    cursor.execute(query, (email,))
-    user = cursor.fetchone()
+    user_data = fetch_user_library(cursor, email, limit, request.args.get('cursor', type=int))  # a fixed number of queries
+    cursor.close()
 
-    if user is None:
+    if user_data is None:
         response = jsonify({"error": "User does not exist"}), 404
         response[0].headers.add('Access-Control-Allow-Origin', '*')
         return response
 
-    username = user[1]
-    folders = []
-    sequences = []
-
-    query = "SELECT folder_id, display_name, created FROM Folders WHERE owner = %s"
-    cursor.execute(query, (email,))
-    raw_folders = cursor.fetchall()
-
-    for raw_folder in raw_folders:
-        folder_id = raw_folder[0]
-        display_name = raw_folder[1]
-        created = raw_folder[2]
-
-        folder = {
-            "id": folder_id,
-            "display_name": display_name,
-            "created": created,
-            "sequences": [],
-        }
-
-        query = "SELECT sequence FROM Contains WHERE folder = %s"
-        cursor.execute(query, (folder_id,))
-        folder_sequences = cursor.fetchall()
-
-        for sequence in folder_sequences:
-            sequence_id = sequence[0]
-            folder["sequences"].append(sequence_id)
-
-        folders.append(folder)
-
-    query = "SELECT sequence_id, bpm, display_name, filename, created FROM Sequences WHERE creator = %s"
-    cursor.execute(query, (email,))
-    raw_sequences = cursor.fetchall()
-
-    for raw_sequence in raw_sequences:
-        sequence_id = raw_sequence[0]
-        bpm = raw_sequence[1]
-        display_name = raw_sequence[2]
-        filename = raw_sequence[3]
-        created = raw_sequence[4]
-        notes = ''
-        metering_data = []
-        notes_path = f'{NOTE_DATA_PATH}/{filename}.txt'
-        metering_data_path = f'{METERING_DATA_PATH}/{filename}.txt'
-
-        if os.path.exists(notes_path):
-            with open(notes_path, 'r') as f:
-                notes = f.read()
-
-        if os.path.exists(metering_data_path):
-            with open(metering_data_path, 'r') as f:
-                metering_data_raw = f.read()
-
-            metering_data = ast.literal_eval(metering_data_raw)  # formatted as a string
-
-        sequence = {
-            "id": sequence_id,
-            "display_name": display_name,
-            "created": created,
-            "notes": notes,
-            "metering_data": metering_data,
-        }
-
-        sequences.append(sequence)
-
-    user_data = {
-        "username": username,
-        "folders": folders,
-        "sequences": sequences,
-    }
+    # the ETag is computed from the rows and file versions, before reading any file
+    file_versions = [data_file_versions(sequence["filename"]) for sequence in user_data["sequences"]
+                     if 'notes' in fields or 'metering_data' in fields]
+    etag = compute_etag(user_data, file_versions, sorted(request.args.items(multi=True)))
+    response = not_modified_response(etag)
+
+    if response is not None:
+        return response
+
+    user_data["sequences"] = [sequence_response_data(sequence, fields, metering_points)
+                              for sequence in user_data["sequences"]]
 
     response = jsonify(user_data)
+    library_cache.put(email, variant, etag, response.get_data(), generation)
+    response.set_etag(etag)
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@app.route('/get-sequence-data/<int:sequence_id>', methods=['GET'])
+def get_sequence_data(sequence_id):
+    """
+    Fetches the data of one sequence, including its notes and metering data.
+
+    Parameters
+    ----------
+    sequence_id : int
+        The sequence to be retrieved
+    metering_points : int, optional
+        Query string argument, the maximum number of metering points to return.
+
+    Returns
+    -------
+    JSON response
+        A JSON response containing the sequence's id, display name, creation time, notes and metering data.
+        The response has an ETag, and is an empty 304 response if it matches the If-None-Match header.
+    """
+
+    metering_points = request.args.get('metering_points', type=int)
+
+    if metering_points is not None and metering_points <= 0:
+        response = jsonify({"error": "metering_points must be positive"}), 400
+        response[0].headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    cursor = db.connection.cursor()
+    sequence = fetch_sequence(cursor, sequence_id)
+    cursor.close()
+
+    if sequence is None:
+        response = jsonify({"error": "Sequence does not exist"}), 404
+        response[0].headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    etag = compute_etag(sequence, data_file_versions(sequence["filename"]), metering_points)
+    response = not_modified_response(etag)
+
+    if response is not None:
+        return response
+
+    response = jsonify(sequence_response_data(sequence, metering_points=metering_points))
+    response.set_etag(etag)
     response.headers.add('Access-Control-Allow-Origin', '*')
     return response
 
@@ -150,7 +549,8 @@ def get_recording_file(sequence_id):
     Returns
     -------
     M4A response
-        The recorded sequence as a M4A file
+        The recorded sequence as a M4A file. The response has an ETag and Last-Modified date for
+        conditional requests (304), and honours Range headers (206) so players can seek.
     """
 
     cursor = db.connection.cursor()
@@ -166,7 +566,7 @@ def get_recording_file(sequence_id):
 
     filename = sequence[0]
     path = f'{AUDIO_DATA_PATH}/{filename}.m4a'
-    response = send_file(path, as_attachment=True)
+    response = send_file(path, as_attachment=True, conditional=True, etag=True)
     response.headers.add('Access-Control-Allow-Origin', '*')
     return response
 
@@ -184,11 +584,13 @@ def process_recording():
     str display_name: The display name associated with the recording.
     int instrument: The ID of the default playback instrument.
     str metering_data: The metering data associated with the recording, formatted as a string.
+    str async: If "true", the recording is transcribed in the background instead of within the request.
 
     Returns
     -------
     JSON response
-        A JSON response containing the processed sequence data for the frontend.
+        A JSON response containing the processed sequence data for the frontend, or
+        with code 202 and the id of the transcription job to poll at /jobs/<job_id> in async mode.
     """
 
     if 'file' not in request.files:
@@ -203,26 +605,10 @@ def process_recording():
         response[0].headers.add('Access-Control-Allow-Origin', '*')
         return response
     
-    metering_data = request.form.get('metering_data')
-    
-    # validate that metering data represents a list
-    if not (metering_data.startswith('[') and metering_data.endswith(']')):
-        response = jsonify({"error": "Metering data not formatted correctly"}), 400
-        response[0].headers.add('Access-Control-Allow-Origin', '*')
-        return response
-    
+    # validate that metering data represents a list of numbers, parsed once here
     try:
-        format_test = ast.literal_eval(metering_data)
-
-        if not isinstance(format_test, list):
-            raise ValueError
-        
-        for item in format_test:
-            float(item)  # verify each item is a number
-
-            if not type(item) == str:
-                raise ValueError
-    except (SyntaxError, ValueError):
+        metering_data = parse_metering(request.form.get('metering_data', ''))
+    except ValueError:
         response = jsonify({"error": "Metering data not formatted correctly"}), 400
         response[0].headers.add('Access-Control-Allow-Origin', '*')
         return response
@@ -250,49 +636,146 @@ def process_recording():
     query = "SELECT * FROM Sequences WHERE creator = %s AND display_name = %s"
     cursor.execute(query, (user, display_name))
     num_sequences_with_same_name = len(cursor.fetchall())
+    cursor.close()
     filename = f'{user}-{display_name}{num_sequences_with_same_name}'
-    metering_path = f'{METERING_DATA_PATH}/{filename}.txt'
 
-    with open(metering_path, 'w') as f:
-        f.write(metering_data)
+    # a recording still being transcribed has no sequence yet, but has taken its filename
+    while os.path.exists(f'{AUDIO_DATA_PATH}/{filename}.m4a'):
+        num_sequences_with_same_name += 1
+        filename = f'{user}-{display_name}{num_sequences_with_same_name}'
 
-    recording_path = f'{AUDIO_DATA_PATH}/{filename}'
-    recording_m4a_path = f'{recording_path}.m4a'
-    recording_wav_path = f'{recording_path}.wav'
-    recording.save(recording_m4a_path)
-    convert_m4a_to_wav(recording_path)
-    instrument = 1  # default playback instrument is unused, so default to 1 instead of `request.form.get('instrument', type=int)`
-    sequence = Song(recording_wav_path, 0.25)
-    processed_sequence = sequence.audio_to_notes()
-    note_path = f'{NOTE_DATA_PATH}/{filename}.txt'
-    processed_sequence.save_to_file(note_path)
-    query = "INSERT INTO Sequences (instrument, bpm, creator, display_name, filename) VALUES (%s, %s, %s, %s, %s)"
-    cursor.execute(query, (instrument, 0, user, display_name, filename))  # use default value of 0 for BPM (currently uncalculated)
-    query = "SELECT LAST_INSERT_ID()"
-    cursor.execute(query)
-    record = cursor.fetchone()
-    record_id = record[0]
-    query = "SELECT * FROM Sequences WHERE sequence_id = %s"
-    cursor.execute(query, (record_id,))
-    raw_sequence_data = cursor.fetchone()
-    db.connection.commit()
-    cursor.close()
-    sequence_id = raw_sequence_data[0]
-    created = raw_sequence_data[6]
+    metering_path = f'{METERING_DATA_PATH}/{filename}{METERING_FILE_EXTENSION}'
+    recording_m4a_path = f'{AUDIO_DATA_PATH}/{filename}.m4a'
 
-    sequence_data = {
-        "id": sequence_id,
-        "display_name": display_name,
-        "created": created,
-        "notes": str(processed_sequence),
-        "metering_data": ast.literal_eval(metering_data)
-    }
+    with metrics.stage('save_upload'):
+        save_metering(metering_path, metering_data)
+        recording.save(recording_m4a_path)
+
+    if request.values.get('async', 'false').lower() == 'true':
+        try:
+            job = jobs.submit(run_transcription_job, user, display_name, filename, metering_data, filename=filename)
+        except JobQueueFull:
+            remove_recording_files(filename)
+            response = jsonify({"error": "Too many recordings are being processed, try again later"}), 503
+            response[0].headers.add('Access-Control-Allow-Origin', '*')
+            return response
+
+        response = jsonify({"job_id": job["id"], "status": job["status"]}), 202
+        response[0].headers.add('Location', f'/jobs/{job["id"]}')
+        response[0].headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    try:
+        sequence_data = transcribe_recording(user, display_name, filename, metering_data)
+    except Exception:
+        remove_recording_files(filename)
+        raise
 
     response = jsonify(sequence_data)
     response.headers.add('Access-Control-Allow-Origin', '*')
     return response
 
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Fetches the status of a background job, such as an async recording transcription.
+
+    Parameters
+    ----------
+    job_id : str
+        The id of the job.
+
+    Returns
+    -------
+    JSON response
+        A JSON response containing the job's status ("queued", "running", "done" or "failed"),
+        and its result once done or its error once failed.
+    """
+
+    job = jobs.store.get(job_id)
+
+    if job is None:
+        response = jsonify({"error": f"Job {job_id} does not exist"}), 404
+        response[0].headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    job.pop("pid", None)
+    job.pop("boot_id", None)
+    response = jsonify(job)
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@app.route('/get-transcription-cache-stats', methods=['GET'])
+def get_transcription_cache_stats():
+    """
+    Fetches the hit and miss counters of the transcription cache.
+
+    Returns
+    -------
+    JSON response
+        A JSON response containing the cache hits, misses and hit ratio since the server started,
+        and the number of entries and bytes in the cache.
+    """
+
+    response = jsonify(transcription_cache.stats())
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Fetches the metrics of the API for Prometheus.
+
+    Returns
+    -------
+    Text response
+        The request latency histograms by route, method and status, the latency histograms of the
+        transcription stages, the seconds of audio analyzed, and the database pool, job queue and
+        cache metrics, in the Prometheus text format.
+    """
+
+    response = make_response(metrics.render())
+    response.headers['Content-Type'] = METRICS_CONTENT_TYPE
+    return response
+
+
+@app.route('/get-library-cache-stats', methods=['GET'])
+def get_library_cache_stats():
+    """
+    Fetches the hit and miss counters and the memory usage of the user library cache.
+
+    Returns
+    -------
+    JSON response
+        A JSON response containing the cache hits, misses and hit ratio since the server started,
+        the cache backend, and the number of cached responses and their size in bytes.
+    """
+
+    response = jsonify(library_cache.stats())
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
+@app.route('/get-db-pool-stats', methods=['GET'])
+def get_db_pool_stats():
+    """
+    Fetches the gauges and counters of the database connection pool.
+
+    Returns
+    -------
+    JSON response
+        A JSON response containing the number of connections open, in use and idle, the number of
+        requests waiting for a connection, and the checkout, timeout and wait time counters.
+    """
+
+    response = jsonify(db.stats())
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
 @app.route('/rename-sequence/<int:sequence_id>/<display_name>', methods=['PUT'])
 def rename_sequence(sequence_id, display_name):
     """
@@ -326,6 +809,7 @@ def rename_sequence(sequence_id, display_name):
     cursor.execute(query, (display_name, sequence_id))
     db.connection.commit()
     cursor.close()
+    library_cache.invalidate(sequence[3])
     response = jsonify({"message": f"Sequence {sequence_id} renamed to {display_name} successfully"})
     response.headers.add('Access-Control-Allow-Origin', '*')
     return response
@@ -350,7 +834,7 @@ def update_sequence_data(sequence_id, updated_sequence):
     """
 
     cursor = db.connection.cursor()
-    query = "SELECT filename FROM Sequences WHERE sequence_id = %s"
+    query = "SELECT filename, creator FROM Sequences WHERE sequence_id = %s"
     cursor.execute(query, (sequence_id,))
     sequence = cursor.fetchone()
     cursor.close()
@@ -361,22 +845,24 @@ def update_sequence_data(sequence_id, updated_sequence):
         return response
 
     # validate sequence format
-    notes = updated_sequence.split(',')
-    analyzer = AudioAnalyzer()
-    pattern = r"^(" + "|".join(analyzer.Note_Names) + r")(\d+(\.\d+)?)$"
+    try:
+        records = text_to_records(updated_sequence)
+    except ValueError:
+        records = None
 
-    for note in notes:
-        if not re.match(pattern, note):
-            response = jsonify({"error": "Invalid new sequence data"}), 400
-            response[0].headers.add('Access-Control-Allow-Origin', '*')
-            return response
+    if records is None or len(records) == 0:
+        response = jsonify({"error": "Invalid new sequence data"}), 400
+        response[0].headers.add('Access-Control-Allow-Origin', '*')
+        return response
 
     filename = sequence[0]
-    path = f'{NOTE_DATA_PATH}/{filename}.txt'
+    write_notes(f'{NOTE_DATA_PATH}/{filename}{NOTE_FILE_EXTENSION}', records)
+    legacy_path = f'{NOTE_DATA_PATH}/{filename}.txt'
 
-    with open(path, 'w') as f:
-        f.write(updated_sequence)
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)  # superseded by the note file
 
+    library_cache.invalidate(sequence[1])
     response = jsonify({"message": f"Sequence {sequence_id} updated successfully"})
     response.headers.add('Access-Control-Allow-Origin', '*')
     return response
@@ -408,6 +894,7 @@ def create_folder(display_name, owner):
     folder = cursor.fetchone()
     db.connection.commit()
     cursor.close()
+    library_cache.invalidate(owner)
     folder_id = folder[0]
     response = jsonify({"folder_id": folder_id})
     response.headers.add('Access-Control-Allow-Origin', '*')
@@ -433,7 +920,7 @@ def rename_folder(folder_id, display_name):
     """
 
     cursor = db.connection.cursor()
-    query = "SELECT display_name FROM Folders WHERE folder_id = %s"
+    query = "SELECT display_name, owner FROM Folders WHERE folder_id = %s"
     cursor.execute(query, (folder_id,))
     folder = cursor.fetchone()
 
@@ -448,6 +935,7 @@ def rename_folder(folder_id, display_name):
     cursor.execute(query, (display_name, folder_id))
     db.connection.commit()
     cursor.close()
+    library_cache.invalidate(folder[1])
     response = jsonify({"message": f"{original_name} renamed to {display_name} successfully"})
     response.headers.add('Access-Control-Allow-Origin', '*')
     return response
@@ -508,43 +996,31 @@ def update_folder_contents():
         return response
 
     folder_owner = folder[2]
+    sequence_owners = fetch_sequence_owners(cursor, sequences)
 
     for sequence_id in sequences:
-        query = "SELECT creator FROM Sequences WHERE sequence_id = %s"
-        cursor.execute(query, (sequence_id,))
-        sequence = cursor.fetchone()
-
-        if sequence is None:
+        if sequence_id not in sequence_owners:
             cursor.close()
             response = jsonify({"error": f"Sequence {sequence_id} does not exist"}), 404
             response[0].headers.add('Access-Control-Allow-Origin', '*')
             return response
 
-        sequence_owner = sequence[0]
-
-        if sequence_owner != folder_owner:
+        if sequence_owners[sequence_id] != folder_owner:
             cursor.close()
             response = jsonify({"error": f"Sequence {sequence_id} is not owned by {folder_owner}"}), 403
             response[0].headers.add('Access-Control-Allow-Origin', '*')
             return response
 
-    query = "SELECT sequence FROM Contains WHERE folder = %s"
-    cursor.execute(query, (folder_id,))
-    current_sequences = cursor.fetchall()
-    current_sequence_ids = [sequence[0] for sequence in current_sequences]
-
-    for sequence_id in sequences:  # add newly added sequences
-        if sequence_id not in current_sequence_ids:
-            query = "INSERT INTO Contains (folder, sequence) VALUES (%s, %s)"
-            cursor.execute(query, (folder_id, sequence_id))
-
-    for sequence_id in current_sequence_ids:  # remove newly removed sequences
-        if sequence_id not in sequences:
-            query = "DELETE FROM Contains WHERE sequence = %s"
-            cursor.execute(query, (sequence_id,))
+    try:  # the inserts and the delete are applied as one transaction
+        set_folder_contents(cursor, folder_id, sequences)
+        db.connection.commit()
+    except Exception:
+        db.connection.rollback()
+        raise
+    finally:
+        cursor.close()
 
-    db.connection.commit()
-    cursor.close()
+    library_cache.invalidate(folder_owner)
     display_name = folder[1]
     response = jsonify({"message": f"{display_name} updated successfully"})
     response.headers.add('Access-Control-Allow-Origin', '*')
@@ -568,12 +1044,19 @@ def delete_folder(folder_id):
     """
 
     cursor = db.connection.cursor()
+    query = "SELECT owner FROM Folders WHERE folder_id = %s"
+    cursor.execute(query, (folder_id,))
+    folder = cursor.fetchone()
     query = "DELETE FROM Contains WHERE folder = %s"
     cursor.execute(query, (folder_id,))
     query = "DELETE FROM Folders WHERE folder_id = %s"
     cursor.execute(query, (folder_id,))
     db.connection.commit()
     cursor.close()
+
+    if folder is not None:
+        library_cache.invalidate(folder[0])
+
     response = jsonify({"message": f"Database updated successfully"})
     response.headers.add('Access-Control-Allow-Origin', '*')
     return response
@@ -596,12 +1079,19 @@ def delete_sequence(sequence_id):
     """
 
     cursor = db.connection.cursor()
+    query = "SELECT creator FROM Sequences WHERE sequence_id = %s"
+    cursor.execute(query, (sequence_id,))
+    sequence = cursor.fetchone()
     query = "DELETE FROM Contains WHERE sequence = %s"
     cursor.execute(query, (sequence_id,))
     query = "DELETE FROM Sequences WHERE sequence_id = %s"
     cursor.execute(query, (sequence_id,))
     db.connection.commit()
     cursor.close()
+
+    if sequence is not None:
+        library_cache.invalidate(sequence[0])
+
     response = jsonify({"message": f"Database updated successfully"})
     response.headers.add('Access-Control-Allow-Origin', '*')
     return response
@@ -630,11 +1120,27 @@ def create_user(email, username):
     cursor.execute(query, (email, username))
     db.connection.commit()
     cursor.close()
+    library_cache.invalidate(email)
     response = jsonify({"message": f"{username}'s account created"})
     response.headers.add('Access-Control-Allow-Origin', '*')
     return response
 
 
+@app.errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    """
+    Handles requests that waited too long for a database connection.
+
+    Returns
+    -------
+    JSON response
+        An error with code 503, telling the client to retry later.
+    """
+    response = jsonify({"error": str(e)}), 503, {'Retry-After': '1'}
+    response[0].headers.add('Access-Control-Allow-Origin', '*')
+    return response
+
+
 @app.errorhandler(Exception)
 def handle_exception(e):
     """
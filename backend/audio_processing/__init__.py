@@ -1,4 +1,7 @@
 from .analyzed_song import AnalysisPoint, AnalyzedSong
+from .analysis_plan import AnalysisPlan, get_analysis_plan
 from .audio_analyzer import AudioAnalyzer
+from .note_format import NOTE_FILE_EXTENSION, notes_to_text, read_notes, text_to_records, write_notes
+from .pitch_engines import PITCH_ENGINES, FFTPeakEstimator, PitchEstimator, YinEstimator
 from .song import Song
-from .convert import convert_m4a_to_wav
\ No newline at end of file
+from .convert import convert_m4a_to_wav, decode_m4a_to_pcm
\ No newline at end of file
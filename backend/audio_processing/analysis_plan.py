@@ -0,0 +1,157 @@
+from functools import lru_cache
+import numpy as np
+
+# band of frequencies considered by the analysis (human hearing range)
+MIN_FREQUENCY = 20
+MAX_FREQUENCY = 20000
+
+class AnalysisPlan:
+    """A class representing the precomputed setup for analyzing frames of one size.
+
+    Everything in a plan depends only on the frame size and the sampling
+    rate, so plans are built once by get_analysis_plan and shared by all
+    AudioAnalyzer instances.
+
+    Attributes
+    ----------
+    frame_n_samples : int
+        the number of samples in each frame.
+    sampling_rate : int
+        the sampling rate of the audio in (samples/sec).
+    n_fft : int
+        the length of the FFT run over each frame.
+    freqs : numpy.ndarray
+        the frequency of every rfft bin.
+    band : slice
+        the bins whose frequency lies between MIN_FREQUENCY and MAX_FREQUENCY.
+    window : numpy.ndarray or None
+        the window applied to each frame before the FFT, None for a
+        rectangular window.
+
+    Methods
+    -------
+    apply_window(frames)
+        Applies the plan's window to the frames.
+    note_table(reference_pitch)
+        Returns the MIDI note number of every bin for a reference pitch.
+    """
+
+    def __init__(self, frame_n_samples: int, sampling_rate: int, window: str = 'boxcar'):
+        """
+        Parameters
+        ----------
+        frame_n_samples : int
+            the number of samples in each frame.
+        sampling_rate : int
+            the sampling rate of the audio in (samples/sec).
+        window : str
+            the name of the window, as accepted by scipy.signal.get_window.
+            defaults to 'boxcar' (no windowing).
+        """
+        self.frame_n_samples = frame_n_samples
+        self.sampling_rate = sampling_rate
+        self.n_fft = frame_n_samples
+        from scipy.fft import rfftfreq
+        self.freqs = rfftfreq(self.n_fft, 1 / sampling_rate)
+        self.freqs.setflags(write=False)
+        # freqs is sorted, so the band is a contiguous range of bins
+        self.band = slice(int(np.searchsorted(self.freqs, MIN_FREQUENCY, side='left')),
+                          int(np.searchsorted(self.freqs, MAX_FREQUENCY, side='right')))
+
+        if window == 'boxcar':
+            self.window = None
+        else:
+            from scipy.signal import get_window
+            self.window = get_window(window, frame_n_samples)
+            self.window.setflags(write=False)
+
+        self._note_tables = {}
+
+    def apply_window(self, frames):
+        """Applies the plan's window to the frames.
+
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            array whose last axis holds the samples of each frame.
+
+        Returns
+        -------
+        numpy.ndarray
+            the windowed frames, or the frames unchanged for a rectangular window.
+        """
+        if self.window is None:
+            return frames
+        return frames * self.window
+
+    def note_table(self, reference_pitch: float) -> np.ndarray:
+        """Returns the MIDI note number of every bin for a reference pitch.
+
+        Parameters
+        ----------
+        reference_pitch : float
+            the frequency of A4 in Hz.
+
+        Returns
+        -------
+        numpy.ndarray
+            a read-only array with the note number of each rfft bin, -1 for
+            bins below the human hearing range.
+        """
+        table = self._note_tables.get(reference_pitch)
+
+        if table is None:
+            table = frequencies_to_midi(self.freqs, reference_pitch)
+            table.setflags(write=False)
+            self._note_tables[reference_pitch] = table
+
+        return table
+
+    def __repr__(self):
+        return f"AnalysisPlan(frame_n_samples={self.frame_n_samples}, sampling_rate={self.sampling_rate})"
+
+
+def frequencies_to_midi(frequencies, reference_pitch: float) -> np.ndarray:
+    """Converts an array of frequencies to MIDI note numbers.
+
+    Parameters
+    ----------
+    frequencies : numpy.ndarray
+        frequencies in Hz.
+    reference_pitch : float
+        the frequency of A4 in Hz.
+
+    Returns
+    -------
+    numpy.ndarray
+        the MIDI note number of each frequency, -1 for frequencies below
+        MIN_FREQUENCY or NaN.
+    """
+    frequencies = np.asarray(frequencies, dtype=float)
+    note_numbers = np.full(frequencies.shape, -1)
+    audible = frequencies >= MIN_FREQUENCY  # NaN compares as False
+    note_numbers[audible] = np.round(12 * np.log2(frequencies[audible] / reference_pitch) + 69)
+    return note_numbers
+
+
+@lru_cache(maxsize=16)
+def get_analysis_plan(frame_n_samples: int, sampling_rate: int, window: str = 'boxcar') -> AnalysisPlan:
+    """Returns the shared AnalysisPlan for a frame size and sampling rate.
+
+    Plans live in a bounded LRU cache, so their setup runs once per process
+    for each (frame_n_samples, sampling_rate, window) in use.
+
+    Parameters
+    ----------
+    frame_n_samples : int
+        the number of samples in each frame.
+    sampling_rate : int
+        the sampling rate of the audio in (samples/sec).
+    window : str
+        the name of the window. defaults to 'boxcar' (no windowing).
+
+    Returns
+    -------
+    AnalysisPlan
+    """
+    return AnalysisPlan(frame_n_samples, sampling_rate, window)
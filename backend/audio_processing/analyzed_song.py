@@ -1,12 +1,15 @@
 from typing import Iterator, List
-from midiutil.MidiFile import MIDIFile
-import librosa
-import subprocess
-import os
+import numpy as np
+
+from .note_format import make_records, write_notes
+from .notes import midi_to_note_names, note_name_to_midi
 
 class AnalysisPoint:
     """A class representing one data point in AnalyzedSong.
 
+    AnalyzedSong stores its points as columns, so AnalysisPoints are only
+    created when the song is iterated over.
+
     Attributes
     ----------
     time_stamp : float
@@ -18,6 +21,8 @@ class AnalysisPoint:
     duration: float
         duration of the note in secs
     """
+    __slots__ = ('time_stamp', 'frequency', 'note_name', 'duration')
+
     def __init__(self, time_stamp: float, frequency: float,
         note_name: str, duration: float):
         """
@@ -101,33 +106,111 @@ class AnalysisPoint:
 class AnalyzedSong:
     """A class representing the song after analysis. 
 
+    The points are stored column by column in NumPy arrays, with notes kept
+    as MIDI note numbers (-1 for "None"). Note names and AnalysisPoint
+    objects are only created when the song is read or serialized.
+
     Attributes
     ----------
     data : list[AnalysisPoint]
-        description
+        the analyzed points, created from the columns on every access.
+    time_stamps : numpy.ndarray
+        the starting time of each point in secs.
+    frequencies : numpy.ndarray
+        the dominant frequency of each point.
+    note_numbers : numpy.ndarray
+        the MIDI note number of each point.
+    durations : numpy.ndarray
+        the duration of each point in secs.
+    SERIALIZE_BATCH_SIZE : int
+        the number of points serialized at once by the streaming serializers.
 
     Methods
     -------
     add_point(time_stamp, frequency, note_name)
         add a time point and corresponding frequency and note name to the AnalyzedSong.
+    add_points(time_stamps, frequencies, note_numbers, durations)
+        add many time points at once from arrays.
     get_analysis()
         Returns the list of analyzed data points.
-    save_to_file(filename)
-        Saves the analysis results to a file.
+    save_to_file(filename, append_from)
+        Saves the analysis results to a file, or appends the newest points to it.
+    to_records()
+        Returns the notes as binary note records.
+    save_notes(filename)
+        Saves the notes to a binary note file.
+    iter_text(start)
+        Yields the text representation of the song in pieces.
+    write_text(file, start)
+        Writes the text representation of the song to a file-like object.
     notes_to_lilypond(self, chunk_duration)
         Returns a represtnation of the song notes in lilypond format.
+    iter_lilypond(chunk_duration)
+        Yields the lilypond representation of the song in pieces.
+    write_lilypond(file, chunk_duration)
+        Writes the lilypond representation of the song to a file-like object.
     generate_sheet_music(self, image_name, chunk_duration=0.25)
         Generates a represtnation of the song notes in lilypond format
         and saves it to a PDF file. 
     """
+    SERIALIZE_BATCH_SIZE = 4096
+
     def __init__(self):
         """
-        Parameters
-        ----------
-        data : list[AnalysisPoint]
-            description
+        Creates an empty song.
         """
-        self.data = []
+        self._size = 0
+        self._time_stamps = np.empty(0)
+        self._frequencies = np.empty(0)
+        self._note_numbers = np.empty(0, dtype=np.int16)
+        self._durations = np.empty(0)
+
+    @property
+    def time_stamps(self) -> np.ndarray:
+        return self._time_stamps[:self._size]
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        return self._frequencies[:self._size]
+
+    @property
+    def note_numbers(self) -> np.ndarray:
+        return self._note_numbers[:self._size]
+
+    @property
+    def durations(self) -> np.ndarray:
+        return self._durations[:self._size]
+
+    @property
+    def note_names(self) -> List[str]:
+        """The standard name of the note of each point."""
+        return midi_to_note_names(self.note_numbers)
+
+    @property
+    def data(self) -> List[AnalysisPoint]:
+        """The analyzed points as a list of AnalysisPoints, built from the columns."""
+        return list(self)
+
+    @data.setter
+    def data(self, points):
+        self._size = 0
+        for point in points:
+            self.add_point(point.time_stamp, point.frequency, point.note_name, point.duration)
+
+    def _reserve(self, count: int):
+        """Grows the columns geometrically so that count more points fit."""
+        needed = self._size + count
+
+        if needed <= len(self._time_stamps):
+            return
+
+        capacity = max(needed, 2 * len(self._time_stamps), 16)
+
+        for column in ('_time_stamps', '_frequencies', '_note_numbers', '_durations'):
+            old = getattr(self, column)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, column, new)
 
     def add_point(self, time_stamp: float, frequency: float,
         note_name: str, duration: float):
@@ -146,7 +229,59 @@ class AnalyzedSong:
         duration: float
             duration of the note in secs
         """
-        self.data.append(AnalysisPoint(time_stamp, frequency, note_name, duration))
+        self._reserve(1)
+        i = self._size
+        self._time_stamps[i] = time_stamp
+        self._frequencies[i] = np.nan if frequency is None else frequency
+        self._note_numbers[i] = note_name_to_midi(note_name)
+        self._durations[i] = duration
+        self._size += 1
+
+    def add_points(self, time_stamps, frequencies, note_numbers, durations):
+        """ Adds many analyzed points to the analyzed song at once.
+
+        Parameters
+        ----------
+        time_stamps : numpy.ndarray
+            the starting time of each time segment.
+        frequencies : numpy.ndarray
+            the dominant frequency at each time segment.
+        note_numbers : numpy.ndarray
+            the MIDI note number of each time segment, -1 for no note.
+        durations : numpy.ndarray or float
+            the duration of each note in secs, or one duration for all of them.
+        """
+        time_stamps = np.asarray(time_stamps, dtype=float)
+        count = len(time_stamps)
+        self._reserve(count)
+        end = self._size + count
+        self._time_stamps[self._size:end] = time_stamps
+        self._frequencies[self._size:end] = frequencies
+        self._note_numbers[self._size:end] = note_numbers
+        self._durations[self._size:end] = durations
+        self._size = end
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self) -> Iterator[AnalysisPoint]:
+        """
+        Yields an AnalysisPoint for every point of the song.
+        """
+        for batch in self._batches(0):
+            yield from self._points(batch)
+
+    def _points(self, batch: slice) -> List[AnalysisPoint]:
+        """Creates the AnalysisPoints of a slice of the points."""
+        columns = zip(self._time_stamps[batch].tolist(), self._frequencies[batch].tolist(),
+                      midi_to_note_names(self._note_numbers[batch]), self._durations[batch].tolist())
+        return [AnalysisPoint(time_stamp, frequency, note_name, duration)
+                for time_stamp, frequency, note_name, duration in columns]
+
+    def _batches(self, start: int) -> Iterator[slice]:
+        """Splits the points from index start onwards into slices of SERIALIZE_BATCH_SIZE."""
+        for batch_start in range(start, self._size, AnalyzedSong.SERIALIZE_BATCH_SIZE):
+            yield slice(batch_start, min(batch_start + AnalyzedSong.SERIALIZE_BATCH_SIZE, self._size))
 
     def get_analysis(self) -> List[AnalysisPoint]:
         """ Returns the list of analyzed data points.
@@ -159,61 +294,117 @@ class AnalyzedSong:
         return self.data
 
     def _combine_notes(self, chunk_duration):
-        """Updates self.data array to combine consecutive identical notes together
+        """Updates the points to combine consecutive identical notes together
 
         Parameters
         ----------
         chunk_duration: float
             duration of one beat in secs
         """
-        combined_notes = []
-        current_note = None
-        current_freq = None
-        current_start_time = 0.0
-        duration = 0.0
-
-        for point in self.data:
-            if current_note == point.note_name:
-                duration += chunk_duration  # assuming each segment represents 0.25s as per your example
-            else:
-                if current_note is not None:
-                    combined_notes.append(AnalysisPoint(current_start_time, current_freq, current_note, duration))
-                current_note = point.note_name
-                current_start_time = point.time_stamp
-                current_freq = point.frequency
-                duration = chunk_duration
-
-        # Add the last note
-        if current_note is not None:
-            combined_notes.append(AnalysisPoint(current_start_time, current_freq, current_note, duration))
-
-        self.data = combined_notes
+        if self._size == 0:
+            return
+
+        note_numbers = self.note_numbers
+        # a run of identical notes starts wherever the note changes
+        starts = np.flatnonzero(np.concatenate(([True], note_numbers[1:] != note_numbers[:-1])))
+        run_lengths = np.diff(np.append(starts, self._size))
+
+        self._time_stamps = self.time_stamps[starts]
+        self._frequencies = self.frequencies[starts]
+        self._note_numbers = note_numbers[starts]
+        self._durations = run_lengths * chunk_duration
+        self._size = len(starts)
         return
 
-    def save_to_file(self, filename: str):
+    def save_to_file(self, filename: str, append_from: int = None) -> int:
         """ Saves the analysis results to a file.
 
+        The notes are written in batches, so the full text is never held in memory.
+
         Parameters
         -------
         filename : str
             name of the file to save the analysis to.
+        append_from : int, optional
+            when given, only the points from this index onwards are appended
+            to a file that already holds the earlier points.
+
+        Returns
+        -------
+        int
+            the number of points in the file, to pass as append_from next time.
         """
-        with open(filename, 'w') as file:
-            file.write(str(self))
+        with open(filename, 'w' if append_from is None else 'a') as file:
+            return self.write_text(file, append_from or 0)
 
-    def __repr__(self):
+    def to_records(self) -> np.ndarray:
+        """ Returns the notes as binary note records.
+
+        Returns
+        -------
+        numpy.ndarray
+            the onset, duration and MIDI note number of every point, as a
+            structured array of note_format.NOTE_RECORD_DTYPE.
         """
-        Represents the song as a comma-delimited sequence of notes and their durations.
+        return make_records(self.time_stamps, self.durations, self.note_numbers)
+
+    def save_notes(self, filename: str):
+        """ Saves the notes to a binary note file, see note_format.
+
+        Parameters
+        -------
+        filename : str
+            name of the file to save the notes to.
+        """
+        write_notes(filename, self.to_records())
+
+    def iter_text(self, start: int = 0) -> Iterator[str]:
+        """ Yields the text representation of the song in pieces.
+
+        Joining the pieces gives str(self). Each piece covers one batch of
+        notes, so it can be streamed into a file or an HTTP response.
+
+        Parameters
+        ----------
+        start : int
+            the index of the first point to serialize. Pieces of a song
+            serialized from start > 0 begin with a comma, so they can be
+            appended to the text of the earlier points.
+
+        Yields
+        ------
+        str
+            comma-delimited notes and their durations.
         """
-        string = ''
+        for batch in self._batches(start):
+            notes = zip(midi_to_note_names(self._note_numbers[batch]), self._durations[batch].tolist())
+            piece = ','.join([f"{note_name}{duration}" for note_name, duration in notes])
+            yield piece if batch.start == 0 else ',' + piece
 
-        for i, point in enumerate(self.data):
-            string += str(point)
+    def write_text(self, file, start: int = 0) -> int:
+        """ Writes the text representation of the song to a file-like object.
 
-            if i + 1 < len(self.data):
-                string += ','
+        Parameters
+        ----------
+        file : file-like object
+            an object with a write method accepting str.
+        start : int
+            the index of the first point to write, see iter_text.
 
-        return string
+        Returns
+        -------
+        int
+            the number of points in the song.
+        """
+        for piece in self.iter_text(start):
+            file.write(piece)
+        return self._size
+
+    def __repr__(self):
+        """
+        Represents the song as a comma-delimited sequence of notes and their durations.
+        """
+        return ''.join(self.iter_text())
 
 
     def notes_to_lilypond(self, chunk_duration):
@@ -229,12 +420,40 @@ class AnalyzedSong:
         str
             A represtnation of the song notes in lilypond format
         """
+        return ''.join(self.iter_lilypond(chunk_duration))
+
+    def iter_lilypond(self, chunk_duration) -> Iterator[str]:
+        """Yields the lilypond representation of the song in pieces.
+
+        Joining the pieces gives notes_to_lilypond(chunk_duration).
+
+        Parameters
+        ----------
+        chunk_duration: float
+            duration of one beat secs
+
+        Yields
+        ------
+        str
+            the lilypond header, one piece per batch of notes, and the closing brace.
+        """
         #combine consecutive identical notes
         self._combine_notes(chunk_duration)
-        lilypond_notation = "\\relative c' {\n    \\key c \\major\n    \\time 4/4\n"
+        yield "\\relative c' {\n    \\key c \\major\n    \\time 4/4\n"
 
-        for point in self.data:
-            lilypond_notation += point.note_to_lilypond(chunk_duration)
-        lilypond_notation += "\n}"
-        return lilypond_notation
+        for batch in self._batches(0):
+            yield ''.join([point.note_to_lilypond(chunk_duration) for point in self._points(batch)])
+        yield "\n}"
 
+    def write_lilypond(self, file, chunk_duration):
+        """Writes the lilypond representation of the song to a file-like object.
+
+        Parameters
+        ----------
+        file : file-like object
+            an object with a write method accepting str.
+        chunk_duration: float
+            duration of one beat secs
+        """
+        for piece in self.iter_lilypond(chunk_duration):
+            file.write(piece)
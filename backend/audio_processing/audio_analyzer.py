@@ -1,7 +1,9 @@
 from typing import Iterator, List
 import numpy as np
-import pyaudio
-from scipy.fft import rfft, rfftfreq
+
+from .analysis_plan import frequencies_to_midi, get_analysis_plan
+from .notes import NOTE_NAMES, midi_to_note_names
+from .pitch_engines import get_pitch_engine
 
 class AudioAnalyzer:
     """A class representing the audio file analyzer.
@@ -9,26 +11,59 @@ class AudioAnalyzer:
     It offers methods for detecting the dominant frequency in an audio sample
     and other methods for converting that frequency to a note.
 
+    Note numbers follow the MIDI convention (A4 = 69). Frequencies that do
+    not map to a note, such as those below the human hearing range, are
+    given the note number -1, whose name is "None".
+
     Attributes
     ----------
     A4_freq : int
         the frequency of a standard A4 note.
     Note_Names : list of str
         a list of all standard note names.
+    reference_pitch : float
+        the frequency of A4 used by this analyzer (default is A4_freq).
+    pitch_engine : PitchEstimator
+        the engine estimating the pitch of each frame in the batched path
+        (default is the FFT peak engine, see PITCH_ENGINES).
 
     Methods
     -------
     audio_chunk_to_frequency(self, chunk_data, sampling_rate)
         Detects the frequency with the highest magnitude in the audio chunk.
+    frame_audio(self, data, frame_n_samples, hop_n_samples)
+        Splits the audio into back-to-back or overlapping frames without copying it.
+    audio_frames_to_frequencies(self, frames, sampling_rate)
+        Detects the frequency with the highest magnitude in every frame at once.
+    audio_frames_to_notes(self, frames, sampling_rate)
+        Detects the dominant frequency and its note number in every frame at once.
     frequency_to_note_name(self, frequency)
         Converts the detected frequncy to a standard note name
+    frequencies_to_midi(self, frequencies)
+        Converts an array of frequencies to MIDI note numbers.
+    bin_note_table(self, n_fft, sampling_rate)
+        Returns the MIDI note number of every bin of an FFT.
+    midi_to_note_names(self, note_numbers)
+        Converts an array of MIDI note numbers to standard note names.
+    frequencies_to_note_names(self, frequencies)
+        Converts an array of detected frequencies to standard note names.
     """
 
     A4_freq= 440.0
-    Note_Names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+    Note_Names = NOTE_NAMES
 
-    def __init__(self):
-        pass
+    def __init__(self, reference_pitch: float = A4_freq, pitch_engine='fft'):
+        """
+        Parameters
+        ----------
+        reference_pitch : float
+            the frequency of A4 in Hz. defaults to A4_freq.
+        pitch_engine : str or PitchEstimator
+            the name of a registered pitch engine ('fft' or 'yin'), or an
+            engine instance. defaults to 'fft'.
+        """
+        self.reference_pitch = reference_pitch
+        self.pitch_engine = get_pitch_engine(pitch_engine)
 
     def audio_chunk_to_frequency(self, chunk_data, sampling_rate):
         """Detects the frequency with the highest magnitude in the audio chunk.
@@ -48,15 +83,18 @@ class AudioAnalyzer:
         float
             the frequency with the highest magnitude in the input audio chunk.
         """
+        # the frequency axis and band limits are cached per chunk size
+        plan = get_analysis_plan(len(chunk_data), sampling_rate)
+
         # Calculate FFT for the chunk
-        fft_result = rfft(chunk_data)
-        freqs = rfftfreq(len(chunk_data), 1 / sampling_rate)
+        from scipy.fft import rfft
+        fft_result = rfft(plan.apply_window(chunk_data))
         magnitudes = np.abs(fft_result)
 
         # Filter out frequencies outside the human hearing range
         # and frequencies with low magnitude
-        valid_freqs = freqs[(freqs >= 20) & (freqs <= 20000)]
-        valid_magnitudes = magnitudes[(freqs >= 20) & (freqs <= 20000)]
+        valid_freqs = plan.freqs[plan.band]
+        valid_magnitudes = magnitudes[plan.band]
 
         if len(valid_freqs) == 0:  # Skip if no valid frequencies
             return None
@@ -68,6 +106,83 @@ class AudioAnalyzer:
 
         return max_freq
 
+    def frame_audio(self, data, frame_n_samples, hop_n_samples=None):
+        """Splits the audio into back-to-back or overlapping frames without copying it.
+
+        The frames are a read-only strided view on top of the input, so
+        overlapping frames share memory and trailing samples that do not fill
+        a whole frame are dropped.
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            1-D array of audio amplitudes.
+        frame_n_samples : int
+            the number of samples in each frame.
+        hop_n_samples : int, optional
+            the number of samples between the starts of consecutive frames.
+            defaults to frame_n_samples (back-to-back frames).
+
+        Returns
+        -------
+        numpy.ndarray
+            a 2-D view of shape (num_frames, frame_n_samples).
+        """
+        if hop_n_samples is None:
+            hop_n_samples = frame_n_samples
+
+        data = np.asarray(data)
+        num_frames = max(0, (len(data) - frame_n_samples) // hop_n_samples + 1)
+        stride = data.strides[0]
+        return np.lib.stride_tricks.as_strided(
+            data, shape=(num_frames, frame_n_samples),
+            strides=(stride * hop_n_samples, stride), writeable=False)
+
+    def audio_frames_to_frequencies(self, frames, sampling_rate):
+        """Detects the dominant frequency in every frame at once.
+
+        This is the batched version of audio_chunk_to_frequency: with the
+        default FFT engine, a single FFT runs over the frame axis and the
+        argmax is taken for all frames together.
+
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            2-D array of shape (num_frames, frame_n_samples).
+        sampling_rate : int
+            the sampling rate of the audio in (samples/sec).
+
+        Returns
+        -------
+        numpy.ndarray
+            the dominant frequency in each frame. Frames without any valid
+            frequency are set to NaN.
+        """
+        return self.audio_frames_to_notes(frames, sampling_rate)[0]
+
+    def audio_frames_to_notes(self, frames, sampling_rate):
+        """Detects the dominant frequency and its note number in every frame at once.
+
+        The frequencies come from the analyzer's pitch engine. The frequency
+        axis, band limits and note numbers come from the shared AnalysisPlan of
+        the frame size, so no setup runs per frame.
+
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            2-D array of shape (num_frames, frame_n_samples).
+        sampling_rate : int
+            the sampling rate of the audio in (samples/sec).
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            the dominant frequency in each frame (NaN if the frame has no
+            valid frequency) and its MIDI note number.
+        """
+        plan = get_analysis_plan(frames.shape[1], sampling_rate)
+        return self.pitch_engine.estimate_notes(frames, plan, self.reference_pitch)
+
     def frequency_to_note_name(self, frequency: float) -> str:
         """
         Converts a single frequency to a note name.
@@ -83,7 +198,77 @@ class AudioAnalyzer:
         """
         if frequency < 20:  # Below human hearing range
             return "None"
-        h = round(12 * np.log2(frequency / AudioAnalyzer.A4_freq) + 69)
+        h = round(12 * np.log2(frequency / self.reference_pitch) + 69)
         octave = h // 12 - 1
         n = h % 12
         return f"{AudioAnalyzer.Note_Names[n]}{octave}"
+
+    def frequencies_to_midi(self, frequencies) -> np.ndarray:
+        """
+        Converts an array of frequencies to MIDI note numbers.
+
+        Parameters
+        ----------
+        frequencies: numpy.ndarray
+
+        Returns
+        -------
+        numpy.ndarray
+            the MIDI note number of each frequency, -1 for frequencies
+            below the human hearing range or NaN.
+        """
+        return frequencies_to_midi(frequencies, self.reference_pitch)
+
+    def bin_note_table(self, n_fft: int, sampling_rate: int) -> np.ndarray:
+        """
+        Returns the MIDI note number of every bin of an FFT.
+
+        Tables are kept on the shared AnalysisPlan of the frame size, so they
+        are only computed once per (n_fft, sampling_rate, reference_pitch).
+
+        Parameters
+        ----------
+        n_fft: int
+            the number of samples in each FFT frame.
+        sampling_rate: int
+            the sampling rate of the audio in (samples/sec).
+
+        Returns
+        -------
+        numpy.ndarray
+            a read-only array with the note number of each rfft bin.
+        """
+        return get_analysis_plan(n_fft, sampling_rate).note_table(self.reference_pitch)
+
+    def midi_to_note_names(self, note_numbers) -> List[str]:
+        """
+        Converts an array of MIDI note numbers to note names.
+
+        Names are looked up in a precomputed table, so no string is built per note.
+
+        Parameters
+        ----------
+        note_numbers: numpy.ndarray
+
+        Returns
+        -------
+        list[str]
+            the standard name of each note, "None" for note number -1
+        """
+        return midi_to_note_names(note_numbers)
+
+    def frequencies_to_note_names(self, frequencies) -> List[str]:
+        """
+        Converts an array of frequencies to note names.
+
+        Parameters
+        ----------
+        frequencies: numpy.ndarray
+
+        Returns
+        -------
+        list[str]
+            the standard name of the note for each frequency
+        """
+        return self.midi_to_note_names(self.frequencies_to_midi(frequencies))
+
@@ -0,0 +1,206 @@
+"""
+Batch transcription
+
+Transcribes many stored recordings in parallel across a process pool and
+writes their notes to the note data directory, one `<filename>.notes` per
+`<filename>.m4a` or `<filename>.wav`, like the /process-recording route.
+`--format text` writes the legacy comma-delimited `<filename>.txt` instead.
+
+Usage (from the backend directory):
+    python -m audio_processing.batch ./audio_data --output ./note_data --workers 8
+    python -m audio_processing.batch manifest.txt --timings timings.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional
+
+from .note_format import NOTE_FILE_EXTENSION
+from .song import Song
+
+AUDIO_EXTENSIONS = ('.m4a', '.wav')
+OUTPUT_FORMATS = ('notes', 'text')
+
+
+class TranscriptionResult(NamedTuple):
+    """The outcome of transcribing one file.
+
+    Attributes
+    ----------
+    path : str
+        the transcribed audio file.
+    output_path : str
+        the note file written for it, None if the transcription failed.
+    audio_seconds : float
+        the length of the audio in secs, 0 if it could not be loaded.
+    seconds : float
+        the wall time spent on the file in secs.
+    error : str
+        the error that stopped the transcription, None on success.
+    """
+    path: str
+    output_path: Optional[str]
+    audio_seconds: float
+    seconds: float
+    error: Optional[str]
+
+
+def find_recordings(source: str) -> List[str]:
+    """Lists the recordings to transcribe from a directory or a manifest.
+
+    Parameters
+    ----------
+    source : str
+        a directory, whose .m4a and .wav files are listed, or a manifest
+        file with one path per line. Blank lines and lines starting with #
+        are skipped, and relative paths are resolved against the manifest.
+
+    Returns
+    -------
+    list[str]
+        the paths of the recordings, sorted for directories.
+    """
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if name.endswith(AUDIO_EXTENSIONS))
+
+    manifest_dir = os.path.dirname(source)
+
+    with open(source, 'r') as f:
+        lines = [line.strip() for line in f]
+
+    return [os.path.join(manifest_dir, line) for line in lines if line and not line.startswith('#')]
+
+
+def transcribe_file(path: str, output_dir: str, chunk_duration=0.25, hop_duration=None,
+    pitch_engine='fft', output_format='notes') -> TranscriptionResult:
+    """Transcribes one recording and saves its notes, without raising.
+
+    Any error is caught and reported in the result, so one corrupt file
+    does not stop the rest of the batch.
+
+    Parameters
+    ----------
+    path : str
+        the .m4a or .wav file to transcribe.
+    output_dir : str
+        the directory the note file is written to.
+    chunk_duration, hop_duration, pitch_engine
+        the analysis settings, see Song.
+    output_format : str
+        'notes' for a binary `<filename>.notes` file (see note_format), or
+        'text' for a comma-delimited `<filename>.txt` file.
+
+    Returns
+    -------
+    TranscriptionResult
+    """
+    start = time.perf_counter()
+    song = Song(path, chunk_duration, hop_duration=hop_duration, pitch_engine=pitch_engine)
+
+    try:
+        analyzed_song = song.audio_to_notes()
+        filename = os.path.splitext(os.path.basename(path))[0]
+
+        if output_format == 'text':
+            output_path = os.path.join(output_dir, f'{filename}.txt')
+            analyzed_song.save_to_file(output_path)
+        else:
+            output_path = os.path.join(output_dir, f'{filename}{NOTE_FILE_EXTENSION}')
+            analyzed_song.save_notes(output_path)
+    except Exception as e:
+        return TranscriptionResult(path, None, song.duration or 0.0, time.perf_counter() - start,
+                                   f'{type(e).__name__}: {e}')
+
+    return TranscriptionResult(path, output_path, song.duration, time.perf_counter() - start, None)
+
+
+def _transcribe_task(task):
+    """Unpacks a (path, output_dir, options) task for ProcessPoolExecutor.map."""
+    path, output_dir, options = task
+    return transcribe_file(path, output_dir, **options)
+
+
+def run_batch(paths: List[str], output_dir: str, workers=None, tasks_per_submit=4, **options):
+    """Transcribes recordings in parallel across a process pool.
+
+    Parameters
+    ----------
+    paths : list[str]
+        the recordings to transcribe.
+    output_dir : str
+        the directory the note files are written to, created if missing.
+    workers : int, optional
+        the number of worker processes. defaults to the number of CPUs.
+    tasks_per_submit : int
+        the number of files sent to a worker at a time, which cuts
+        inter-process overhead for large batches of short files.
+    **options
+        the analysis settings passed to transcribe_file.
+
+    Yields
+    ------
+    TranscriptionResult
+        the result of every file, in the order of paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(path, output_dir, options) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_transcribe_task, tasks, chunksize=max(1, tasks_per_submit))
+
+
+def main(argv=None) -> int:
+    """Runs the batch transcription command line.
+
+    Returns
+    -------
+    int
+        the exit status, 1 if any file failed.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='directory of recordings, or a manifest file with one path per line')
+    parser.add_argument('--output', default='./note_data', help='directory for the note files (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--tasks-per-submit', type=int, default=4, help='files sent to a worker at a time')
+    parser.add_argument('--chunk-duration', type=float, default=0.25)
+    parser.add_argument('--hop-duration', type=float, default=None)
+    parser.add_argument('--pitch-engine', default='fft')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='notes', help='note file format (default: %(default)s)')
+    parser.add_argument('--timings', help='write per-file timings to this CSV file')
+    args = parser.parse_args(argv)
+
+    paths = find_recordings(args.source)
+    results = []
+    start = time.perf_counter()
+
+    for result in run_batch(paths, args.output, args.workers, args.tasks_per_submit,
+                            chunk_duration=args.chunk_duration, hop_duration=args.hop_duration,
+                            pitch_engine=args.pitch_engine, output_format=args.format):
+        results.append(result)
+        status = 'ok  ' if result.error is None else 'FAIL'
+        detail = f'  {result.error}' if result.error else ''
+        print(f'{status} {result.seconds:8.3f}s {result.audio_seconds:9.1f}s audio  {result.path}{detail}')
+
+    elapsed = time.perf_counter() - start
+    failed = sum(result.error is not None for result in results)
+    audio_seconds = sum(result.audio_seconds for result in results if result.error is None)
+    print(f'{len(results)} files ({failed} failed) in {elapsed:.2f}s: '
+          f'{len(results) / elapsed if elapsed else 0:.1f} files/s, '
+          f'{audio_seconds / elapsed if elapsed else 0:.0f} audio-seconds/s')
+
+    if args.timings:
+        with open(args.timings, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(TranscriptionResult._fields)
+            writer.writerows(results)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
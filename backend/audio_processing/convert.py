@@ -1,4 +1,9 @@
-from pydub import AudioSegment
+import numpy as np
+
+from . import instrumentation
+
+# numpy sample types for each pydub sample width in bytes
+_SAMPLE_TYPES = {1: np.int8, 2: np.int16, 4: np.int32}
 
 def convert_m4a_to_wav(path):
     """
@@ -9,6 +14,36 @@ def convert_m4a_to_wav(path):
     path: str
         The path to the file, WITHOUT a .m4a extension
     """
-    audio = AudioSegment.from_file(f'{path}.m4a', format='m4a')
-    audio.export(f'{path}.wav', format='wav')
-    return f'{path}.wav'
\ No newline at end of file
+    from pydub import AudioSegment
+    with instrumentation.stage('convert_m4a_to_wav'):
+        audio = AudioSegment.from_file(f'{path}.m4a', format='m4a')
+        audio.export(f'{path}.wav', format='wav')
+    return f'{path}.wav'
+
+def decode_m4a_to_pcm(path):
+    """
+    Decodes a M4A file to PCM samples in memory, without writing a WAV file.
+
+    The ffmpeg output is piped straight into memory and wrapped in a NumPy
+    array, so the samples match what convert_m4a_to_wav would have written.
+
+    Parameters
+    ----------
+    path: str
+        The path to the file, WITHOUT a .m4a extension
+
+    Returns
+    -------
+    tuple[int, numpy.ndarray]
+        the sampling rate (in samples/sec) and the array of audio amplitudes,
+        with shape (num_samples, num_channels) for multichannel audio.
+    """
+    from pydub import AudioSegment
+    with instrumentation.stage('decode_m4a'):
+        audio = AudioSegment.from_file(f'{path}.m4a', format='m4a')
+    data = np.frombuffer(audio.raw_data, dtype=_SAMPLE_TYPES[audio.sample_width])
+
+    if audio.channels > 1:
+        data = data.reshape(-1, audio.channels)
+
+    return audio.frame_rate, data
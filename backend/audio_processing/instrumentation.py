@@ -0,0 +1,77 @@
+"""
+Instrumentation hooks
+
+The audio processing code reports how long its stages take and how much
+audio it processed through these hooks. They do nothing until an observer
+is set, e.g. by the API to export the timings as metrics, so the package
+has no dependency on any metrics library.
+
+An observer is any object with the methods:
+    observe_stage(stage, seconds)
+        called when a stage, e.g. 'decode_m4a' or 'analyze', finishes.
+    add_audio_seconds(seconds)
+        called when a song has been analyzed.
+"""
+
+import time
+from contextlib import contextmanager
+
+_observer = None
+
+
+def set_observer(observer):
+    """Sets the observer of the hooks, None to disable them.
+
+    Parameters
+    ----------
+    observer : object
+        an object with observe_stage and add_audio_seconds methods, or None.
+    """
+    global _observer
+    _observer = observer
+
+
+def get_observer():
+    """Returns the observer of the hooks, None if they are disabled."""
+    return _observer
+
+
+@contextmanager
+def stage(name: str):
+    """A context manager reporting the duration of a stage to the observer.
+
+    Nothing is timed when there is no observer.
+
+    Parameters
+    ----------
+    name : str
+        the name of the stage.
+    """
+    observer = _observer
+
+    if observer is None:
+        yield
+        return
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        observer.observe_stage(name, time.perf_counter() - start)
+
+
+def observe_stage(name: str, seconds: float):
+    """Reports the duration of a stage timed by the caller, e.g. summed over the blocks of a song."""
+    observer = _observer
+
+    if observer is not None:
+        observer.observe_stage(name, seconds)
+
+
+def audio_processed(seconds: float):
+    """Reports the length of a song that has been analyzed."""
+    observer = _observer
+
+    if observer is not None:
+        observer.add_audio_seconds(seconds)
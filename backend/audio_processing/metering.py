@@ -0,0 +1,121 @@
+"""
+Metering data storage
+
+The frontend uploads the metering (loudness in dB) of a recording as a list
+of quoted numbers, e.g. `["-35.2", "-160"]`. It is parsed once into a
+float32 array and stored as a `.npy` file, and served back as a list of
+strings, optionally downsampled to fewer points.
+"""
+
+import re
+
+import numpy as np
+
+METERING_FILE_EXTENSION = '.npy'
+
+_NUMBER = r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?"
+_ITEM = rf"""\s*+(?:"\s*+{_NUMBER}\s*+"|'\s*+{_NUMBER}\s*+')\s*+"""
+# a list literal of quoted numbers, with an optional trailing comma. the
+# whitespace runs are possessive, so a failed match never tries splitting
+# them between adjacent \s*, which takes quadratic time on long runs
+_METERING_PATTERN = re.compile(rf"\[(?:{_ITEM}(?:,{_ITEM})*,?)?\s*+\]")
+_NUMBER_PATTERN = re.compile(_NUMBER)
+
+
+def parse_metering(text: str) -> np.ndarray:
+    """Parses uploaded metering data.
+
+    Parameters
+    ----------
+    text : str
+        a list of quoted numbers, e.g. `["-35.2", "-160"]`.
+
+    Returns
+    -------
+    numpy.ndarray
+        the metering values as float32.
+
+    Raises
+    ------
+    ValueError
+        if the text is not a list of quoted numbers.
+    """
+    if _METERING_PATTERN.fullmatch(text) is None:
+        raise ValueError("Metering data not formatted correctly")
+
+    return np.array(_NUMBER_PATTERN.findall(text), dtype=float).astype(np.float32)
+
+
+def save_metering(file_path: str, values: np.ndarray):
+    """Saves metering values to a .npy file.
+
+    Parameters
+    ----------
+    file_path : str
+        the path of the .npy file.
+    values : numpy.ndarray
+        the metering values.
+    """
+    with open(file_path, 'wb') as f:
+        np.save(f, np.asarray(values, dtype=np.float32))
+
+
+def load_metering(file_path: str) -> np.ndarray:
+    """Loads metering values saved by save_metering.
+
+    Parameters
+    ----------
+    file_path : str
+        the path of the .npy file.
+
+    Returns
+    -------
+    numpy.ndarray
+        the metering values as float32.
+    """
+    return np.load(file_path)
+
+
+def downsample_metering(values: np.ndarray, n_points: int) -> np.ndarray:
+    """Reduces metering values to at most n_points.
+
+    The values are split into n_points buckets of near-equal size and the
+    loudest value of each bucket is kept, so peaks survive downsampling.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        the metering values.
+    n_points : int
+        the maximum number of values to return.
+
+    Returns
+    -------
+    numpy.ndarray
+        the downsampled values, or the values unchanged if there are no
+        more than n_points.
+    """
+    if n_points <= 0:
+        raise ValueError(f"n_points must be positive, got {n_points}")
+
+    if len(values) <= n_points:
+        return values
+
+    starts = np.linspace(0, len(values), n_points, endpoint=False).astype(int)
+    return np.maximum.reduceat(values, starts)
+
+
+def metering_to_strings(values: np.ndarray) -> list:
+    """Formats metering values as the list of strings sent to the frontend.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        the metering values.
+
+    Returns
+    -------
+    list[str]
+        the shortest representation of each float32 value.
+    """
+    return np.asarray(values, dtype=np.float32).astype(str).tolist()
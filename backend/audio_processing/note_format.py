@@ -0,0 +1,194 @@
+"""
+Binary note sequence format
+
+A note file holds a small header followed by one packed record per note:
+
+    offset  size  field
+    0       4     magic, b'ECHN'
+    4       2     format version (little-endian uint16), currently 1
+    6       2     record size in bytes (uint16), 10 for version 1
+    8       4     number of records (uint32)
+    12      4     reserved, zero
+    16      10*n  records: onset (float32 secs), duration (float32 secs),
+                  MIDI note number (int16, -1 for "None")
+
+The comma-delimited text representation (e.g. `C40.25,D40.5`) is only kept
+as a compatibility layer for the API, see notes_to_text and text_to_records.
+"""
+
+import os
+import re
+import struct
+import threading
+
+import numpy as np
+
+from .notes import NOTE_NAMES, _NOTE_NUMBERS, midi_to_note_names
+
+NOTE_FILE_MAGIC = b'ECHN'
+NOTE_FILE_VERSION = 1
+NOTE_FILE_EXTENSION = '.notes'
+
+# fields of a record, packed without padding
+NOTE_RECORD_DTYPE = np.dtype([('onset', '<f4'), ('duration', '<f4'), ('note', '<i2')])
+
+_HEADER = struct.Struct('<4sHHI4x')
+
+# a note name, its octave (-1 to 10) and its duration, e.g. "C#40.25"; durations
+# never start with "0" followed by a digit, which keeps octave 10 unambiguous
+_NOTE = r"(None|(?:" + "|".join(sorted(NOTE_NAMES, key=len, reverse=True)) + r")(?:-1|10|\d))(\d+(?:\.\d+)?(?:e-?\d+)?)"
+_NOTE_PATTERN = re.compile(_NOTE)
+_SEQUENCE_PATTERN = re.compile(f"(?:{_NOTE},)*{_NOTE}")
+
+
+def make_records(onsets, durations, note_numbers) -> np.ndarray:
+    """Packs note columns into an array of records.
+
+    Parameters
+    ----------
+    onsets : numpy.ndarray
+        the start time of each note in secs.
+    durations : numpy.ndarray
+        the duration of each note in secs.
+    note_numbers : numpy.ndarray
+        the MIDI note number of each note, -1 for "None".
+
+    Returns
+    -------
+    numpy.ndarray
+        a structured array of NOTE_RECORD_DTYPE.
+    """
+    records = np.empty(len(note_numbers), dtype=NOTE_RECORD_DTYPE)
+    records['onset'] = onsets
+    records['duration'] = durations
+    records['note'] = note_numbers
+    return records
+
+
+def write_notes(file_path: str, records: np.ndarray):
+    """Writes note records to a note file.
+
+    The records are written to a temporary file that then replaces the note
+    file, so readers never see a partial file, and arrays memory-mapped by
+    read_notes keep reading the previous records instead of a truncated file.
+
+    Parameters
+    ----------
+    file_path : str
+        the path of the note file.
+    records : numpy.ndarray
+        a structured array of NOTE_RECORD_DTYPE, see make_records.
+    """
+    records = np.asarray(records, dtype=NOTE_RECORD_DTYPE)
+    temp_path = f'{file_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(NOTE_FILE_MAGIC, NOTE_FILE_VERSION, NOTE_RECORD_DTYPE.itemsize, len(records)))
+            f.write(records.tobytes())
+
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_notes(file_path: str) -> np.ndarray:
+    """Reads the records of a note file.
+
+    The records are memory-mapped rather than read, so only the pages that
+    are accessed are loaded. write_notes replaces rather than rewrites note
+    files, so the mapping stays valid when the file is written again.
+
+    Parameters
+    ----------
+    file_path : str
+        the path of the note file.
+
+    Returns
+    -------
+    numpy.ndarray
+        a read-only structured array of NOTE_RECORD_DTYPE.
+
+    Raises
+    ------
+    ValueError
+        if the file is not a note file of a supported version, or is truncated.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        size = f.seek(0, 2)
+
+    if len(header) < _HEADER.size:
+        raise ValueError(f"{file_path} is not a note file")
+
+    magic, version, record_size, count = _HEADER.unpack(header)
+
+    if magic != NOTE_FILE_MAGIC:
+        raise ValueError(f"{file_path} is not a note file")
+
+    if version != NOTE_FILE_VERSION or record_size != NOTE_RECORD_DTYPE.itemsize:
+        raise ValueError(f"Unsupported note file version {version} in {file_path}")
+
+    if size < _HEADER.size + count * record_size:
+        raise ValueError(f"{file_path} is truncated")
+
+    if count == 0:
+        return np.empty(0, dtype=NOTE_RECORD_DTYPE)
+
+    return np.memmap(file_path, dtype=NOTE_RECORD_DTYPE, mode='r', offset=_HEADER.size, shape=(count,))
+
+
+def notes_to_text(records: np.ndarray) -> str:
+    """Formats note records as comma-delimited notes and their durations.
+
+    Parameters
+    ----------
+    records : numpy.ndarray
+        a structured array of NOTE_RECORD_DTYPE.
+
+    Returns
+    -------
+    str
+        the notes, e.g. "C40.25,D40.5". durations are written with the
+        shortest representation of their float32 value.
+    """
+    note_names = midi_to_note_names(records['note'])
+    # notes share a handful of durations, so only the distinct ones are formatted
+    durations, duration_index = np.unique(records['duration'], return_inverse=True)
+    durations = durations.astype(str).astype(object)[duration_index].tolist()
+    return ','.join([note_name + duration for note_name, duration in zip(note_names, durations)])
+
+
+def text_to_records(text: str) -> np.ndarray:
+    """Parses comma-delimited notes and their durations into note records.
+
+    The onset of each note is the sum of the durations before it.
+
+    Parameters
+    ----------
+    text : str
+        the notes, e.g. "C40.25,D40.5". an empty string has no notes.
+
+    Returns
+    -------
+    numpy.ndarray
+        a structured array of NOTE_RECORD_DTYPE.
+
+    Raises
+    ------
+    ValueError
+        if the text is not a valid note sequence.
+    """
+    if not text:
+        return np.empty(0, dtype=NOTE_RECORD_DTYPE)
+
+    if _SEQUENCE_PATTERN.fullmatch(text) is None:
+        raise ValueError("Invalid note sequence")
+
+    notes = _NOTE_PATTERN.findall(text)
+    note_numbers = [_NOTE_NUMBERS[note_name] for note_name, _ in notes]
+    durations = np.array([duration for _, duration in notes], dtype=float)
+    onsets = np.concatenate([[0.0], np.cumsum(durations[:-1])])
+    return make_records(onsets, durations, note_numbers)
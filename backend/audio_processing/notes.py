@@ -0,0 +1,92 @@
+from typing import List
+import re
+import numpy as np
+
+# standard note names within an octave, starting from C
+NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+# MIDI note numbers covered by the precomputed note name table (octaves -1 to 10)
+_MIDI_TABLE_SIZE = 144
+
+_NOTE_NAME_PATTERN = re.compile(r"^(" + "|".join(sorted(NOTE_NAMES, key=len, reverse=True)) + r")(-?\d+)$")
+
+
+def midi_to_note_name(note_number: int) -> str:
+    """Formats a MIDI note number as a note name, e.g. 69 as "A4".
+
+    Parameters
+    ----------
+    note_number : int
+        the MIDI note number, -1 for no note.
+
+    Returns
+    -------
+    str
+        the standard name of the note, "None" for negative note numbers.
+    """
+    if note_number < 0:
+        return "None"
+    return f"{NOTE_NAMES[note_number % 12]}{note_number // 12 - 1}"
+
+
+# indexed by MIDI note number; the last entry makes note number -1 map to "None"
+_NOTE_NAME_TABLE = np.array([midi_to_note_name(h) for h in range(_MIDI_TABLE_SIZE)] + ["None"], dtype=object)
+_NOTE_NUMBERS = {name: h for h, name in enumerate(_NOTE_NAME_TABLE[:-1])}
+_NOTE_NUMBERS["None"] = -1
+
+
+def midi_to_note_names(note_numbers) -> List[str]:
+    """Converts an array of MIDI note numbers to note names.
+
+    Names are looked up in a precomputed table, so no string is built per note.
+
+    Parameters
+    ----------
+    note_numbers : numpy.ndarray
+        MIDI note numbers, -1 for no note.
+
+    Returns
+    -------
+    list[str]
+        the standard name of each note, "None" for note number -1.
+    """
+    note_numbers = np.asarray(note_numbers, dtype=int)
+
+    if note_numbers.size and note_numbers.max() >= _MIDI_TABLE_SIZE:  # beyond the table
+        return [midi_to_note_name(h) for h in note_numbers.tolist()]
+
+    return _NOTE_NAME_TABLE[note_numbers].tolist()
+
+
+def note_name_to_midi(note_name: str) -> int:
+    """Parses a note name such as "C#4" into its MIDI note number.
+
+    Parameters
+    ----------
+    note_name : str
+        a standard note name followed by its octave, or "None".
+
+    Returns
+    -------
+    int
+        the MIDI note number, -1 for "None".
+
+    Raises
+    ------
+    ValueError
+        if note_name is not a valid note name.
+    """
+    note_number = _NOTE_NUMBERS.get(note_name)
+
+    if note_number is None:
+        match = _NOTE_NAME_PATTERN.match(note_name)
+
+        if match is None:
+            raise ValueError(f"Invalid note name {note_name!r}")
+
+        note_number = (int(match.group(2)) + 1) * 12 + NOTE_NAMES.index(match.group(1))
+
+        if note_number < 0:
+            raise ValueError(f"Invalid note name {note_name!r}")
+
+    return note_number
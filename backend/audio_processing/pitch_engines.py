@@ -0,0 +1,232 @@
+import numpy as np
+
+from .analysis_plan import frequencies_to_midi
+
+class PitchEstimator:
+    """A base class for pitch estimation engines used by AudioAnalyzer.
+
+    An engine estimates the fundamental frequency of every frame of a batch
+    at once. Subclasses implement estimate, and may override estimate_notes
+    when they can derive note numbers more cheaply than from frequencies.
+
+    Attributes
+    ----------
+    name : str
+        the name the engine is registered under in PITCH_ENGINES.
+
+    Methods
+    -------
+    estimate(frames, plan)
+        Estimates the fundamental frequency of every frame.
+    estimate_notes(frames, plan, reference_pitch)
+        Estimates the fundamental frequency and MIDI note number of every frame.
+    """
+
+    name = None
+
+    def estimate(self, frames, plan) -> np.ndarray:
+        """Estimates the fundamental frequency of every frame.
+
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            2-D array of shape (num_frames, frame_n_samples).
+        plan : AnalysisPlan
+            the shared analysis plan of the frame size and sampling rate.
+
+        Returns
+        -------
+        numpy.ndarray
+            the estimated frequency of each frame in Hz, NaN where no pitch was found.
+        """
+        raise NotImplementedError
+
+    def estimate_notes(self, frames, plan, reference_pitch: float):
+        """Estimates the fundamental frequency and MIDI note number of every frame.
+
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            2-D array of shape (num_frames, frame_n_samples).
+        plan : AnalysisPlan
+            the shared analysis plan of the frame size and sampling rate.
+        reference_pitch : float
+            the frequency of A4 in Hz.
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            the estimated frequency of each frame and its MIDI note number
+            (-1 where no pitch was found).
+        """
+        frequencies = self.estimate(frames, plan)
+        return frequencies, frequencies_to_midi(frequencies, reference_pitch)
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class FFTPeakEstimator(PitchEstimator):
+    """A pitch engine taking the frequency of the highest-magnitude FFT bin.
+
+    This is the original analysis: fast and exact on pure tones, but prone to
+    octave errors on voices whose harmonics are louder than the fundamental.
+    """
+
+    name = 'fft'
+
+    def estimate(self, frames, plan) -> np.ndarray:
+        return self._peak_bins(frames, plan)[0]
+
+    def estimate_notes(self, frames, plan, reference_pitch: float):
+        frequencies, max_bins = self._peak_bins(frames, plan)
+
+        if max_bins is None:
+            return frequencies, np.full(len(frames), -1)
+
+        return frequencies, plan.note_table(reference_pitch)[max_bins]
+
+    def _peak_bins(self, frames, plan):
+        """Returns the frequency and index of the loudest in-band bin of every frame."""
+        band = plan.band
+
+        if len(frames) == 0 or band.stop <= band.start:
+            return np.full(len(frames), np.nan), None
+
+        from scipy.fft import rfft
+        magnitudes = np.abs(rfft(plan.apply_window(frames), axis=-1)[:, band])
+        max_bins = band.start + np.argmax(magnitudes, axis=-1)
+        return plan.freqs[max_bins], max_bins
+
+
+class YinEstimator(PitchEstimator):
+    """A pitch engine based on the YIN algorithm.
+
+    The difference function of every frame is computed from an autocorrelation
+    done with one batched FFT over all frames, followed by the cumulative mean
+    normalization, absolute threshold and parabolic interpolation steps of
+    de Cheveigne and Kawahara (2002).
+
+    Attributes
+    ----------
+    fmin : float
+        the lowest detectable frequency in Hz.
+    fmax : float
+        the highest detectable frequency in Hz.
+    threshold : float
+        the absolute threshold on the normalized difference function.
+    silence_threshold : float
+        frames whose RMS amplitude is below this value have no pitch.
+    """
+
+    name = 'yin'
+
+    def __init__(self, fmin=40.0, fmax=2000.0, threshold=0.1, silence_threshold=1e-6):
+        """
+        Parameters
+        ----------
+        fmin : float
+            the lowest detectable frequency in Hz. defaults to 40 Hz.
+        fmax : float
+            the highest detectable frequency in Hz. defaults to 2000 Hz.
+        threshold : float
+            the absolute threshold on the normalized difference function.
+            defaults to 0.1.
+        silence_threshold : float
+            the RMS amplitude below which a frame has no pitch.
+        """
+        self.fmin = fmin
+        self.fmax = fmax
+        self.threshold = threshold
+        self.silence_threshold = silence_threshold
+
+    def estimate(self, frames, plan) -> np.ndarray:
+        num_frames, frame_n_samples = frames.shape
+        sampling_rate = plan.sampling_rate
+        # integrate the difference over half a frame, as in the YIN paper
+        window_n_samples = frame_n_samples // 2
+        tau_min = max(1, int(sampling_rate / self.fmax))
+        tau_max = min(int(np.ceil(sampling_rate / self.fmin)), frame_n_samples - window_n_samples - 1)
+
+        if num_frames == 0 or tau_max <= tau_min + 1:
+            return np.full(num_frames, np.nan)
+
+        n_samples = window_n_samples + tau_max + 1  # the lags only reach this far into each frame
+        x = np.asarray(frames[:, :n_samples], dtype=float)
+
+        # autocorrelation r[tau] = sum_j x[j] x[j + tau] over the integration window, for all frames
+        from scipy.fft import irfft, next_fast_len, rfft
+        n_fft = next_fast_len(n_samples)
+        spectrum = rfft(x, n_fft, axis=-1)
+        window_spectrum = rfft(x[:, :window_n_samples], n_fft, axis=-1)
+        autocorrelation = irfft(spectrum * np.conj(window_spectrum), n_fft, axis=-1)[:, :tau_max + 1]
+
+        # energy of the window shifted by tau, from a running sum of squares
+        squares = np.concatenate([np.zeros((num_frames, 1)), np.cumsum(x ** 2, axis=-1)], axis=-1)
+        energy = squares[:, window_n_samples:window_n_samples + tau_max + 1] - squares[:, :tau_max + 1]
+        difference = np.maximum(energy[:, :1] + energy - 2 * autocorrelation, 0)
+
+        # cumulative mean normalized difference
+        cumulative = np.cumsum(difference[:, 1:], axis=-1)
+        taus = np.arange(1, tau_max + 1)
+        normalized = np.ones_like(difference)
+        np.divide(difference[:, 1:] * taus, cumulative, out=normalized[:, 1:], where=cumulative > 0)
+
+        # first local minimum under the threshold, else the global minimum
+        candidates = normalized[:, tau_min:tau_max + 1]
+        troughs = np.zeros_like(candidates, dtype=bool)
+        troughs[:, 1:-1] = (candidates[:, 1:-1] < candidates[:, :-2]) & (candidates[:, 1:-1] <= candidates[:, 2:])
+        below = troughs & (candidates < self.threshold)
+        best = np.where(below.any(axis=-1), np.argmax(below, axis=-1), np.argmin(candidates, axis=-1))
+        tau = tau_min + best
+
+        # parabolic interpolation around the chosen lag
+        rows = np.arange(num_frames)
+        inner = (tau > tau_min) & (tau < tau_max)
+        left = normalized[rows, np.maximum(tau - 1, 0)]
+        center = normalized[rows, tau]
+        right = normalized[rows, np.minimum(tau + 1, tau_max)]
+        curvature = left - 2 * center + right
+        shift = np.zeros(num_frames)
+        np.divide(left - right, 2 * curvature, out=shift, where=inner & (curvature > 0))
+        frequencies = sampling_rate / (tau + np.clip(shift, -1, 1))
+
+        rms = np.sqrt(squares[:, n_samples] / n_samples)
+        frequencies[rms < self.silence_threshold] = np.nan
+        return frequencies
+
+    def __repr__(self):
+        return f"YinEstimator(fmin={self.fmin}, fmax={self.fmax}, threshold={self.threshold})"
+
+
+# engines selectable by name in AudioAnalyzer and Song
+PITCH_ENGINES = {
+    FFTPeakEstimator.name: FFTPeakEstimator,
+    YinEstimator.name: YinEstimator,
+}
+
+
+def get_pitch_engine(engine) -> PitchEstimator:
+    """Returns a pitch engine from its name, or the engine itself.
+
+    Parameters
+    ----------
+    engine : str or PitchEstimator
+        a name registered in PITCH_ENGINES, or an engine instance.
+
+    Returns
+    -------
+    PitchEstimator
+
+    Raises
+    ------
+    ValueError
+        if no engine is registered under the name.
+    """
+    if isinstance(engine, PitchEstimator):
+        return engine
+
+    if engine not in PITCH_ENGINES:
+        raise ValueError(f"Unknown pitch engine {engine!r}, expected one of {sorted(PITCH_ENGINES)}")
+
+    return PITCH_ENGINES[engine]()
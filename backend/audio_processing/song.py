@@ -1,13 +1,18 @@
-from scipy.io import wavfile
+import time
+from typing import Iterator
+import numpy as np
 
-from .analyzed_song import AnalyzedSong
+from . import instrumentation
+from .analyzed_song import AnalysisPoint, AnalyzedSong
 from .audio_analyzer import AudioAnalyzer
-from .convert import convert_m4a_to_wav
+from .convert import decode_m4a_to_pcm
+from .notes import midi_to_note_names
 
 class Song:
     """A class representing the audio file before analysis.
 
-    The Song class is instantiated with a raw audio file.
+    The Song class is instantiated with a raw audio file, or with PCM samples
+    that were already decoded in memory (see from_pcm).
     It loads the file for anbalysis. The main function is audio_to_notes 
     which samples data points, instantiates an AudioAnalyzer, and uses it
     to return an AnalyzedSong instance.
@@ -19,62 +24,231 @@ class Song:
         The full path of the raw audio file before analysis
     chunk_duration: float
         the duration of one beat in secs defaults to 0.25 sec.
+    hop_duration: float
+        the time in secs between the starts of consecutive chunks. defaults
+        to chunk_duration (back-to-back chunks); smaller values make the
+        chunks overlap for finer timing.
+    reference_pitch : float
+        the frequency of A4 in Hz used to name the notes.
+    pitch_engine : str or PitchEstimator
+        the pitch engine used by the AudioAnalyzer, 'fft' by default.
+    sampling_rate : int
+        the sampling rate of the audio in (samples/sec), None until it is loaded.
+    duration : float
+        the length of the audio in secs, None until it is loaded.
+    BATCH_N_CHUNKS : int
+        the number of chunks analyzed together by one batched FFT.
 
     Methods
     -------
+    from_pcm(sampling_rate, data, chunk_duration)
+        Creates a Song from PCM samples that are already in memory.
     audio_to_notes()
         Converts the audio file to an AnalyzedSong object.
+    stream_notes(block_duration)
+        Analyzes the audio file block by block and yields its notes as they are found.
     """
 
-    def __init__(self, file_path: str, chunk_duration=0.25):
+    BATCH_N_CHUNKS = 64
+
+    def __init__(self, file_path: str, chunk_duration=0.25, reference_pitch=AudioAnalyzer.A4_freq,
+        hop_duration=None, pitch_engine='fft'):
         """
         Parameters
         ----------
         file_path : str
-            The full path of the raw audio file before analysis
+            The full path of the raw audio file before analysis, or None
+            for songs created with from_pcm.
         chunk_duration : float
             the length of each time segment in secs. defaults to 0.25 sec.
+        reference_pitch : float
+            the frequency of A4 in Hz. defaults to AudioAnalyzer.A4_freq.
+        hop_duration : float, optional
+            the time in secs between the starts of consecutive chunks.
+            defaults to chunk_duration.
+        pitch_engine : str or PitchEstimator
+            the name of a registered pitch engine ('fft' or 'yin'), or an
+            engine instance. defaults to 'fft'.
+
+        Raises
+        ------
+        ValueError
+            if hop_duration is not positive.
         """
+        hop_duration = chunk_duration if hop_duration is None else hop_duration
+
+        if not hop_duration > 0:
+            raise ValueError(f"hop_duration must be positive, got {hop_duration}")
+
         self.file_path = file_path
         self.chunk_duration = chunk_duration
+        self.reference_pitch = reference_pitch
+        self.hop_duration = hop_duration
+        self.pitch_engine = pitch_engine
+        self.sampling_rate = None
+        self.duration = None
+        self._pcm = None
+
+    @classmethod
+    def from_pcm(cls, sampling_rate: int, data, chunk_duration=0.25, **kwargs) -> 'Song':
+        """ Creates a Song from PCM samples that are already in memory.
+
+        Parameters
+        ----------
+        sampling_rate : int
+            the sampling rate of the audio in (samples/sec).
+        data : numpy.ndarray
+            array of audio amplitudes, one column per channel for multichannel audio.
+        chunk_duration : float
+            the length of each time segment in secs. defaults to 0.25 sec.
+        **kwargs
+            other keyword arguments of the Song constructor.
+
+        Returns
+        -------
+        Song
+            a Song without a backing file.
+        """
+        song = cls(None, chunk_duration, **kwargs)
+        song._pcm = (sampling_rate, data)
+        return song
 
     def audio_to_notes(self) -> AnalyzedSong:
         """ Converts the audio file to an AnalyzedSong object.
+
+        Each point starts at a multiple of hop_duration and lasts hop_duration.
         
         Returns
         -------
         AnalyzedSong
             an AnalyzedSong object which contains the processed notes of the audio
         """
-        if self.file_path.endswith(".m4a"):
-            self.file_path = convert_m4a_to_wav(self.file_path)
-        # returns sampling_rate (in samples/sec) and array of audio amplitudes
-        sampling_rate, data = wavfile.read(self.file_path) # 
+        analyzed_song = AnalyzedSong()
+
+        with instrumentation.stage('audio_to_notes'):
+            for batch_start, max_freqs, note_numbers in self._analyze_blocks(Song.BATCH_N_CHUNKS):
+                chunk_idxs = np.arange(batch_start, batch_start + len(max_freqs))
+                time_stamps = chunk_idxs * self.hop_duration  # Time stamp for each chunk
+
+                # Add the batch's points to analyzed song
+                analyzed_song.add_points(time_stamps, max_freqs, note_numbers, self.hop_duration)
+
+        return analyzed_song
+
+    def stream_notes(self, block_duration=10.0) -> Iterator[AnalysisPoint]:
+        """ Analyzes the audio file block by block and yields its notes as they are found.
+
+        The PCM data is memory-mapped and only one block is decoded at a time,
+        so peak memory depends on block_duration, not on the recording length.
+
+        Parameters
+        ----------
+        block_duration : float
+            the length of audio in secs analyzed at once. defaults to 10 sec.
+
+        Yields
+        ------
+        AnalysisPoint
+            the analyzed point of each time segment, in order.
+        """
+        block_n_chunks = max(1, int(block_duration / self.hop_duration))
+
+        for block_start, max_freqs, note_numbers in self._analyze_blocks(block_n_chunks):
+            note_names = midi_to_note_names(note_numbers)  # shared strings from a lookup table
+
+            for offset, (max_freq, note_name) in enumerate(zip(max_freqs.tolist(), note_names)):
+                time_stamp = (block_start + offset) * self.hop_duration
+                yield AnalysisPoint(time_stamp, max_freq, note_name, self.hop_duration)
+
+    def _read_audio(self):
+        """ Loads the audio and returns its sampling rate and left channel.
+
+        WAV files are memory-mapped, M4A files are decoded in memory.
+
+        Returns
+        -------
+        tuple[int, numpy.ndarray]
+            the sampling rate (in samples/sec) and array of audio amplitudes
+        """
+        if self._pcm is not None:
+            sampling_rate, data = self._pcm
+        elif self.file_path.endswith(".m4a"):
+            sampling_rate, data = decode_m4a_to_pcm(self.file_path[:-len(".m4a")])
+        else:
+            from scipy.io import wavfile
+            with instrumentation.stage('read_wav'):
+                try:
+                    sampling_rate, data = wavfile.read(self.file_path, mmap=True)
+                except ValueError:  # formats such as 24-bit PCM cannot be memory-mapped
+                    sampling_rate, data = wavfile.read(self.file_path)
+
         # only keep the left channel. we assume audio is mono for simplicity
         if data.ndim > 1:
             data = data[:, 0]
 
-        analyzer = AudioAnalyzer()
-        analyzed_song = AnalyzedSong()
+        self.sampling_rate = sampling_rate
+        self.duration = len(data) / sampling_rate
+        return sampling_rate, data
 
-        chunk_n_samples = int(self.chunk_duration* sampling_rate)  # #samples in each 0.25s chunk
-        num_chunks = len(data) // chunk_n_samples 
+    def _read_blocks(self, data, chunk_n_samples, hop_n_samples, block_n_chunks):
+        """ Yields fixed-size blocks of whole chunks from the audio data.
 
-        for chunk_idx in range(num_chunks):
-            start_sample = chunk_idx * chunk_n_samples
-            end_sample = start_sample + chunk_n_samples
-            chunk_data = data[start_sample:end_sample]
+        Consecutive blocks overlap by chunk_n_samples - hop_n_samples samples,
+        so every chunk lies entirely within one block.
 
-            max_freq = analyzer.audio_chunk_to_frequency(chunk_data, sampling_rate)
+        Parameters
+        ----------
+        data : numpy.ndarray
+            1-D array of audio amplitudes, possibly memory-mapped.
+        chunk_n_samples : int
+            the number of samples in each chunk.
+        hop_n_samples : int
+            the number of samples between the starts of consecutive chunks.
+        block_n_chunks : int
+            the number of chunks in each block.
+
+        Yields
+        ------
+        tuple[int, numpy.ndarray]
+            the index of the first chunk in the block and the block's samples.
+        """
+        num_chunks = max(0, (len(data) - chunk_n_samples) // hop_n_samples + 1)
 
-            # Convert frequency to note name
-            note_name = analyzer.frequency_to_note_name(max_freq)
-            time_stamp = chunk_idx * self.chunk_duration  # Time stamp for the current chunk
+        for block_start in range(0, num_chunks, block_n_chunks):
+            block_end = min(block_start + block_n_chunks, num_chunks)
+            first_sample = block_start * hop_n_samples
+            last_sample = (block_end - 1) * hop_n_samples + chunk_n_samples
+            yield block_start, np.asarray(data[first_sample:last_sample])
 
-            # Add point to analyzed song
-            analyzed_song.add_point(time_stamp, max_freq, note_name, self.chunk_duration)
+    def _analyze_blocks(self, block_n_chunks):
+        """ Runs the batched analysis over the audio file one block at a time.
 
-        return analyzed_song
+        Parameters
+        ----------
+        block_n_chunks : int
+            the number of chunks analyzed together by one batched FFT.
+
+        Yields
+        ------
+        tuple[int, numpy.ndarray, numpy.ndarray]
+            the index of the first chunk in the block, and the dominant
+            frequency and MIDI note number of every chunk in the block.
+        """
+        sampling_rate, data = self._read_audio()
+        analyzer = AudioAnalyzer(self.reference_pitch, self.pitch_engine)
+        chunk_n_samples = int(self.chunk_duration* sampling_rate)  # #samples in each 0.25s chunk
+        hop_n_samples = max(1, int(self.hop_duration * sampling_rate))
+        analyze_seconds = 0.0  # reported once per song rather than per block
+
+        for block_start, block in self._read_blocks(data, chunk_n_samples, hop_n_samples, block_n_chunks):
+            start = time.perf_counter()
+            chunks = analyzer.frame_audio(block, chunk_n_samples, hop_n_samples)  # strided view, no copy
+            max_freqs, note_numbers = analyzer.audio_frames_to_notes(chunks, sampling_rate)
+            analyze_seconds += time.perf_counter() - start
+            yield block_start, max_freqs, note_numbers
+
+        instrumentation.observe_stage('analyze', analyze_seconds)
+        instrumentation.audio_processed(self.duration)
 
 
 # Example usage
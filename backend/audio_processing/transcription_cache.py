@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .note_format import NOTE_FILE_EXTENSION, read_notes, write_notes
+
+# bump whenever a change to the analysis alters the notes it produces,
+# so entries computed by older code are never served
+ANALYSIS_VERSION = 1
+
+
+class TranscriptionCache:
+    """A class caching transcriptions on disk, keyed by the audio content.
+
+    Every entry is a note file named after the SHA-256 of the audio bytes
+    and the analysis settings, so re-uploading the same recording under
+    another name reuses its notes. The least recently used entries are
+    evicted once the entries take more than max_bytes.
+
+    The directory is scanned once, when the cache is created, and the
+    order and sizes of the entries are then kept in memory, so lookups,
+    writes and stats never list the directory. The modification time of an
+    entry is its last use, so the order survives restarts.
+
+    Attributes
+    ----------
+    path : str
+        the directory holding the entries.
+    max_bytes : int
+        the maximum total size of the entries in bytes.
+    hits : int
+        the number of lookups that found an entry, since creation.
+    misses : int
+        the number of lookups that found no entry, since creation.
+
+    Methods
+    -------
+    key(audio_path, **settings)
+        Returns the cache key of an audio file analyzed with some settings.
+    get(key)
+        Returns the cached note records of a key.
+    put(key, records)
+        Caches the note records of a key.
+    stats()
+        Returns the hit and miss counters and the size of the cache.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Parameters
+        ----------
+        path : str
+            the directory of the entries, created if missing.
+        max_bytes : int
+            the maximum total size of the entries in bytes. defaults to 256 MiB.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sizes = OrderedDict()  # key -> size of the entry in bytes, least recently used first
+        self._bytes = 0
+        os.makedirs(path, exist_ok=True)
+
+        for _, key, size in sorted(self._scan()):
+            self._add(key, size)
+
+    def key(self, audio_path: str, **settings) -> str:
+        """Returns the cache key of an audio file analyzed with some settings.
+
+        Parameters
+        ----------
+        audio_path : str
+            the audio file, hashed in blocks rather than read at once.
+        **settings
+            the analysis settings, such as chunk_duration and pitch_engine.
+
+        Returns
+        -------
+        str
+            a hex digest of the audio bytes, the settings and ANALYSIS_VERSION.
+        """
+        digest = hashlib.sha256()
+
+        with open(audio_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+
+        digest.update(json.dumps({"version": ANALYSIS_VERSION, **settings}, sort_keys=True, default=repr).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """Returns the cached note records of a key.
+
+        Parameters
+        ----------
+        key : str
+            a key returned by key.
+
+        Returns
+        -------
+        numpy.ndarray
+            the note records, see note_format, or None on a miss.
+        """
+        entry_path = self._entry_path(key)
+
+        try:
+            records = read_notes(entry_path)
+            os.utime(entry_path)  # mark as recently used
+        except (FileNotFoundError, ValueError):
+            records = None
+
+        with self._lock:
+            if records is None:
+                self.misses += 1
+                self._forget(key)
+            else:
+                self.hits += 1
+
+                if key in self._sizes:
+                    self._sizes.move_to_end(key)
+                else:  # written by another process sharing the directory
+                    self._add(key, os.path.getsize(entry_path))
+
+        return records
+
+    def put(self, key: str, records: np.ndarray):
+        """Caches the note records of a key, evicting old entries if needed.
+
+        Parameters
+        ----------
+        key : str
+            a key returned by key.
+        records : numpy.ndarray
+            the note records, see note_format.
+        """
+        entry_path = self._entry_path(key)
+        temp_path = f'{entry_path}.{threading.get_ident()}.tmp'
+        write_notes(temp_path, records)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, entry_path)  # readers never see a partial entry
+
+        with self._lock:
+            self._forget(key)
+            self._add(key, size)
+            self._evict()
+
+    def stats(self) -> dict:
+        """Returns the hit and miss counters and the size of the cache.
+
+        Returns
+        -------
+        dict
+            hits, misses, hit_ratio (None before any lookup), entries and bytes.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "entries": len(self._sizes),
+                "bytes": self._bytes,
+            }
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, f'{key}{NOTE_FILE_EXTENSION}')
+
+    def _scan(self):
+        """Returns the (mtime, key, size) of every entry in the directory."""
+        entries = []
+
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(NOTE_FILE_EXTENSION):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # evicted meanwhile
+                    continue
+                entries.append((stat.st_mtime, entry.name[:-len(NOTE_FILE_EXTENSION)], stat.st_size))
+
+        return entries
+
+    def _add(self, key, size):
+        self._sizes[key] = size
+        self._bytes += size
+
+    def _forget(self, key):
+        self._bytes -= self._sizes.pop(key, 0)
+
+    def _evict(self):
+        """Removes the least recently used entries until they fit in max_bytes."""
+        while self._bytes > self.max_bytes:
+            key, size = self._sizes.popitem(last=False)
+            self._bytes -= size
+
+            try:
+                os.remove(self._entry_path(key))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the audio processing package.
+
+Run from the backend directory, e.g. `python -m benchmarks.bench_hop`.
+"""
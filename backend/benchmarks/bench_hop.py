@@ -0,0 +1,85 @@
+"""
+Hop size benchmark
+
+Compares the batched analysis in Song.audio_to_notes at several hop sizes
+against the original per-chunk loop, which calls
+AudioAnalyzer.audio_chunk_to_frequency and frequency_to_note_name once per chunk.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_hop --duration 120 --overlaps 1 2 4 8
+"""
+
+import argparse
+import time
+
+from audio_processing import AudioAnalyzer, Song
+from benchmarks.synthetic import synthetic_melody
+
+
+def per_chunk_loop(data, sampling_rate, chunk_duration):
+    """
+    Runs the original analysis loop, one FFT and one note name per chunk.
+
+    Returns
+    -------
+    int
+        The number of analyzed chunks.
+    """
+    analyzer = AudioAnalyzer()
+    chunk_n_samples = int(chunk_duration * sampling_rate)
+    num_chunks = len(data) // chunk_n_samples
+
+    for chunk_idx in range(num_chunks):
+        chunk_data = data[chunk_idx * chunk_n_samples:(chunk_idx + 1) * chunk_n_samples]
+        max_freq = analyzer.audio_chunk_to_frequency(chunk_data, sampling_rate)
+        analyzer.frequency_to_note_name(max_freq)
+
+    return num_chunks
+
+
+def time_best(function, repeat):
+    """
+    Returns the fastest of several runs of function and its result.
+    """
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=120.0, help='length of the synthetic audio in secs')
+    parser.add_argument('--sampling-rate', type=int, default=44100)
+    parser.add_argument('--chunk-duration', type=float, default=0.25)
+    parser.add_argument('--overlaps', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='chunks per chunk_duration, hop_duration = chunk_duration / overlap')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    data, _ = synthetic_melody(args.duration, args.sampling_rate, note_duration=0.5)
+    rows = []
+
+    seconds, frames = time_best(lambda: per_chunk_loop(data, args.sampling_rate, args.chunk_duration), args.repeat)
+    rows.append(('per-chunk loop', args.chunk_duration, frames, seconds))
+
+    for overlap in args.overlaps:
+        hop_duration = args.chunk_duration / overlap
+        song = Song.from_pcm(args.sampling_rate, data, args.chunk_duration, hop_duration=hop_duration)
+        seconds, analyzed_song = time_best(song.audio_to_notes, args.repeat)
+        rows.append((f'batched {overlap}x overlap', hop_duration, len(analyzed_song.get_analysis()), seconds))
+
+    print(f'{args.duration:.0f} s of audio at {args.sampling_rate} Hz, chunk_duration={args.chunk_duration}s')
+    print(f'{"path":<22}{"hop (s)":>10}{"frames":>9}{"time (s)":>11}{"us/frame":>11}{"x realtime":>12}')
+
+    for name, hop_duration, frames, seconds in rows:
+        print(f'{name:<22}{hop_duration:>10.4f}{frames:>9}{seconds:>11.3f}'
+              f'{seconds / frames * 1e6:>11.1f}{args.duration / seconds:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Pitch engine benchmark
+
+Runs every engine registered in PITCH_ENGINES over synthetic melodies with a
+known pitch per chunk, and reports analysis speed in frames/sec with the share
+of frames given the right note, and the share that are off by an octave.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_pitch_engines --duration 60
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from audio_processing import PITCH_ENGINES, AudioAnalyzer
+from benchmarks.synthetic import synthetic_melody
+
+# (name, harmonic amplitudes) of the synthetic voices
+VOICES = [
+    ('pure tone', (1.0,)),
+    ('harmonic', (1.0, 0.5, 0.25)),
+    ('hummed', (0.5, 1.0, 0.4)),
+]
+
+
+def run_engine(engine, data, sampling_rate, chunk_duration, repeat):
+    """
+    Analyzes back-to-back chunks of the audio with one engine.
+
+    Returns
+    -------
+    tuple[float, numpy.ndarray]
+        The fastest run time in secs and the MIDI note number of every chunk.
+    """
+    analyzer = AudioAnalyzer(pitch_engine=engine)
+    chunks = analyzer.frame_audio(data, int(chunk_duration * sampling_rate))
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, note_numbers = analyzer.audio_frames_to_notes(chunks, sampling_rate)
+        best = min(best, time.perf_counter() - start)
+
+    return best, note_numbers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=60.0, help='length of each synthetic melody in secs')
+    parser.add_argument('--sampling-rate', type=int, default=44100)
+    parser.add_argument('--chunk-duration', type=float, default=0.25)
+    parser.add_argument('--engines', nargs='+', default=sorted(PITCH_ENGINES))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{args.duration:.0f} s per voice at {args.sampling_rate} Hz, chunk_duration={args.chunk_duration}s')
+    print(f'{"voice":<12}{"engine":<8}{"frames/s":>11}{"correct":>10}{"octave err":>12}')
+
+    for voice, harmonics in VOICES:
+        data, truth = synthetic_melody(args.duration, args.sampling_rate, args.chunk_duration, harmonics)
+
+        for engine in args.engines:
+            seconds, note_numbers = run_engine(engine, data, args.sampling_rate, args.chunk_duration, args.repeat)
+            expected = truth[:len(note_numbers)]
+            correct = np.mean(note_numbers == expected)
+            octave_errors = np.mean(np.isin(note_numbers - expected, (-24, -12, 12, 24)))
+            print(f'{voice:<12}{engine:<8}{len(note_numbers) / seconds:>11.0f}'
+                  f'{correct:>10.1%}{octave_errors:>12.1%}')
+
+
+if __name__ == '__main__':
+    main()
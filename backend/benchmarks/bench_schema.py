@@ -0,0 +1,212 @@
+"""
+Schema benchmark
+
+Creates a scratch copy of the Echo schema from init-db.sql on a MySQL
+server, seeds it with a synthetic library per user, and times the queries
+of the API before and after applying the migrations, which add the
+Contains primary key and the indexes on Contains(sequence) and
+Sequences(creator, display_name). Reports the median and 95th percentile
+latency of every query in ms.
+
+The scratch database is dropped afterwards unless --keep is given. The
+server settings default to those of db_client.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_schema --users 2000 --sequences 50 --folders 5
+"""
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from library import fetch_user_library
+from migrate import migrate, split_statements
+
+INIT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'init-db.sql')
+
+# (name, query) of the lookups run by the API routes
+QUERIES = [
+    ('duplicate check', "SELECT * FROM Sequences WHERE creator = %s AND display_name = %s"),
+    ('folder contents', "SELECT sequence FROM Contains WHERE folder = %s"),
+    ('sequence folders', "SELECT folder FROM Contains WHERE sequence = %s"),
+]
+
+
+def create_schema(cursor, database):
+    """
+    Creates an empty database with the tables of init-db.sql.
+    """
+    cursor.execute(f"DROP DATABASE IF EXISTS {database}")
+    cursor.execute(f"CREATE DATABASE {database}")
+    cursor.execute(f"USE {database}")
+
+    with open(INIT_DB_PATH, 'r') as f:
+        for statement in split_statements(f.read()):
+            if not statement.upper().startswith(('CREATE DATABASE', 'USE ')):
+                cursor.execute(statement)
+
+
+def seed(connection, num_users, num_sequences, num_folders, duplicate_rate, rng):
+    """
+    Adds users, each with sequences and folders. Every sequence is in one
+    or two folders of its creator, and a share of the memberships is
+    inserted twice, as the schema without a key allows.
+
+    Returns
+    -------
+    tuple[int, int]
+        The number of sequences and of Contains rows.
+    """
+    cursor = connection.cursor()
+    emails = [f'user{i}@uw.edu' for i in range(num_users)]
+    cursor.executemany("INSERT INTO Users (email, display_name) VALUES (%s, %s)",
+                       [(email, email.split('@')[0]) for email in emails])
+
+    for start in range(0, num_users, 100):
+        batch = emails[start:start + 100]
+        cursor.executemany("INSERT INTO Sequences (instrument, bpm, creator, display_name, filename) "
+                           "VALUES (1, 0, %s, %s, %s)",
+                           [(email, f'song{i}', f'{email}-song{i}0') for email in batch for i in range(num_sequences)])
+        cursor.executemany("INSERT INTO Folders (display_name, owner) VALUES (%s, %s)",
+                           [(f'folder{i}', email) for email in batch for i in range(num_folders)])
+
+    connection.commit()
+
+    if num_folders == 0:
+        cursor.close()
+        return num_users * num_sequences, 0
+
+    cursor.execute("SELECT sequence_id, creator FROM Sequences")
+    sequences = cursor.fetchall()
+    cursor.execute("SELECT folder_id, owner FROM Folders")
+    folders = {}
+
+    for folder_id, owner in cursor.fetchall():
+        folders.setdefault(owner, []).append(folder_id)
+
+    rows = []
+
+    for sequence_id, creator in sequences:
+        for folder_id in rng.sample(folders[creator], min(len(folders[creator]), rng.choice((1, 2)))):
+            rows.append((folder_id, sequence_id))
+
+            if rng.random() < duplicate_rate:
+                rows.append((folder_id, sequence_id))
+
+    for start in range(0, len(rows), 10000):
+        cursor.executemany("INSERT INTO Contains (folder, sequence) VALUES (%s, %s)", rows[start:start + 10000])
+
+    connection.commit()
+    cursor.close()
+    return len(sequences), len(rows)
+
+
+def query_params(cursor, num_lookups, rng):
+    """
+    Draws the same random arguments of every query for both runs.
+
+    Returns
+    -------
+    dict
+        The list of arguments of every query name, and of 'user library'.
+    """
+    cursor.execute("SELECT sequence_id, creator, display_name FROM Sequences")
+    sequences = cursor.fetchall()
+    cursor.execute("SELECT folder_id FROM Folders")
+    folders = [folder_id for folder_id, in cursor.fetchall()] or [0]
+    picked = [rng.choice(sequences) for _ in range(num_lookups)]
+
+    return {
+        'duplicate check': [(creator, display_name) for _, creator, display_name in picked],
+        'folder contents': [(rng.choice(folders),) for _ in range(num_lookups)],
+        'sequence folders': [(sequence_id,) for sequence_id, _, _ in picked],
+        'user library': [creator for _, creator, _ in picked],
+    }
+
+
+def time_queries(cursor, params):
+    """
+    Times every lookup.
+
+    Returns
+    -------
+    dict
+        The latencies in secs of every query name.
+    """
+    latencies = {}
+
+    for name, query in QUERIES:
+        latencies[name] = []
+
+        for args in params[name]:
+            start = time.perf_counter()
+            cursor.execute(query, args)
+            cursor.fetchall()
+            latencies[name].append(time.perf_counter() - start)
+
+    latencies['user library'] = []
+
+    for email in params['user library']:
+        start = time.perf_counter()
+        fetch_user_library(cursor, email)
+        latencies['user library'].append(time.perf_counter() - start)
+
+    return latencies
+
+
+def main():
+    from db_client import DB_HOST, DB_PASSWORD, DB_PORT, DB_USER
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--sequences', type=int, default=50, help='sequences per user')
+    parser.add_argument('--folders', type=int, default=5, help='folders per user')
+    parser.add_argument('--duplicate-rate', type=float, default=0.01, help='share of folder memberships stored twice')
+    parser.add_argument('--lookups', type=int, default=500, help='runs of every query')
+    parser.add_argument('--database', default='echo_bench', help='the scratch database, dropped and recreated')
+    parser.add_argument('--host', default=DB_HOST)
+    parser.add_argument('--port', type=int, default=int(DB_PORT))
+    parser.add_argument('--keep', action='store_true', help='keep the scratch database')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    import MySQLdb
+
+    rng = random.Random(args.seed)
+    connection = MySQLdb.connect(host=args.host, port=args.port, user=DB_USER, passwd=DB_PASSWORD)
+    cursor = connection.cursor()
+
+    try:
+        create_schema(cursor, args.database)
+        start = time.perf_counter()
+        num_sequences, num_rows = seed(connection, args.users, args.sequences, args.folders, args.duplicate_rate, rng)
+        print(f'seeded {args.users} users, {num_sequences} sequences and {num_rows} Contains rows '
+              f'in {time.perf_counter() - start:.1f} s')
+
+        params = query_params(cursor, args.lookups, rng)
+        before = time_queries(cursor, params)
+
+        start = time.perf_counter()
+        migrations = migrate(connection)
+        print(f'applied {len(migrations)} migrations in {time.perf_counter() - start:.1f} s')
+        after = time_queries(cursor, params)
+
+        print(f'{"query":<18}{"before p50":>12}{"p95":>9}{"after p50":>12}{"p95":>9}{"speedup":>9}')
+
+        for name in before:
+            before_p50, before_p95 = np.percentile(before[name], [50, 95]) * 1000
+            after_p50, after_p95 = np.percentile(after[name], [50, 95]) * 1000
+            print(f'{name:<18}{before_p50:>12.3f}{before_p95:>9.3f}{after_p50:>12.3f}{after_p95:>9.3f}'
+                  f'{before_p50 / after_p50:>8.1f}x')
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP DATABASE IF EXISTS {args.database}")
+        cursor.close()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""
+Audio processing benchmark suite
+
+Runs the audio processing stages over deterministic synthetic recordings of
+several kinds, sampling rates and lengths, and reports the throughput of
+every stage in audio-seconds per wall-second with its peak memory:
+    audio_to_notes       Song.audio_to_notes of samples already in memory
+    save_to_file         AnalyzedSong.save_to_file, the text notes file
+    save_notes           AnalyzedSong.save_notes, the binary notes file
+    convert_m4a_to_wav   convert_m4a_to_wav of the recording encoded as M4A,
+                         skipped when ffmpeg is not installed
+
+The throughput is the best of --repeat runs. The peak memory is measured
+with tracemalloc in one more run, so tracing never slows the timed runs; it
+counts the memory allocated by Python and NumPy during the stage, not the
+input samples nor the memory of the ffmpeg process.
+
+The results are written as JSON with --output so runs can be compared
+across commits. With --baseline, every result is compared to the same case
+and stage of an earlier run, and the command exits with status 1 if its
+throughput dropped, or its peak memory grew, by more than --threshold.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_suite --output main.json
+    python -m benchmarks.bench_suite --long --output new.json --baseline main.json --threshold 0.2
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from typing import NamedTuple
+
+import numpy as np
+
+from audio_processing import Song, convert_m4a_to_wav
+from benchmarks.bench_hop import time_best
+from benchmarks.synthetic import glissando, long_melody, noisy_hum, pure_tone, silence, to_stereo
+
+# the generator of each kind of recording, called with (duration, sampling_rate)
+SIGNALS = {
+    'tone': pure_tone,
+    'glissando': glissando,
+    'hum': noisy_hum,
+    'silence': silence,
+    'melody': long_melody,
+}
+
+STAGES = ('audio_to_notes', 'save_to_file', 'save_notes', 'convert_m4a_to_wav')
+
+# peak memory changes smaller than this are noise, whatever the threshold
+MIN_PEAK_BYTES_CHANGE = 1024 * 1024
+
+
+class Case(NamedTuple):
+    """A synthetic recording of the suite."""
+    name: str
+    signal: str
+    duration: float
+    sampling_rate: int
+    channels: int = 1
+
+    def generate(self):
+        """Returns the 16-bit PCM samples of the recording, one column per channel if stereo."""
+        pcm = SIGNALS[self.signal](self.duration, self.sampling_rate)
+        return to_stereo(pcm, sampling_rate=self.sampling_rate) if self.channels == 2 else pcm
+
+
+CASES = [
+    Case('tone-44k-60s', 'tone', 60, 44100),
+    Case('glissando-48k-60s', 'glissando', 60, 48000),
+    Case('hum-22k-60s', 'hum', 60, 22050),
+    Case('silence-16k-60s', 'silence', 60, 16000),
+    Case('melody-stereo-44k-60s', 'melody', 60, 44100, channels=2),
+    Case('melody-8k-5min', 'melody', 300, 8000),
+]
+
+# only run with --long
+LONG_CASES = [
+    Case('melody-44k-30min', 'melody', 1800, 44100),
+]
+
+
+def measure(function, repeat):
+    """
+    Returns the fastest of several runs of function, and the peak memory
+    allocated during one more, traced, run.
+
+    Returns
+    -------
+    tuple[float, int]
+        The time in secs and the peak memory in bytes.
+    """
+    seconds, _ = time_best(function, repeat)
+    tracemalloc.start()
+
+    try:
+        function()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return seconds, peak_bytes
+
+
+def encode_m4a(pcm, sampling_rate, path):
+    """
+    Encodes 16-bit PCM samples as an AAC file at `<path>.m4a`, the format of the uploads.
+    """
+    from pydub import AudioSegment
+
+    channels = pcm.shape[1] if pcm.ndim > 1 else 1
+    audio = AudioSegment(np.ascontiguousarray(pcm).tobytes(), frame_rate=sampling_rate, sample_width=2,
+                         channels=channels)
+    audio.export(f'{path}.m4a', format='mp4', codec='aac')
+
+
+def run_case(case, repeat, directory, stages=STAGES):
+    """
+    Runs the stages over one recording.
+
+    Parameters
+    ----------
+    case : Case
+        The recording.
+    repeat : int
+        The number of timed runs of every stage.
+    directory : str
+        A scratch directory for the written files.
+    stages : tuple of str
+        The stages to run, in STAGES order.
+
+    Returns
+    -------
+    list of dict
+        The result of every stage that ran.
+    """
+    pcm = case.generate()
+    song = Song.from_pcm(case.sampling_rate, pcm)
+    analyzed_song = song.audio_to_notes()
+    path = os.path.join(directory, case.name)
+
+    functions = {
+        'audio_to_notes': song.audio_to_notes,
+        'save_to_file': lambda: analyzed_song.save_to_file(f'{path}.txt'),
+        'save_notes': lambda: analyzed_song.save_notes(f'{path}.notes'),
+        'convert_m4a_to_wav': lambda: convert_m4a_to_wav(path),
+    }
+
+    if 'convert_m4a_to_wav' in stages:
+        if shutil.which('ffmpeg') is None:
+            print(f'{case.name}: ffmpeg is not installed, skipping convert_m4a_to_wav', file=sys.stderr)
+            stages = tuple(stage for stage in stages if stage != 'convert_m4a_to_wav')
+        else:
+            encode_m4a(pcm, case.sampling_rate, path)
+
+    results = []
+
+    for stage in stages:
+        seconds, peak_bytes = measure(functions[stage], repeat)
+        results.append({
+            "case": case.name,
+            "stage": stage,
+            "audio_seconds": case.duration,
+            "sampling_rate": case.sampling_rate,
+            "channels": case.channels,
+            "notes": len(analyzed_song),
+            "seconds": seconds,
+            "throughput": case.duration / seconds if seconds > 0 else float('inf'),
+            "peak_bytes": peak_bytes,
+        })
+
+    return results
+
+
+def metadata():
+    """
+    Returns what identifies a run: the time, git commit and versions.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec='seconds'),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results to those of an earlier run.
+
+    Parameters
+    ----------
+    results : list of dict
+        The results of this run.
+    baseline : list of dict
+        The results of the earlier run. Cases and stages missing from either run are ignored.
+    threshold : float
+        The largest accepted relative drop of throughput, or growth of peak memory, e.g. 0.2 for 20%.
+
+    Returns
+    -------
+    list of str
+        A description of every regression, empty if there is none.
+    """
+    earlier = {(result["case"], result["stage"]): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        old = earlier.get((result["case"], result["stage"]))
+
+        if old is None:
+            continue
+
+        name = f'{result["case"]} {result["stage"]}'
+
+        if result["throughput"] < old["throughput"] * (1 - threshold):
+            regressions.append(f'{name}: throughput {result["throughput"]:.1f}x realtime, '
+                               f'was {old["throughput"]:.1f}x')
+
+        if (result["peak_bytes"] > old["peak_bytes"] * (1 + threshold)
+                and result["peak_bytes"] - old["peak_bytes"] > MIN_PEAK_BYTES_CHANGE):
+            regressions.append(f'{name}: peak memory {result["peak_bytes"] / 2 ** 20:.1f} MiB, '
+                               f'was {old["peak_bytes"] / 2 ** 20:.1f} MiB')
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', help='names of the cases to run, all of them by default')
+    parser.add_argument('--long', action='store_true', help='also run the 30 minute recording')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='the JSON file of the results')
+    parser.add_argument('--baseline', help='the JSON file of an earlier run to compare to')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='the relative throughput drop or peak memory growth failing the comparison')
+    args = parser.parse_args()
+
+    cases = CASES + LONG_CASES if args.long or args.cases else CASES
+
+    if args.cases:
+        unknown = set(args.cases) - {case.name for case in cases}
+        if unknown:
+            parser.error(f'unknown cases: {", ".join(sorted(unknown))}')
+        cases = [case for case in cases if case.name in args.cases]
+
+    stages = tuple(stage for stage in STAGES if stage in args.stages)
+    results = []
+    print(f'{"case":<24}{"stage":<20}{"time (s)":>10}{"x realtime":>12}{"peak (MiB)":>12}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for case in cases:
+            for result in run_case(case, args.repeat, directory, stages):
+                results.append(result)
+                print(f'{result["case"]:<24}{result["stage"]:<20}{result["seconds"]:>10.3f}'
+                      f'{result["throughput"]:>12.1f}{result["peak_bytes"] / 2 ** 20:>12.1f}')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"metadata": {**metadata(), "repeat": args.repeat}, "results": results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold)
+
+        for regression in regressions:
+            print(f'regression: {regression}')
+
+        if regressions:
+            sys.exit(1)
+
+        print(f'no regression beyond {args.threshold:.0%} of {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
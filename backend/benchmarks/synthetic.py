@@ -0,0 +1,244 @@
+"""
+Deterministic synthetic audio for the benchmarks.
+
+Every generator is deterministic, and the random ones take a seed, so
+repeated runs analyze identical input.
+"""
+
+import numpy as np
+
+
+def synthetic_melody(duration, sampling_rate, note_duration=0.25, harmonics=(1.0, 0.5, 0.25),
+                     noise=0.05, low_note=48, high_note=72, seed=0):
+    """
+    Generates a melody of harmonic tones with a known pitch for every note.
+
+    Parameters
+    ----------
+    duration : float
+        The length of the audio in secs.
+    sampling_rate : int
+        The sampling rate in (samples/sec).
+    note_duration : float
+        The length of every note in secs.
+    harmonics : tuple of float
+        The amplitude of the fundamental and of each following harmonic.
+        Making the second entry larger than the first imitates a hummed
+        voice, whose octave harmonic is louder than its fundamental.
+    noise : float
+        The standard deviation of the added white noise, relative to the fundamental.
+    low_note, high_note : int
+        The range of MIDI note numbers the melody is drawn from.
+    seed : int
+        The seed of the random generator.
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray]
+        16-bit PCM samples and the MIDI note number of every note.
+    """
+    rng = np.random.default_rng(seed)
+    num_samples = int(duration * sampling_rate)
+    note_n_samples = int(note_duration * sampling_rate)
+    notes = rng.integers(low_note, high_note, size=num_samples // note_n_samples + 1)
+    midi = np.repeat(notes, note_n_samples)[:num_samples]
+    phase = 2 * np.pi * np.cumsum(440.0 * 2 ** ((midi - 69) / 12)) / sampling_rate
+    signal = sum(amplitude * np.sin((harmonic + 1) * phase) for harmonic, amplitude in enumerate(harmonics))
+    signal = signal + noise * rng.standard_normal(num_samples)
+    return to_pcm16(signal), notes
+
+
+def to_pcm16(signal, peak=20000):
+    """
+    Scales a floating point signal to 16-bit PCM samples with the given peak amplitude.
+    """
+    largest = np.abs(signal).max() if len(signal) else 0
+    return (signal / largest * peak if largest > 0 else signal).astype(np.int16)
+
+
+# samples generated at once by the long-form generators, so 30 minutes of
+# audio never needs a float64 copy of the whole signal
+BLOCK_N_SAMPLES = 1 << 20
+
+
+def _render(num_samples, block_function, peak=20000, level=1.0):
+    """
+    Renders a signal block by block into 16-bit PCM samples.
+
+    Parameters
+    ----------
+    num_samples : int
+        The number of samples to render.
+    block_function : callable
+        A function of the (start, stop) sample indexes of a block returning
+        its floating point samples, bounded by level in absolute value.
+    peak : int
+        The amplitude of level in the PCM samples.
+    level : float
+        The largest absolute value returned by block_function.
+
+    Returns
+    -------
+    numpy.ndarray
+        The 16-bit PCM samples.
+    """
+    pcm = np.empty(num_samples, dtype=np.int16)
+
+    for start in range(0, num_samples, BLOCK_N_SAMPLES):
+        stop = min(start + BLOCK_N_SAMPLES, num_samples)
+        pcm[start:stop] = np.clip(block_function(start, stop) * (peak / level), -32768, 32767)
+
+    return pcm
+
+
+def pure_tone(duration, sampling_rate, frequency=440.0):
+    """
+    Generates a sine tone of constant pitch.
+
+    Parameters
+    ----------
+    duration : float
+        The length of the audio in secs.
+    sampling_rate : int
+        The sampling rate in (samples/sec).
+    frequency : float
+        The frequency of the tone in Hz.
+
+    Returns
+    -------
+    numpy.ndarray
+        16-bit PCM samples.
+    """
+    step = 2 * np.pi * frequency / sampling_rate
+    return _render(int(duration * sampling_rate), lambda start, stop: np.sin(step * np.arange(start, stop)))
+
+
+def glissando(duration, sampling_rate, low_frequency=110.0, high_frequency=880.0, sweep_duration=8.0):
+    """
+    Generates a tone sliding up and down between two pitches, exponentially in frequency.
+
+    Parameters
+    ----------
+    duration : float
+        The length of the audio in secs.
+    sampling_rate : int
+        The sampling rate in (samples/sec).
+    low_frequency, high_frequency : float
+        The range of the slide in Hz.
+    sweep_duration : float
+        The time in secs of one slide up and back down.
+
+    Returns
+    -------
+    numpy.ndarray
+        16-bit PCM samples.
+    """
+    octaves = np.log2(high_frequency / low_frequency)
+    phase_end = 0.0
+
+    def block(start, stop):
+        nonlocal phase_end
+        t = np.arange(start, stop) / sampling_rate
+        position = np.abs(2 * ((t / sweep_duration) % 1) - 1)  # triangle wave from 1 to 0 and back
+        frequency = low_frequency * 2 ** (octaves * (1 - position))
+        # integrated from the phase at the end of the previous block, so blocks join smoothly
+        phase = phase_end + 2 * np.pi * np.cumsum(frequency) / sampling_rate
+        phase_end = phase[-1]
+        return np.sin(phase)
+
+    return _render(int(duration * sampling_rate), block)
+
+
+def long_melody(duration, sampling_rate, note_duration=0.5, harmonics=(1.0, 0.5, 0.25), noise=0.05, seed=0):
+    """
+    Generates a melody of harmonic tones block by block, for recordings too
+    long for synthetic_melody to hold in memory as floating point.
+
+    Parameters
+    ----------
+    duration : float
+        The length of the audio in secs.
+    sampling_rate : int
+        The sampling rate in (samples/sec).
+    note_duration : float
+        The length of every note in secs.
+    harmonics : tuple of float
+        The amplitude of the fundamental and of each following harmonic.
+    noise : float
+        The standard deviation of the added white noise, relative to the fundamental.
+    seed : int
+        The seed of the random generator.
+
+    Returns
+    -------
+    numpy.ndarray
+        16-bit PCM samples.
+    """
+    rng = np.random.default_rng(seed)
+    note_n_samples = int(note_duration * sampling_rate)
+    num_samples = int(duration * sampling_rate)
+    notes = rng.integers(48, 67, size=num_samples // note_n_samples + 1)
+    phase_end = 0.0
+
+    def block(start, stop):
+        nonlocal phase_end
+        midi = notes[np.arange(start, stop) // note_n_samples]
+        phase = phase_end + 2 * np.pi * np.cumsum(440.0 * 2 ** ((midi - 69) / 12)) / sampling_rate
+        phase_end = phase[-1]
+        signal = sum(amplitude * np.sin((harmonic + 1) * phase) for harmonic, amplitude in enumerate(harmonics))
+        return signal + noise * rng.standard_normal(stop - start)
+
+    return _render(num_samples, block, level=sum(harmonics) + 4 * noise)
+
+
+def noisy_hum(duration, sampling_rate, seed=0):
+    """
+    Generates a hummed melody, whose octave harmonic is louder than its
+    fundamental, over strong background noise.
+
+    Returns
+    -------
+    numpy.ndarray
+        16-bit PCM samples.
+    """
+    return long_melody(duration, sampling_rate, harmonics=(0.5, 1.0, 0.4), noise=0.3, seed=seed)
+
+
+def silence(duration, sampling_rate):
+    """
+    Generates silent audio.
+
+    Returns
+    -------
+    numpy.ndarray
+        16-bit PCM samples, all zero.
+    """
+    return np.zeros(int(duration * sampling_rate), dtype=np.int16)
+
+
+def to_stereo(pcm, delay=0.0005, sampling_rate=44100, right_gain=0.8):
+    """
+    Makes a stereo recording of a mono signal, with the right channel delayed and quieter.
+
+    Parameters
+    ----------
+    pcm : numpy.ndarray
+        16-bit PCM samples of the mono signal.
+    delay : float
+        The delay of the right channel in secs.
+    sampling_rate : int
+        The sampling rate in (samples/sec).
+    right_gain : float
+        The amplitude of the right channel relative to the left one.
+
+    Returns
+    -------
+    numpy.ndarray
+        16-bit PCM samples with shape (num_samples, 2).
+    """
+    stereo = np.empty((len(pcm), 2), dtype=np.int16)
+    stereo[:, 0] = pcm
+    shift = min(int(delay * sampling_rate), len(pcm))
+    stereo[:shift, 1] = 0
+    stereo[shift:, 1] = (pcm[:len(pcm) - shift] * right_gain).astype(np.int16)
+    return stereo
@@ -1 +1,2 @@
-from .db_client import Client, DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
\ No newline at end of file
+from .db_client import Client, DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+from .pool import ConnectionPool, PoolTimeout
@@ -0,0 +1,96 @@
+import threading
+from functools import partial
+
+from flask import g
+
+from .pool import ConnectionPool
+
+
+class FlaskConnectionPool:
+    """A class lending each Flask app context a connection from a ConnectionPool.
+
+    It is a drop-in replacement for flask_mysqldb.MySQL: `db.connection` is
+    checked out from the pool the first time it is used in an app context,
+    and returned to the pool when the context is torn down, instead of
+    opening and closing a connection per request.
+
+    The pool is configured by the MYSQL_* keys of the app config read by
+    flask_mysqldb, and by MYSQL_POOL_MIN_SIZE, MYSQL_POOL_MAX_SIZE,
+    MYSQL_POOL_TIMEOUT (checkout timeout in secs) and
+    MYSQL_POOL_HEALTH_CHECK_INTERVAL (secs).
+
+    Attributes
+    ----------
+    pool : ConnectionPool
+        the pool, created on first use. None until then.
+    connection : connection
+        the connection of the current app context.
+
+    Methods
+    -------
+    init_app(app)
+        Configures the pool for an app.
+    stats()
+        Returns the gauges and counters of the pool.
+    """
+
+    def __init__(self, app=None):
+        self.pool = None
+        self._config = None
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configures the pool for an app and returns connections on app context teardown."""
+        app.config.setdefault('MYSQL_POOL_MIN_SIZE', 1)
+        app.config.setdefault('MYSQL_POOL_MAX_SIZE', 10)
+        app.config.setdefault('MYSQL_POOL_TIMEOUT', 5.0)
+        app.config.setdefault('MYSQL_POOL_HEALTH_CHECK_INTERVAL', 30.0)
+        self._config = app.config
+        app.teardown_appcontext(self.teardown)
+
+    @property
+    def connection(self):
+        if 'db_connection' not in g:
+            # the pool is kept with the connection, so it is returned to the pool it came from
+            g.db_pool = self._get_pool()
+            g.db_connection = g.db_pool.acquire()
+        return g.db_connection
+
+    def teardown(self, exception):
+        connection = g.pop('db_connection', None)
+        pool = g.pop('db_pool', None)
+
+        if connection is not None:
+            pool.release(connection)
+
+    def stats(self) -> dict:
+        """Returns the gauges and counters of the pool, see ConnectionPool.stats."""
+        return self._get_pool().stats()
+
+    def _get_pool(self):
+        # created lazily, so importing the app does not connect to the database, and once,
+        # although the first requests of the worker threads all get here at the same time
+        pool = self.pool
+
+        if pool is None:
+            with self._lock:
+                if self.pool is None:
+                    config = self._config
+                    self.pool = ConnectionPool(partial(_connect_mysql, config), config['MYSQL_POOL_MIN_SIZE'],
+                                               config['MYSQL_POOL_MAX_SIZE'], config['MYSQL_POOL_TIMEOUT'],
+                                               config['MYSQL_POOL_HEALTH_CHECK_INTERVAL'])
+                pool = self.pool
+
+        return pool
+
+
+def _connect_mysql(config):
+    """Opens a MySQL connection with the flask_mysqldb settings of an app config."""
+    import MySQLdb
+
+    return MySQLdb.connect(host=config.get('MYSQL_HOST', 'localhost'), user=config.get('MYSQL_USER'),
+                           passwd=config.get('MYSQL_PASSWORD'), db=config.get('MYSQL_DB'),
+                           port=config.get('MYSQL_PORT', 3306))
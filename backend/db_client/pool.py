@@ -0,0 +1,278 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when no connection becomes available before the checkout timeout."""
+
+
+class ConnectionPool:
+    """A class representing a bounded pool of database connections.
+
+    Connections are created by a factory, so the pool works with any DB-API
+    driver. A checkout takes the most recently returned idle connection,
+    opens a new one while fewer than max_size are open, or waits up to the
+    checkout timeout for one to be returned. Connections idle for longer
+    than health_check_interval are pinged before being handed out, and
+    replaced if the ping fails.
+
+    Attributes
+    ----------
+    min_size : int
+        the number of connections opened up front and kept open when idle.
+    max_size : int
+        the maximum number of open connections.
+    timeout : float
+        the default checkout timeout in secs.
+    health_check_interval : float
+        the idle time in secs after which a connection is pinged before use.
+    idle_timeout : float
+        the idle time in secs after which connections beyond min_size are closed.
+
+    Methods
+    -------
+    acquire(timeout=None)
+        Checks out a connection.
+    release(connection, discard=False)
+        Returns a checked out connection to the pool.
+    connection(timeout=None)
+        A context manager checking out a connection for the duration of a block.
+    stats()
+        Returns the gauges and counters of the pool.
+    close()
+        Closes the pool's connections.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=5.0, health_check_interval=30.0, idle_timeout=300.0):
+        """
+        Parameters
+        ----------
+        connect : callable
+            a function without arguments returning a new DB-API connection.
+        min_size : int
+            the number of connections opened up front. defaults to 1.
+        max_size : int
+            the maximum number of open connections. defaults to 10.
+        timeout : float
+            the default checkout timeout in secs. defaults to 5.
+        health_check_interval : float
+            the idle time in secs after which a connection is pinged. defaults to 30.
+        idle_timeout : float
+            the idle time in secs after which connections beyond min_size are
+            closed. defaults to 300.
+        """
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.idle_timeout = idle_timeout
+        self._connect = connect
+        self._idle = deque()  # (connection, time it was returned), most recent last
+        self._size = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._counters = dict.fromkeys(['checkouts', 'timeouts', 'created', 'discarded', 'health_check_failures'], 0)
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._closed = False
+
+        for _ in range(min_size):
+            self._idle.append((self._create(), time.monotonic()))
+
+    def acquire(self, timeout=None):
+        """Checks out a connection.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            the maximum time to wait for a connection in secs. defaults to
+            the pool's timeout.
+
+        Returns
+        -------
+        connection
+            a connection, to be given back with release.
+
+        Raises
+        ------
+        PoolTimeout
+            if max_size connections stay checked out for the whole timeout.
+        """
+        start = time.monotonic()
+        deadline = start + (self.timeout if timeout is None else timeout)
+
+        with self._condition:
+            self._waiting += 1
+
+            try:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeout(f"No database connection available after {time.monotonic() - start:.2f}s")
+
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            if self._idle:
+                connection, returned = self._idle.pop()
+            else:
+                connection, returned = None, None
+                self._size += 1  # reserve the slot of the new connection
+
+            wait_seconds = time.monotonic() - start
+            self._counters['checkouts'] += 1
+            self._wait_seconds_total += wait_seconds
+            self._wait_seconds_max = max(self._wait_seconds_max, wait_seconds)
+
+        # connecting and pinging happen outside the lock, so they never block other checkouts
+        if connection is not None and time.monotonic() - returned > self.health_check_interval \
+                and not self._is_healthy(connection):
+            with self._condition:
+                self._counters['health_check_failures'] += 1
+                self._counters['discarded'] += 1
+            self._close(connection)
+            connection = None
+
+        if connection is None:
+            try:
+                connection = self._connect()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+
+            with self._condition:
+                self._counters['created'] += 1
+
+        return connection
+
+    def release(self, connection, discard=False):
+        """Returns a checked out connection to the pool.
+
+        Any uncommitted transaction is rolled back, so the next user of the
+        connection starts from a clean state.
+
+        Parameters
+        ----------
+        connection : connection
+            a connection returned by acquire.
+        discard : bool
+            close the connection instead of keeping it, e.g. after an error
+            that may have broken it. defaults to False.
+        """
+        if not discard and not self._closed:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+        else:
+            discard = True
+
+        expired = []
+
+        with self._condition:
+            now = time.monotonic()
+
+            if discard:
+                self._size -= 1
+                self._counters['discarded'] += 1
+            else:
+                self._idle.append((connection, now))
+
+            # close the connections beyond min_size that have been idle for too long, oldest first
+            while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+
+            self._condition.notify()
+
+        for expired_connection in expired:
+            self._close(expired_connection)
+
+        if discard:
+            self._close(connection)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """A context manager checking out a connection for the duration of a block.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            the maximum time to wait for a connection in secs.
+
+        Yields
+        ------
+        connection
+        """
+        connection = self.acquire(timeout)
+
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def stats(self) -> dict:
+        """Returns the gauges and counters of the pool.
+
+        Returns
+        -------
+        dict
+            the gauges size, in_use, idle and waiting, the min_size and max_size,
+            the counters checkouts, timeouts, created, discarded and
+            health_check_failures, and the checkout wait_seconds_total and
+            wait_seconds_max.
+        """
+        with self._condition:
+            return {
+                "size": self._size,
+                "in_use": self._size - len(self._idle),
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._counters,
+                "wait_seconds_total": self._wait_seconds_total,
+                "wait_seconds_max": self._wait_seconds_max,
+            }
+
+    def close(self):
+        """Closes the pool's connections. Checked out connections are closed when released."""
+        with self._condition:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._closed = True
+
+        for connection in idle:
+            self._close(connection)
+
+    def _create(self):
+        connection = self._connect()
+        self._size += 1
+        self._counters['created'] += 1
+        return connection
+
+    @staticmethod
+    def _is_healthy(connection) -> bool:
+        try:
+            connection.ping()
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,369 @@
+"""
+Background jobs
+
+A small local job system used by the API to run slow work, such as
+transcribing a recording, outside the request thread. Job states are kept
+as JSON files so they can be polled from any worker of the API process.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# states of a job, in order
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# finished jobs are deleted at most this often, in secs
+PURGE_INTERVAL = 3600
+
+# identifies this run of the process, since a restarted server often gets the same pid back
+BOOT_ID = uuid.uuid4().hex
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobStore:
+    """A class storing the state of every job as a JSON file in a directory.
+
+    Finished jobs, which hold the full result of a transcription, are
+    deleted ttl secs after they finish, when the store is purged.
+
+    Attributes
+    ----------
+    path : str
+        the directory holding one `<job id>.json` file per job.
+    ttl : float
+        the secs a finished job is kept, 0 to keep every job.
+
+    Methods
+    -------
+    create(**fields)
+        Creates a queued job.
+    get(job_id)
+        Returns the state of a job.
+    update(job_id, **fields)
+        Updates the state of a job.
+    jobs()
+        Returns the state of every job.
+    purge()
+        Deletes the jobs that finished more than ttl secs ago.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600):
+        """
+        Parameters
+        ----------
+        path : str
+            the directory of the job files, created if missing.
+        ttl : float
+            the secs a finished job is kept, 0 to keep every job. defaults to 7 days.
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        os.makedirs(path, exist_ok=True)
+
+    def create(self, **fields) -> dict:
+        """Creates a queued job, purging the finished jobs at most every PURGE_INTERVAL secs.
+
+        Parameters
+        ----------
+        **fields
+            extra JSON-serializable fields stored with the job.
+
+        Returns
+        -------
+        dict
+            the state of the new job.
+        """
+        job = {"id": uuid.uuid4().hex, "status": JOB_QUEUED, "created": time.time(), **fields}
+
+        with self._lock:
+            self._write(job)
+
+        if time.time() >= self._next_purge:
+            self.purge()
+
+        return job
+
+    def get(self, job_id: str):
+        """Returns the state of a job.
+
+        Parameters
+        ----------
+        job_id : str
+            the id of the job.
+
+        Returns
+        -------
+        dict
+            the state of the job, None if there is no such job.
+        """
+        path = self._job_path(job_id)
+
+        if path is None or not os.path.exists(path):
+            return None
+
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def update(self, job_id: str, **fields) -> dict:
+        """Updates the state of a job.
+
+        Parameters
+        ----------
+        job_id : str
+            the id of the job.
+        **fields
+            the fields to set.
+
+        Returns
+        -------
+        dict
+            the updated state of the job.
+
+        Raises
+        ------
+        KeyError
+            if there is no such job, e.g. its file was deleted.
+        """
+        with self._lock:
+            job = self.get(job_id)
+
+            if job is None:
+                raise KeyError(f"Job {job_id} does not exist")
+
+            job.update(fields)
+            self._write(job)
+
+        return job
+
+    def jobs(self) -> list:
+        """Returns the state of every job.
+
+        Returns
+        -------
+        list[dict]
+        """
+        return [self.get(name[:-len('.json')]) for name in sorted(os.listdir(self.path)) if name.endswith('.json')]
+
+    def purge(self) -> int:
+        """Deletes the jobs that finished more than ttl secs ago.
+
+        A finished job is not written again, so only the files last modified
+        more than ttl secs ago are read.
+
+        Returns
+        -------
+        int
+            the number of deleted jobs.
+        """
+        self._next_purge = time.time() + PURGE_INTERVAL
+
+        if self.ttl <= 0:
+            return 0
+
+        expiry = time.time() - self.ttl
+        deleted = 0
+
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith('.json') or entry.stat().st_mtime >= expiry:
+                continue
+
+            with self._lock:
+                job = self.get(entry.name[:-len('.json')])
+
+                if job is None or job["status"] not in (JOB_DONE, JOB_FAILED):
+                    continue
+
+                try:
+                    os.remove(entry.path)
+                    deleted += 1
+                except FileNotFoundError:
+                    pass
+
+        return deleted
+
+    def _job_path(self, job_id: str):
+        """Returns the path of a job file, None for ids that are not hex strings."""
+        if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        return os.path.join(self.path, f'{job_id}.json')
+
+    def _write(self, job: dict):
+        """Atomically writes the state of a job, so readers never see a partial file."""
+        path = self._job_path(job["id"])
+        temp_path = f'{path}.tmp'
+
+        with open(temp_path, 'w') as f:
+            json.dump(job, f)
+
+        os.replace(temp_path, path)
+
+
+class JobQueue:
+    """A class running jobs on a bounded pool of worker threads.
+
+    Attributes
+    ----------
+    store : JobStore
+        the store the job states are kept in.
+    max_workers : int
+        the number of jobs run at once.
+    max_pending : int
+        the number of jobs that may be queued or running at once.
+    on_failure : callable
+        called with the state of every job that fails or was interrupted, None to do nothing.
+
+    Methods
+    -------
+    submit(func, *args, **fields)
+        Queues a job running func(*args).
+    pending()
+        Returns the number of jobs queued or running.
+    shutdown(wait)
+        Stops the worker threads.
+    """
+
+    def __init__(self, store: JobStore, max_workers=2, max_pending=32, on_failure=None):
+        """
+        Parameters
+        ----------
+        store : JobStore
+            the store the job states are kept in.
+        max_workers : int
+            the number of jobs run at once. defaults to 2.
+        max_pending : int
+            the number of jobs that may be queued or running at once,
+            beyond which submit raises JobQueueFull. defaults to 32.
+        on_failure : callable, optional
+            called with the state of every job that fails, or that a previous
+            server left unfinished, e.g. to remove the files the job would have used.
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.on_failure = on_failure
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        store.purge()
+
+        # jobs left unfinished by a process that is gone will never complete
+        for job in store.jobs():
+            if job["status"] in (JOB_QUEUED, JOB_RUNNING) and _interrupted(job):
+                self._fail(store.update(job["id"], status=JOB_FAILED, error="Interrupted by a server restart"))
+
+    def submit(self, func, *args, **fields) -> dict:
+        """Queues a job running func(*args).
+
+        The value returned by func, which must be JSON-serializable, is stored
+        as the job's result. An exception raised by func fails the job.
+
+        Parameters
+        ----------
+        func : callable
+            the work of the job.
+        *args
+            the arguments of func.
+        **fields
+            extra fields stored with the job.
+
+        Returns
+        -------
+        dict
+            the state of the new job.
+
+        Raises
+        ------
+        JobQueueFull
+            if max_pending jobs are already queued or running.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs are already pending")
+            self._pending += 1
+
+        try:
+            job = self.store.create(pid=os.getpid(), boot_id=BOOT_ID, **fields)
+            self._executor.submit(self._run, job["id"], func, args)
+        except Exception:
+            self._finish()
+            raise
+
+        return job
+
+    def pending(self) -> int:
+        """Returns the number of jobs queued or running."""
+        return self._pending
+
+    def shutdown(self, wait=True):
+        """Stops the worker threads.
+
+        Parameters
+        ----------
+        wait : bool
+            whether to wait for the pending jobs to finish. defaults to True.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id, func, args):
+        """Runs a job in a worker thread and records its outcome."""
+        try:
+            self.store.update(job_id, status=JOB_RUNNING, started=time.time())
+            result = func(*args)
+            self.store.update(job_id, status=JOB_DONE, finished=time.time(), result=result)
+        except Exception as e:
+            try:
+                job = self.store.update(job_id, status=JOB_FAILED, finished=time.time(), error=f'{type(e).__name__}: {e}')
+            except KeyError:  # the job file was deleted while it ran, there is nothing left to record
+                return
+            self._fail(job)
+        finally:
+            self._finish()
+
+    def _fail(self, job):
+        if self.on_failure is not None:
+            self.on_failure(job)
+
+    def _finish(self):
+        with self._lock:
+            self._pending -= 1
+
+
+def _interrupted(job) -> bool:
+    """Returns whether the process that submitted a job is gone.
+
+    A job whose pid is this process's, but from an earlier run of it, was
+    submitted by a previous server that exited and left its pid to this one.
+    Jobs of other live processes, e.g. other workers of the API, are left alone.
+    """
+    if job.get("boot_id") == BOOT_ID:
+        return False
+
+    return job.get("pid") == os.getpid() or not _process_alive(job.get("pid"))
+
+
+def _process_alive(pid) -> bool:
+    """Returns whether a process with the pid is running."""
+    if pid is None:
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # running, but owned by another user
+        return True
+
+    return True
@@ -0,0 +1,211 @@
+"""
+User library queries
+
+Fetches the folders and sequences of a user, and updates the contents of
+a folder, in a constant number of queries whatever the size of their
+library, doing the bookkeeping in memory.
+"""
+
+
+def fetch_user_library(cursor, email, limit=None, after=None):
+    """
+    Fetches a user's display name, folders and sequences.
+
+    Runs four queries: the user, their sequences, their folders, and the
+    memberships of all their folders at once. Sequences are ordered by id
+    and can be fetched a page at a time, continuing after the last id of
+    the previous page. The folders of a page only list the sequences of
+    that page, so the response grows with the page size, not the library.
+
+    Parameters
+    ----------
+    cursor : cursor
+        A DB-API cursor of the Echo database.
+    email : str
+        The email address of the user.
+    limit : int, optional
+        The maximum number of sequences to fetch. All of them if None.
+    after : int, optional
+        Only fetch the sequences with a greater id, the "next_cursor" of the previous page.
+
+    Returns
+    -------
+    dict
+        The user's library, with "username", "folders" (each with "id", "display_name",
+        "created" and the ids of its "sequences" on this page), "sequences" (each with "id",
+        "display_name", "created" and the "filename" of its data files) and
+        "next_cursor" (the value of after for the next page, None on the last page),
+        or None if the user does not exist.
+    """
+
+    query = "SELECT display_name FROM Users WHERE email = %s"
+    cursor.execute(query, (email,))
+    user = cursor.fetchone()
+
+    if user is None:
+        return None
+
+    query = "SELECT sequence_id, display_name, filename, created FROM Sequences WHERE creator = %s"
+    args = (email,)
+
+    if after is not None:
+        query += " AND sequence_id > %s"
+        args += (after,)
+
+    query += " ORDER BY sequence_id"
+
+    if limit is not None:
+        query += " LIMIT %s"
+        args += (limit + 1,)  # one more row tells whether there is a next page
+
+    cursor.execute(query, args)
+    rows = cursor.fetchall()
+    next_cursor = None
+
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][0] if rows else None
+
+    query = "SELECT folder_id, display_name, created FROM Folders WHERE owner = %s"
+    cursor.execute(query, (email,))
+    folders = {}
+
+    for folder_id, display_name, created in cursor.fetchall():
+        folders[folder_id] = {
+            "id": folder_id,
+            "display_name": display_name,
+            "created": created,
+            "sequences": [],
+        }
+
+    query = ("SELECT Contains.folder, Contains.sequence FROM Contains "
+             "JOIN Folders ON Contains.folder = Folders.folder_id WHERE Folders.owner = %s")
+    args = (email,)
+
+    if limit is not None or after is not None:
+        # only the memberships of the sequences on this page, none on an empty page
+        page_ids = [row[0] for row in rows] or [None]
+        query += f" AND Contains.sequence IN ({_placeholders(page_ids)})"
+        args += tuple(page_ids)
+
+    cursor.execute(query, args)
+
+    for folder_id, sequence_id in cursor.fetchall():
+        folders[folder_id]["sequences"].append(sequence_id)
+
+    return {
+        "username": user[0],
+        "folders": list(folders.values()),
+        "sequences": [_sequence_from_row(row) for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+def fetch_sequence(cursor, sequence_id):
+    """
+    Fetches one sequence.
+
+    Parameters
+    ----------
+    cursor : cursor
+        A DB-API cursor of the Echo database.
+    sequence_id : int
+        The unique identifier for the sequence.
+
+    Returns
+    -------
+    dict
+        The sequence, with "id", "display_name", "created" and the "filename" of
+        its data files, or None if the sequence does not exist.
+    """
+
+    query = "SELECT sequence_id, display_name, filename, created FROM Sequences WHERE sequence_id = %s"
+    cursor.execute(query, (sequence_id,))
+    row = cursor.fetchone()
+    return None if row is None else _sequence_from_row(row)
+
+
+def fetch_sequence_owners(cursor, sequence_ids):
+    """
+    Fetches the creators of several sequences in one query.
+
+    Parameters
+    ----------
+    cursor : cursor
+        A DB-API cursor of the Echo database.
+    sequence_ids : list of int
+        The unique identifiers for the sequences.
+
+    Returns
+    -------
+    dict
+        The creator of each sequence by id. Sequences that do not exist are left out.
+    """
+
+    sequence_ids = list(set(sequence_ids))
+
+    if not sequence_ids:
+        return {}
+
+    query = f"SELECT sequence_id, creator FROM Sequences WHERE sequence_id IN ({_placeholders(sequence_ids)})"
+    cursor.execute(query, sequence_ids)
+    return dict(cursor.fetchall())
+
+
+def set_folder_contents(cursor, folder_id, sequence_ids):
+    """
+    Replaces the sequences of a folder.
+
+    Reads the current contents once, then inserts the added sequences with
+    one executemany and deletes the removed ones with one query scoped to
+    the folder, so the other folders holding them are left untouched. The
+    changes are not committed, so the caller can apply them as a single
+    transaction.
+
+    Parameters
+    ----------
+    cursor : cursor
+        A DB-API cursor of the Echo database.
+    folder_id : int
+        The unique identifier for the folder.
+    sequence_ids : list of int
+        The sequences now contained in the folder.
+
+    Returns
+    -------
+    tuple of list of int
+        The ids of the sequences added to and removed from the folder.
+    """
+
+    query = "SELECT sequence FROM Contains WHERE folder = %s"
+    cursor.execute(query, (folder_id,))
+    current_sequence_ids = {sequence_id for sequence_id, in cursor.fetchall()}
+    requested_sequence_ids = set(sequence_ids)
+
+    added = [sequence_id for sequence_id in dict.fromkeys(sequence_ids) if sequence_id not in current_sequence_ids]
+    removed = sorted(current_sequence_ids - requested_sequence_ids)
+
+    if added:
+        query = "INSERT INTO Contains (folder, sequence) VALUES (%s, %s)"
+        cursor.executemany(query, [(folder_id, sequence_id) for sequence_id in added])
+
+    if removed:
+        query = f"DELETE FROM Contains WHERE folder = %s AND sequence IN ({_placeholders(removed)})"
+        cursor.execute(query, [folder_id, *removed])
+
+    return added, removed
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def _sequence_from_row(row):
+    sequence_id, display_name, filename, created = row
+
+    return {
+        "id": sequence_id,
+        "display_name": display_name,
+        "created": created,
+        "filename": filename,
+    }
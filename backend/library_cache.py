@@ -0,0 +1,336 @@
+"""
+User library response cache
+
+Keeps the assembled /get-user-data responses of each user, so repeated
+requests skip the database queries and data file reads. A user's library
+only changes through the write routes of the API, which invalidate all of
+their cached responses.
+
+Responses are kept by a backend: MemoryBackend keeps them in the process
+with LRU eviction, and RedisBackend shares them between the workers of a
+multi-process deployment.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LibraryCache:
+    """A class caching the library responses of each user, invalidated by writes.
+
+    Each user has several cached responses, one per variant of the request
+    (its query string), all dropped at once by invalidate. To avoid caching
+    a response assembled from data read before an invalidation, take the
+    user's generation before reading the data and pass it to put, which
+    skips the response if the user was invalidated meanwhile.
+
+    Attributes
+    ----------
+    backend : MemoryBackend or RedisBackend
+        the storage of the responses.
+    hits : int
+        the number of lookups that found a response, since creation.
+    misses : int
+        the number of lookups that found no response, since creation.
+
+    Methods
+    -------
+    get(user, variant)
+        Returns a cached response.
+    generation(user)
+        Returns the number of invalidations of a user.
+    put(user, variant, etag, body, generation)
+        Caches a response.
+    invalidate(user)
+        Drops the cached responses of a user.
+    stats()
+        Returns the hit and miss counters and the memory usage of the cache.
+    """
+
+    def __init__(self, backend):
+        """
+        Parameters
+        ----------
+        backend : MemoryBackend or RedisBackend
+            the storage of the responses.
+        """
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, user: str, variant: str):
+        """Returns a cached response.
+
+        Parameters
+        ----------
+        user : str
+            the email of the user.
+        variant : str
+            the variant of the request, e.g. its normalized query string.
+
+        Returns
+        -------
+        tuple[str, bytes]
+            the ETag and body of the response, None on a miss.
+        """
+        cached = self.backend.get(user, variant)
+
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return cached
+
+    def generation(self, user: str) -> int:
+        """Returns the number of invalidations of a user in this process, to be passed to put."""
+        with self._lock:
+            return self._generations.get(user, 0)
+
+    def put(self, user: str, variant: str, etag: str, body: bytes, generation: int) -> bool:
+        """Caches a response, unless the user was invalidated since generation was taken.
+
+        Parameters
+        ----------
+        user : str
+            the email of the user.
+        variant : str
+            the variant of the request.
+        etag : str
+            the ETag of the response.
+        body : bytes
+            the body of the response.
+        generation : int
+            the value of generation(user) before the response data was read.
+
+        Returns
+        -------
+        bool
+            whether the response was cached.
+        """
+        with self._lock:
+            if self._generations.get(user, 0) != generation:
+                return False
+
+            self.backend.set(user, variant, etag, body)
+
+        return True
+
+    def invalidate(self, user: str):
+        """Drops the cached responses of a user, after a write to their library.
+
+        Parameters
+        ----------
+        user : str
+            the email of the user.
+        """
+        with self._lock:
+            self._generations[user] = self._generations.get(user, 0) + 1
+            self.backend.invalidate(user)
+
+    def stats(self) -> dict:
+        """Returns the hit and miss counters and the memory usage of the cache.
+
+        Returns
+        -------
+        dict
+            hits, misses, hit_ratio (None before any lookup) and the stats of the backend.
+        """
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            **self.backend.stats(),
+        }
+
+
+class MemoryBackend:
+    """A class keeping responses in the process, evicting the least recently used ones.
+
+    Attributes
+    ----------
+    max_bytes : int
+        the maximum total size of the responses in bytes.
+
+    Methods
+    -------
+    get(user, variant)
+        Returns a response, marking it as recently used.
+    set(user, variant, etag, body)
+        Stores a response, evicting old ones if needed.
+    invalidate(user)
+        Drops the responses of a user.
+    stats()
+        Returns the number of responses and their size.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Parameters
+        ----------
+        max_bytes : int
+            the maximum total size of the responses in bytes. defaults to 64 MiB.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (user, variant) -> (etag, body, size), least recently used first
+        self._variants = {}  # user -> set of variants
+        self._bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, user: str, variant: str):
+        """Returns the (etag, body) of a response, None if it is not stored."""
+        with self._lock:
+            entry = self._entries.get((user, variant))
+
+            if entry is None:
+                return None
+
+            self._entries.move_to_end((user, variant))
+            return entry[0], entry[1]
+
+    def set(self, user: str, variant: str, etag: str, body: bytes):
+        """Stores a response, evicting the least recently used ones beyond max_bytes.
+
+        Responses larger than max_bytes are not stored.
+        """
+        size = len(user) + len(variant) + len(etag) + len(body)
+
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove((user, variant))
+            self._entries[(user, variant)] = (etag, body, size)
+            self._variants.setdefault(user, set()).add(variant)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, user: str):
+        """Drops the responses of a user."""
+        with self._lock:
+            for variant in list(self._variants.get(user, ())):
+                self._remove((user, variant))
+
+    def stats(self) -> dict:
+        """Returns the backend name, the number of responses, their size in bytes, max_bytes and the evictions."""
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        self._bytes -= entry[2]
+        user, variant = key
+        variants = self._variants[user]
+        variants.discard(variant)
+
+        if not variants:
+            del self._variants[user]
+
+
+class RedisBackend:
+    """A class keeping responses in Redis, shared by every worker of the API.
+
+    The responses of a user are the fields of one hash, so they are dropped
+    at once, and expire after ttl. The memory of the cache is bounded by
+    the maxmemory setting of the Redis server, ideally with an LRU policy.
+    Invalidations from other workers are seen immediately, but a worker
+    may cache a response read just before another worker's write, which is
+    then served until the next write or ttl.
+
+    Attributes
+    ----------
+    client : redis.Redis
+        the Redis client.
+    ttl : int
+        the lifetime of the responses of a user in secs.
+    prefix : str
+        the prefix of the Redis keys.
+
+    Methods
+    -------
+    from_url(url, **kwargs)
+        Creates a backend connected to a Redis URL.
+    get(user, variant)
+        Returns a response.
+    set(user, variant, etag, body)
+        Stores a response.
+    invalidate(user)
+        Drops the responses of a user.
+    stats()
+        Returns the memory usage of the Redis server.
+    """
+
+    def __init__(self, client, ttl: int = 3600, prefix: str = 'echo:library:'):
+        """
+        Parameters
+        ----------
+        client : redis.Redis
+            the Redis client.
+        ttl : int
+            the lifetime of the responses of a user in secs. defaults to 1 hour.
+        prefix : str
+            the prefix of the Redis keys. defaults to 'echo:library:'.
+        """
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        """Creates a backend connected to a Redis URL, e.g. `redis://localhost:6379/0`.
+
+        Requires the redis package, which is only needed for this backend.
+        """
+        import redis
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, user: str, variant: str):
+        """Returns the (etag, body) of a response, None if it is not stored."""
+        value = self.client.hget(self._key(user), variant)
+
+        if value is None:
+            return None
+
+        etag, body = value.split(b'\n', 1)
+        return etag.decode(), body
+
+    def set(self, user: str, variant: str, etag: str, body: bytes):
+        """Stores a response and restarts the lifetime of the user's responses."""
+        pipeline = self.client.pipeline()
+        pipeline.hset(self._key(user), variant, etag.encode() + b'\n' + body)
+        pipeline.expire(self._key(user), self.ttl)
+        pipeline.execute()
+
+    def invalidate(self, user: str):
+        """Drops the responses of a user."""
+        self.client.delete(self._key(user))
+
+    def stats(self) -> dict:
+        """Returns the backend name and the memory used by the Redis server in bytes."""
+        return {
+            "backend": "redis",
+            "bytes": self.client.info('memory').get('used_memory'),
+        }
+
+    def _key(self, user: str) -> str:
+        return f'{self.prefix}{user}'
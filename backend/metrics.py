@@ -0,0 +1,332 @@
+"""
+API metrics
+
+Request latency histograms per route, latency histograms of the
+transcription stages and counters, rendered in the Prometheus text format
+by the /metrics route. Recording a value costs a dictionary lookup and an
+addition under a lock; values read from other components, such as the
+database pool usage, are only collected by callbacks when the metrics are
+rendered, so they cost nothing between scrapes.
+"""
+
+import bisect
+import math
+import threading
+import time
+
+from flask import g, request
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# upper bounds in secs of the latency histogram buckets, from fast routes to long transcriptions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Counter:
+    """A class representing a counter, with one value per combination of label values.
+
+    Methods
+    -------
+    inc(amount=1, **labels)
+        Increases the counter.
+    samples()
+        Returns the (suffix, labels, value) of every value.
+    """
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names=()):
+        """
+        Parameters
+        ----------
+        name : str
+            the name of the metric, ending in _total by convention.
+        documentation : str
+            the help text of the metric.
+        label_names : tuple[str]
+            the names of the labels of every value.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {} if self.label_names else {(): 0}  # a counter without labels is reported from 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        """Increases the counter of the label values by amount."""
+        key = tuple(labels[name] for name in self.label_names)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+
+        return [('', dict(zip(self.label_names, key)), value) for key, value in sorted(values.items())]
+
+
+class Histogram:
+    """A class representing a histogram of observed values, with one per combination of label values.
+
+    Methods
+    -------
+    observe(value, **labels)
+        Adds a value to the histogram.
+    samples()
+        Returns the (suffix, labels, value) of every bucket, sum and count.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names=(), buckets=DEFAULT_BUCKETS):
+        """
+        Parameters
+        ----------
+        name : str
+            the name of the metric.
+        documentation : str
+            the help text of the metric.
+        label_names : tuple[str]
+            the names of the labels of every histogram.
+        buckets : tuple[float]
+            the increasing upper bounds of the buckets. an infinite bucket is added.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label values -> [count of each bucket (not cumulative), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """Adds a value to the histogram of the label values."""
+        key = tuple(labels[name] for name in self.label_names)
+        bucket = bisect.bisect_left(self.buckets, value)  # values equal to a bound go in its bucket
+
+        with self._lock:
+            counts = self._values.get(key)
+
+            if counts is None:
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+
+            counts[0][bucket] += 1
+            counts[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+        samples = []
+
+        for key, (counts, total) in sorted(values.items()):
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(('_bucket', {**labels, 'le': _format_value(bound)}, cumulative))
+
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, cumulative))
+
+        return samples
+
+
+class CallbackMetric:
+    """A class representing a metric whose values are read from a callback when rendered.
+
+    Methods
+    -------
+    samples()
+        Returns the (suffix, labels, value) of every value returned by the callback.
+    """
+
+    def __init__(self, name: str, documentation: str, callback, metric_type='gauge', label_names=()):
+        """
+        Parameters
+        ----------
+        name : str
+            the name of the metric.
+        documentation : str
+            the help text of the metric.
+        callback : callable
+            a function without arguments returning the value of the metric, a
+            dict mapping tuples of label values to values if it has labels,
+            or None when there is no value to report.
+        metric_type : str
+            'gauge' or 'counter'. defaults to 'gauge'.
+        label_names : tuple[str]
+            the names of the labels of every value.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.type = metric_type
+        self.label_names = tuple(label_names)
+
+    def samples(self):
+        values = self.callback()
+
+        if values is None:
+            return []
+
+        if not self.label_names:
+            return [('', {}, values)]
+
+        return [('', dict(zip(self.label_names, key)), value)
+                for key, value in sorted(values.items()) if value is not None]
+
+
+class Metrics:
+    """A class collecting the metrics of the API.
+
+    Besides its own metrics, it records the latency of every request by
+    route, method and status once installed with init_app, and the latency
+    of the transcription stages and the seconds of audio analyzed when set
+    as the observer of audio_processing.instrumentation.
+
+    Methods
+    -------
+    counter(name, documentation, label_names=())
+        Adds a counter.
+    histogram(name, documentation, label_names=(), buckets=DEFAULT_BUCKETS)
+        Adds a histogram.
+    callback(name, documentation, callback, metric_type='gauge', label_names=())
+        Adds a metric read from a callback when rendered.
+    init_app(app)
+        Records the latency of the requests of a Flask app.
+    stage(name)
+        A context manager recording the latency of a stage.
+    observe_stage(stage, seconds)
+        Records the latency of a stage.
+    add_audio_seconds(seconds)
+        Counts seconds of analyzed audio.
+    render()
+        Renders the metrics in the Prometheus text format.
+    """
+
+    def __init__(self, namespace: str = 'echo'):
+        """
+        Parameters
+        ----------
+        namespace : str
+            the prefix of the names of the metrics. defaults to 'echo'.
+        """
+        self.namespace = namespace
+        self._metrics = []
+        self.request_duration = self.histogram('http_request_duration_seconds', 'Latency of the API requests.',
+                                               ('route', 'method', 'status'))
+        self.stage_duration = self.histogram('stage_duration_seconds', 'Latency of the stages of a transcription.',
+                                             ('stage',))
+        self.audio_seconds = self.counter('audio_processed_seconds_total', 'Seconds of audio analyzed.')
+
+    def counter(self, name: str, documentation: str, label_names=()) -> Counter:
+        """Adds a counter named `<namespace>_<name>`."""
+        return self._add(Counter(f'{self.namespace}_{name}', documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        """Adds a histogram named `<namespace>_<name>`."""
+        return self._add(Histogram(f'{self.namespace}_{name}', documentation, label_names, buckets))
+
+    def callback(self, name: str, documentation: str, callback, metric_type='gauge', label_names=()) -> CallbackMetric:
+        """Adds a metric named `<namespace>_<name>` whose values are read from callback, see CallbackMetric."""
+        return self._add(CallbackMetric(f'{self.namespace}_{name}', documentation, callback, metric_type, label_names))
+
+    def init_app(self, app):
+        """Records the latency of every request of a Flask app.
+
+        Requests are labelled by route pattern rather than URL, e.g.
+        `/get-user-data/<email>`, so the number of histograms stays bounded.
+        """
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+
+    def stage(self, name: str):
+        """A context manager recording the latency of a stage, see audio_processing.instrumentation.stage."""
+        return _Timer(self.stage_duration, stage=name)
+
+    def observe_stage(self, stage: str, seconds: float):
+        """Records the latency of a stage."""
+        self.stage_duration.observe(seconds, stage=stage)
+
+    def add_audio_seconds(self, seconds: float):
+        """Counts seconds of analyzed audio."""
+        self.audio_seconds.inc(seconds)
+
+    def render(self) -> str:
+        """Renders the metrics in the Prometheus text format.
+
+        Returns
+        -------
+        str
+            the HELP, TYPE and samples of every metric.
+        """
+        lines = []
+
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {_escape_help(metric.documentation)}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+
+            for suffix, labels, value in metric.samples():
+                lines.append(f'{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def _start_request(self):
+        g.metrics_request_start = time.perf_counter()
+
+    def _end_request(self, response):
+        start = g.pop('metrics_request_start', None)
+
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+            self.request_duration.observe(time.perf_counter() - start, route=route, method=request.method,
+                                          status=str(response.status_code))
+
+        return response
+
+
+class _Timer:
+    """A context manager adding its duration to a histogram."""
+
+    def __init__(self, histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+
+    pairs = ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+    return '{' + pairs + '}'
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
@@ -0,0 +1,215 @@
+"""
+Schema migrations
+
+Applies the versioned SQL scripts of the migrations directory to the Echo
+database in order, and records every applied version in the
+schema_migrations table so each script runs once per database. init-db.sql
+creates the initial schema; every later change to it is a new script named
+`<version>_<description>.sql`, e.g. `0004_folders_display_name.sql`.
+
+MySQL commits DDL statements implicitly, so a script is not applied
+atomically: if one fails midway, fix the database by hand before running
+the migrations again.
+
+Usage (from the backend directory):
+    python migrate.py           # applies the pending migrations
+    python migrate.py --list    # lists the applied and pending migrations
+"""
+
+import argparse
+import os
+import re
+from typing import List, NamedTuple
+
+MIGRATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+_MIGRATION_FILENAME = re.compile(r'(\d+)_(\w+)\.sql')
+_COMMENT = re.compile(r'--[^\n]*')
+
+
+class Migration(NamedTuple):
+    """A migration script.
+
+    Attributes
+    ----------
+    version : int
+        the version of the schema the script migrates to.
+    name : str
+        the description in the filename of the script.
+    path : str
+        the path of the script.
+    """
+    version: int
+    name: str
+    path: str
+
+    def statements(self) -> List[str]:
+        """Returns the SQL statements of the script."""
+        with open(self.path, 'r') as f:
+            return split_statements(f.read())
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Splits an SQL script into statements.
+
+    Comments run from `--` to the end of the line, and statements end with
+    `;`, so neither may appear inside string literals.
+
+    Parameters
+    ----------
+    sql : str
+        The SQL script.
+
+    Returns
+    -------
+    list[str]
+        The statements, without comments and the final `;`.
+    """
+    statements = (statement.strip() for statement in _COMMENT.sub('', sql).split(';'))
+    return [statement for statement in statements if statement]
+
+
+def load_migrations(path: str = MIGRATIONS_PATH) -> List[Migration]:
+    """
+    Lists the migration scripts of a directory.
+
+    Parameters
+    ----------
+    path : str
+        The directory of the scripts. Defaults to the migrations directory.
+
+    Returns
+    -------
+    list[Migration]
+        The migrations, ordered by version.
+
+    Raises
+    ------
+    ValueError
+        If two scripts have the same version.
+    """
+    migrations = {}
+
+    for filename in sorted(os.listdir(path)):
+        match = _MIGRATION_FILENAME.fullmatch(filename)
+
+        if match is None:
+            continue
+
+        version = int(match.group(1))
+
+        if version in migrations:
+            raise ValueError(f"Migrations {migrations[version].path} and {filename} have the same version {version}")
+
+        migrations[version] = Migration(version, match.group(2), os.path.join(path, filename))
+
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied_versions(cursor) -> set:
+    """
+    Fetches the versions of the applied migrations, creating the schema_migrations table if needed.
+
+    Parameters
+    ----------
+    cursor : cursor
+        A DB-API cursor of the Echo database.
+
+    Returns
+    -------
+    set[int]
+        The versions recorded in schema_migrations.
+    """
+    cursor.execute("CREATE TABLE IF NOT EXISTS schema_migrations ("
+                   "version INT PRIMARY KEY, "
+                   "name VARCHAR(255), "
+                   "applied DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {version for version, in cursor.fetchall()}
+
+
+def migrate(connection, path: str = MIGRATIONS_PATH, target: int = None) -> List[Migration]:
+    """
+    Applies the pending migrations in order of version.
+
+    Every migration is recorded in schema_migrations and committed once all
+    of its statements have run, so a failed migration is tried again on the
+    next run.
+
+    Parameters
+    ----------
+    connection : connection
+        A DB-API connection to the Echo database.
+    path : str
+        The directory of the scripts. Defaults to the migrations directory.
+    target : int, optional
+        The last version to apply. All of them if None.
+
+    Returns
+    -------
+    list[Migration]
+        The migrations applied.
+    """
+    cursor = connection.cursor()
+    applied = applied_versions(cursor)
+    connection.commit()
+    migrated = []
+
+    try:
+        for migration in load_migrations(path):
+            if migration.version in applied or (target is not None and migration.version > target):
+                continue
+
+            for statement in migration.statements():
+                cursor.execute(statement)
+
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                           (migration.version, migration.name))
+            connection.commit()
+            migrated.append(migration)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return migrated
+
+
+def connect():
+    """Opens a connection to the Echo database with the settings of db_client."""
+    import MySQLdb
+
+    from db_client import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
+
+    return MySQLdb.connect(host=DB_HOST, port=int(DB_PORT), user=DB_USER, passwd=DB_PASSWORD, db=DB_NAME)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--list', action='store_true', help='list the migrations instead of applying them')
+    parser.add_argument('--target', type=int, help='the last version to apply')
+    args = parser.parse_args()
+
+    connection = connect()
+
+    try:
+        if args.list:
+            cursor = connection.cursor()
+            applied = applied_versions(cursor)
+            connection.commit()
+            cursor.close()
+
+            for migration in load_migrations():
+                status = 'applied' if migration.version in applied else 'pending'
+                print(f'{migration.version:04d} {migration.name}: {status}')
+        else:
+            for migration in migrate(connection, target=args.target):
+                print(f'applied {migration.version:04d} {migration.name}')
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+-- Makes (folder, sequence) the primary key of Contains, so a sequence is in a folder at most once
+-- and the contents of a folder are read from the clustered index.
+
+-- rows without a folder or sequence cannot be part of the key
+DELETE FROM Contains WHERE folder IS NULL OR sequence IS NULL;
+
+-- keep one row per (folder, sequence), with the earliest created timestamp
+CREATE TABLE Contains_deduplicated AS
+    SELECT folder, sequence, MIN(created) AS created FROM Contains GROUP BY folder, sequence;
+DELETE FROM Contains;
+INSERT INTO Contains (folder, sequence, created) SELECT folder, sequence, created FROM Contains_deduplicated;
+DROP TABLE Contains_deduplicated;
+
+ALTER TABLE Contains ADD PRIMARY KEY (folder, sequence);
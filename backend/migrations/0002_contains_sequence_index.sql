@@ -0,0 +1,4 @@
+-- Finds the folders holding a sequence, e.g. when deleting it, without scanning Contains.
+-- It replaces the index InnoDB created implicitly for the foreign key on sequence.
+
+CREATE INDEX contains_sequence ON Contains (sequence);
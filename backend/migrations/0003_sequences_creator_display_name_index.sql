@@ -0,0 +1,5 @@
+-- Finds a sequence by creator and display name, as process_recording does when checking for
+-- duplicates, and lists the sequences of a creator. It replaces the index InnoDB created
+-- implicitly for the foreign key on creator, since creator is its first column.
+
+CREATE INDEX sequences_creator_display_name ON Sequences (creator, display_name);
@@ -0,0 +1,228 @@
+"""
+Request and analysis profiling
+
+An opt-in cProfile hook capturing where real requests spend their time.
+A sampled fraction of the requests, and the requests sending the profiling
+header with the configured token, are profiled and their stats written to
+a local directory, which keeps the most recent files only. A given song
+analysis can be profiled with profile_song, or from the command line.
+
+The files are named after what was profiled, e.g.
+`20261017T093512123456_process-recording_2481ms_audio92.5s_44100Hz.prof`,
+and can be read with pstats or a viewer such as snakeviz.
+
+Usage (from the backend directory), to profile the analysis of an upload:
+    python profiling.py audio_data/<filename>.m4a --output profile_data
+"""
+
+import argparse
+import cProfile
+import datetime
+import os
+import random
+import re
+import threading
+import time
+
+from flask import g, request
+
+PROFILE_FILE_EXTENSION = '.prof'
+
+
+class Profiler:
+    """A class profiling sampled API requests and song analyses with cProfile.
+
+    Only one profile is taken at a time, so concurrent requests are never
+    slowed down by more than one profiler; a request sampled while another
+    one is profiled runs unprofiled.
+
+    Attributes
+    ----------
+    path : str
+        the directory of the profiles, created when the first one is written.
+    sample_rate : float
+        the fraction of requests profiled, 0 to only profile on request.
+    header_token : str
+        the value of the HEADER that makes a request profiled, None to ignore the header.
+    max_files : int
+        the number of most recent profiles kept in path, 0 to keep all of them.
+    HEADER : str
+        the request header asking for a profile.
+
+    Methods
+    -------
+    init_app(app)
+        Profiles the sampled requests of a Flask app.
+    annotate(audio_duration, sampling_rate)
+        Adds the audio of the current request to the filename of its profile.
+    profile_song(song)
+        Runs song.audio_to_notes under the profiler.
+    profiles()
+        Returns the paths of the profiles, oldest first.
+    """
+
+    HEADER = 'X-Echo-Profile'
+
+    def __init__(self, path: str, sample_rate: float = 0.0, header_token: str = None, max_files: int = 100):
+        """
+        Parameters
+        ----------
+        path : str
+            the directory of the profiles.
+        sample_rate : float
+            the fraction of requests profiled. defaults to 0.
+        header_token : str, optional
+            the value of the HEADER that makes a request profiled. the
+            header is ignored if None, the default.
+        max_files : int
+            the number of most recent profiles kept. defaults to 100.
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.header_token = header_token
+        self.max_files = max_files
+        self._busy = threading.Lock()
+
+    def init_app(self, app):
+        """Profiles the sampled requests of a Flask app, and those sending the header."""
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+        app.teardown_request(self._abort_request)
+
+    def annotate(self, audio_duration=None, sampling_rate=None):
+        """Adds the audio of the current request to the filename of its profile, if it is profiled.
+
+        Parameters
+        ----------
+        audio_duration : float, optional
+            the length of the analyzed audio in secs.
+        sampling_rate : int, optional
+            the sampling rate of the analyzed audio in samples/sec.
+        """
+        if g.get('profile') is not None:
+            g.profile_fields.update(audio_duration=audio_duration, sampling_rate=sampling_rate)
+
+    def profile_song(self, song):
+        """Runs song.audio_to_notes under the profiler and writes its profile.
+
+        The filename has the audio duration and sampling rate of the song. If
+        another profile is being taken, the analysis runs unprofiled.
+
+        Parameters
+        ----------
+        song : Song
+            the song to analyze.
+
+        Returns
+        -------
+        AnalyzedSong
+            the result of song.audio_to_notes().
+        """
+        if not self._busy.acquire(blocking=False):
+            return song.audio_to_notes()
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+
+        try:
+            analyzed_song = profile.runcall(song.audio_to_notes)
+            self._write(profile, 'song', time.perf_counter() - start,
+                        {"audio_duration": song.duration, "sampling_rate": song.sampling_rate})
+        finally:
+            self._busy.release()
+
+        return analyzed_song
+
+    def profiles(self) -> list:
+        """Returns the paths of the profiles, oldest first."""
+        if not os.path.isdir(self.path):
+            return []
+
+        # the filenames start with the time of the profile
+        return sorted(entry.path for entry in os.scandir(self.path) if entry.name.endswith(PROFILE_FILE_EXTENSION))
+
+    def _sampled(self) -> bool:
+        if self.header_token is not None and request.headers.get(self.HEADER) == self.header_token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start_request(self):
+        if not self._sampled() or not self._busy.acquire(blocking=False):
+            return
+
+        g.profile = cProfile.Profile()
+        g.profile_fields = {}
+        g.profile_start = time.perf_counter()
+        g.profile.enable()
+
+    def _end_request(self, response):
+        profile = g.pop('profile', None)
+
+        if profile is not None:
+            profile.disable()
+
+            try:
+                route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+                self._write(profile, route, time.perf_counter() - g.profile_start, g.profile_fields)
+            finally:
+                self._busy.release()
+
+        return response
+
+    def _abort_request(self, exception):
+        # requests that never reached after_request, e.g. on an unhandled error
+        profile = g.pop('profile', None)
+
+        if profile is not None:
+            profile.disable()
+            self._busy.release()
+
+    def _write(self, profile, name, seconds, fields):
+        """Writes a profile and removes the oldest ones beyond max_files."""
+        os.makedirs(self.path, exist_ok=True)
+        profile.dump_stats(os.path.join(self.path, _filename(name, seconds, fields)))
+
+        if self.max_files <= 0:
+            return
+
+        for path in self.profiles()[:-self.max_files]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _filename(name, seconds, fields):
+    """Returns the filename of a profile, e.g. `<time>_process-recording_2481ms_audio92.5s_44100Hz.prof`."""
+    parts = [datetime.datetime.now().strftime('%Y%m%dT%H%M%S%f'),
+             re.sub(r'[^A-Za-z0-9]+', '-', name).strip('-') or 'root',
+             f'{seconds * 1000:.0f}ms']
+
+    if fields.get("audio_duration") is not None:
+        parts.append(f'audio{fields["audio_duration"]:.1f}s')
+
+    if fields.get("sampling_rate") is not None:
+        parts.append(f'{fields["sampling_rate"]}Hz')
+
+    return '_'.join(parts) + PROFILE_FILE_EXTENSION
+
+
+def main():
+    from audio_processing import Song
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='M4A or WAV files to analyze')
+    parser.add_argument('--output', default='profile_data', help='the directory of the profiles')
+    parser.add_argument('--chunk-duration', type=float, default=0.25)
+    parser.add_argument('--pitch-engine', default='fft')
+    args = parser.parse_args()
+
+    profiler = Profiler(args.output, max_files=0)
+
+    for path in args.paths:
+        profiler.profile_song(Song(path, args.chunk_duration, pitch_engine=args.pitch_engine))
+        print(f'{path}: {profiler.profiles()[-1]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+
+class SQLiteCursor:
+    """A cursor over an sqlite database that takes MySQL-style %s parameters and counts queries."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.num_queries = 0
+
+    def execute(self, query, args=()):
+        self.num_queries += 1
+        return self.cursor.execute(query.replace('%s', '?').replace('LAST_INSERT_ID()', 'last_insert_rowid()'), args)
+
+    def executemany(self, query, args):
+        self.num_queries += 1
+        return self.cursor.executemany(query.replace('%s', '?'), args)
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def close(self):
+        self.cursor.close()
+
+
+class SQLiteConnection:
+    """A stand-in for a MySQLdb connection, backed by an sqlite database, in memory by default.
+
+    The sqlite3 connection itself is kept as `connection`, to set up and check the database directly.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self):
+        return SQLiteCursor(self.connection.cursor())
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def ping(self):
+        pass
+
+    def close(self):
+        self.connection.close()
+
+
+@pytest.fixture
+def connect_sqlite():
+    """Returns a function opening an SQLiteConnection to a path, every connection being closed after the test."""
+    connections = []
+
+    def connect(path=":memory:"):
+        connection = SQLiteConnection(path)
+        connections.append(connection)
+        return connection
+
+    yield connect
+
+    for connection in connections:
+        connection.close()
@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+
+from audio_processing import AnalysisPlan, AudioAnalyzer, get_analysis_plan
+
+
+@pytest.fixture
+def sample_plan():
+    return AnalysisPlan(frame_n_samples=2000, sampling_rate=8000)
+
+
+def test_init(sample_plan):
+    assert sample_plan.frame_n_samples == 2000
+    assert sample_plan.sampling_rate == 8000
+    assert sample_plan.n_fft == 2000
+    assert len(sample_plan.freqs) == 1001
+    assert sample_plan.window is None
+
+
+@pytest.mark.parametrize(('frame_n_samples', 'sampling_rate'), [
+    (2000, 8000),
+    (11025, 44100),
+    (12000, 48000),
+    (16, 48000),  # bins are 3 kHz apart
+    (4, 100),  # no bin within the band
+    ])
+def test_band_matches_mask(frame_n_samples, sampling_rate):
+    # the band slice selects the same bins as the 20-20000 Hz boolean mask
+    plan = AnalysisPlan(frame_n_samples, sampling_rate)
+    mask = (plan.freqs >= 20) & (plan.freqs <= 20000)
+    assert plan.freqs[plan.band].tolist() == plan.freqs[mask].tolist()
+
+
+def test_note_table(sample_plan):
+    table = sample_plan.note_table(440.0)
+    assert table is sample_plan.note_table(440.0)
+    assert not table.flags.writeable
+    assert table.tolist() == AudioAnalyzer().frequencies_to_midi(sample_plan.freqs).tolist()
+    assert table[112] == 69  # 448 Hz
+    assert sample_plan.note_table(432.0)[112] == 70  # 448 Hz with A4 = 432 Hz
+
+
+def test_apply_window():
+    frames = np.ones((2, 8))
+    assert AnalysisPlan(8, 8000).apply_window(frames) is frames
+    windowed = AnalysisPlan(8, 8000, window='hann').apply_window(frames)
+    assert windowed[0, 0] == 0.0
+    assert windowed.shape == frames.shape
+
+
+def test_get_analysis_plan():
+    # plans are shared between calls and analyzers
+    plan = get_analysis_plan(2000, 8000)
+    assert plan is get_analysis_plan(2000, 8000)
+    assert plan is not get_analysis_plan(2000, 16000)
+    assert AudioAnalyzer().bin_note_table(2000, 8000) is plan.note_table(AudioAnalyzer.A4_freq)
@@ -1,3 +1,4 @@
+import io
 import os
 import pytest
 from pathlib import Path
@@ -75,3 +76,73 @@ def test_save_to_file():
     song.add_point(time_stamp=0.0, frequency=440.0, note_name="A4", duration=1.0)
     song.save_to_file(filename)
     assert Path(filename).is_file()
+
+
+def test_add_points():
+    song = AnalyzedSong()
+    song.add_points([0.0, 0.25, 0.5], [440.0, 440.0, 392.0], [69, 69, 67], 0.25)
+    song.add_point(time_stamp=0.75, frequency=None, note_name="None", duration=0.25)
+    assert len(song) == 4
+    assert song.note_numbers.tolist() == [69, 69, 67, -1]
+    assert song.note_names == ["A4", "A4", "G4", "None"]
+    assert song.time_stamps.tolist() == [0.0, 0.25, 0.5, 0.75]
+    assert repr(song) == "A40.25,A40.25,G40.25,None0.25"
+
+
+def test_iteration(sample_analyzed_song2):
+    # points are created from the columns on iteration
+    points = list(sample_analyzed_song2)
+    assert all(isinstance(point, AnalysisPoint) for point in points)
+    assert [(point.time_stamp, point.frequency, point.note_name, point.duration) for point in points] == [
+        (0.0, 392.0, "G4", 0.5), (0.5, 440.0, "A4", 1.0), (1.5, 49.0, "G1", 0.5)]
+    with pytest.raises(AttributeError):
+        points[0].octave = 4  # AnalysisPoint has __slots__
+
+
+def test_data_setter(sample_analyzed_song2):
+    sample_analyzed_song2.data = sample_analyzed_song2.data[1:]
+    assert repr(sample_analyzed_song2) == "A41.0,G10.5"
+
+
+def test_combine_note_runs():
+    song = AnalyzedSong()
+    song.add_points([0.0, 0.25, 0.5, 0.75, 1.0], [440.0, 441.0, 392.0, 392.0, 392.0], [69, 69, 67, 67, 67], 0.25)
+    song._combine_notes(chunk_duration=0.25)
+    assert repr(song) == "A40.5,G40.75"
+    assert song.time_stamps.tolist() == [0.0, 0.5]
+    assert song.frequencies.tolist() == [440.0, 392.0]
+    empty = AnalyzedSong()
+    empty._combine_notes(chunk_duration=0.25)
+    assert len(empty) == 0
+
+
+def test_iter_text(sample_analyzed_song2, monkeypatch):
+    monkeypatch.setattr(AnalyzedSong, "SERIALIZE_BATCH_SIZE", 2)
+    assert list(sample_analyzed_song2.iter_text()) == ["G40.5,A41.0", ",G10.5"]
+    assert list(sample_analyzed_song2.iter_text(start=1)) == [",A41.0,G10.5"]
+    assert list(AnalyzedSong().iter_text()) == []
+
+
+def test_write_text(sample_analyzed_song2):
+    buffer = io.StringIO()
+    assert sample_analyzed_song2.write_text(buffer) == 3
+    assert buffer.getvalue() == repr(sample_analyzed_song2)
+
+
+def test_save_to_file_append(tmp_path):
+    # appending new notes gives the same file as saving the whole song
+    path = tmp_path / "song.txt"
+    song = AnalyzedSong()
+    song.add_point(time_stamp=0.0, frequency=440.0, note_name="A4", duration=1.0)
+    saved = song.save_to_file(str(path))
+    song.add_point(time_stamp=1.0, frequency=392.0, note_name="G4", duration=0.5)
+    song.add_point(time_stamp=1.5, frequency=49.0, note_name="G1", duration=0.5)
+    assert song.save_to_file(str(path), append_from=saved) == 3
+    assert path.read_text() == "A41.0,G40.5,G10.5"
+
+
+def test_write_lilypond(sample_analyzed_song, monkeypatch):
+    monkeypatch.setattr(AnalyzedSong, "SERIALIZE_BATCH_SIZE", 1)
+    buffer = io.StringIO()
+    sample_analyzed_song.write_lilypond(buffer, chunk_duration=0.5)
+    assert buffer.getvalue() == "\\relative c' {\n    \\key c \\major\n    \\time 4/4\na'2 g'2 \n}"
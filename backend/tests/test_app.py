@@ -0,0 +1,187 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from audio_processing import write_notes
+from audio_processing.metering import save_metering
+from audio_processing.note_format import make_records
+from db_client.pool import ConnectionPool
+from jobs import JOB_DONE, JOB_FAILED, JobQueue, JobStore
+from library_cache import LibraryCache, MemoryBackend
+
+os.environ.setdefault("MYSQL_ROOT_PASSWORD", "unused")  # read when db_client is imported
+
+SCHEMA = """
+    CREATE TABLE Users (email TEXT PRIMARY KEY, display_name TEXT, created TEXT DEFAULT 'today');
+    CREATE TABLE Sequences (sequence_id INTEGER PRIMARY KEY, instrument INT, bpm INT, creator TEXT,
+                            display_name TEXT, filename TEXT, created TEXT DEFAULT 'today');
+    CREATE TABLE Folders (folder_id INTEGER PRIMARY KEY, display_name TEXT, owner TEXT, created TEXT DEFAULT 'today');
+    CREATE TABLE Contains (folder INT, sequence INT, created TEXT DEFAULT 'today');
+    INSERT INTO Users (email, display_name) VALUES ('a@uw.edu', 'alice');
+    INSERT INTO Sequences (creator, display_name, filename) VALUES
+        ('a@uw.edu', 'song0', 'a@uw.edu-song00'), ('a@uw.edu', 'song1', 'a@uw.edu-song10'),
+        ('a@uw.edu', 'song2', 'a@uw.edu-song20');
+    INSERT INTO Folders (display_name, owner) VALUES ('favorites', 'a@uw.edu');
+    INSERT INTO Contains (folder, sequence) VALUES (1, 1), (1, 3);
+"""
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    # importing the app creates its data directories in the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("api"))
+
+    try:
+        import app as api
+    finally:
+        os.chdir(cwd)
+
+    return api
+
+
+@pytest.fixture
+def client(api, tmp_path, monkeypatch, connect_sqlite):
+    database_path = str(tmp_path / "echo.sqlite")
+    connect_sqlite(database_path).connection.executescript(SCHEMA)
+
+    # the data paths of the app are relative to the working directory, the app root when deployed
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(api.app, "root_path", str(tmp_path))
+    for path in (api.NOTE_DATA_PATH, api.AUDIO_DATA_PATH, api.METERING_DATA_PATH):
+        os.makedirs(path)
+
+    jobs = JobQueue(JobStore(str(tmp_path / "job_data")), on_failure=api.jobs.on_failure)
+    monkeypatch.setattr(api.db, "pool", ConnectionPool(lambda: connect_sqlite(database_path), 0, 2))
+    monkeypatch.setattr(api, "jobs", jobs)
+    monkeypatch.setattr(api, "library_cache", LibraryCache(MemoryBackend()))
+    yield api.app.test_client()
+    jobs.shutdown()
+
+
+def submit_recording(client):
+    return client.post("/process-recording", data={
+        "file": (io.BytesIO(b"not really audio"), "song.m4a"),
+        "user": "a@uw.edu",
+        "display_name": "hum",
+        "metering_data": '["-160.0", "-20.5"]',
+        "async": "true",
+    })
+
+
+def test_process_recording_async(api, client, monkeypatch):
+    monkeypatch.setattr(api, "transcribe_recording", lambda user, display_name, filename, metering_data: {
+        "id": 4, "display_name": display_name, "notes": "A4", "metering_data": metering_data.tolist()})
+
+    response = submit_recording(client)
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert response.headers["Location"] == f"/jobs/{job_id}"
+
+    api.jobs.shutdown()  # waits for the job
+    job = client.get(f"/jobs/{job_id}").get_json()
+    assert job["status"] == JOB_DONE
+    assert job["result"] == {"id": 4, "display_name": "hum", "notes": "A4", "metering_data": [-160.0, -20.5]}
+    assert "pid" not in job and "boot_id" not in job
+
+
+def test_process_recording_async_failed(api, client, monkeypatch):
+    def transcribe_recording(*args):
+        raise ValueError("not an M4A file")
+
+    monkeypatch.setattr(api, "transcribe_recording", transcribe_recording)
+    job_id = submit_recording(client).get_json()["job_id"]
+    api.jobs.shutdown()
+    job = client.get(f"/jobs/{job_id}").get_json()
+    assert job["status"] == JOB_FAILED
+    assert job["error"] == "ValueError: not an M4A file"
+
+    # the files of the failed recording are removed, so they do not keep its filename taken
+    assert os.listdir(api.AUDIO_DATA_PATH) == os.listdir(api.METERING_DATA_PATH) == []
+
+
+@pytest.mark.parametrize("job_id", ["0123456789abcdef", "not-a-job"])
+def test_get_job_missing(client, job_id):
+    assert client.get(f"/jobs/{job_id}").status_code == 404
+
+
+@pytest.mark.parametrize("query", ["fields=id,tempo", "fields=", "limit=0", "metering_points=-1"])
+def test_get_user_data_invalid(client, query):
+    response = client.get(f"/get-user-data/a@uw.edu?{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_get_user_data_missing_user(client):
+    assert client.get("/get-user-data/c@uw.edu").status_code == 404
+
+
+def test_get_user_data_pages(client):
+    first = client.get("/get-user-data/a@uw.edu?limit=2&fields=id").get_json()
+    assert first["sequences"] == [{"id": 1}, {"id": 2}]
+    assert first["folders"][0]["sequences"] == [1]
+
+    last = client.get(f"/get-user-data/a@uw.edu?limit=2&fields=id&cursor={first['next_cursor']}").get_json()
+    assert last["sequences"] == [{"id": 3}]
+    assert last["folders"][0]["sequences"] == [3]
+    assert last["next_cursor"] is None
+
+
+def test_get_user_data_fields(client):
+    library = client.get("/get-user-data/a@uw.edu?fields=display_name,created").get_json()
+    assert library["sequences"][0] == {"id": 1, "display_name": "song0", "created": "today"}
+    assert library["folders"][0]["sequences"] == [1, 3]
+
+
+def test_get_sequence_data_missing(client):
+    assert client.get("/get-sequence-data/99").status_code == 404
+
+
+def test_get_user_data_not_modified(client):
+    response = client.get("/get-user-data/a@uw.edu")
+    etag = response.headers["ETag"]
+    cached = client.get("/get-user-data/a@uw.edu", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+    # a write changes the library, so the old ETag no longer matches
+    assert client.put("/rename-sequence/1/renamed").status_code == 200
+    response = client.get("/get-user-data/a@uw.edu", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json()["sequences"][0]["display_name"] == "renamed"
+
+
+def test_get_sequence_data(api, client):
+    write_notes(f"{api.NOTE_DATA_PATH}/a@uw.edu-song00.notes", make_records([0.0], [0.25], [69]))
+    save_metering(f"{api.METERING_DATA_PATH}/a@uw.edu-song00.npy", np.array([-160.0, -20.5], dtype=np.float32))
+
+    response = client.get("/get-sequence-data/1")
+    assert response.status_code == 200
+    sequence = response.get_json()
+    assert (sequence["id"], sequence["display_name"], sequence["metering_data"]) == (1, "song0", ["-160.0", "-20.5"])
+    assert sequence["notes"] != ""
+
+    cached = client.get("/get-sequence-data/1", headers={"If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+    # rewriting the notes changes the ETag
+    write_notes(f"{api.NOTE_DATA_PATH}/a@uw.edu-song00.notes", make_records([0.0, 0.25], [0.25, 0.25], [69, 71]))
+    assert client.get("/get-sequence-data/1", headers={"If-None-Match": response.headers["ETag"]}).status_code == 200
+
+
+
+def test_get_recording_file(api, client):
+    with open(f"{api.AUDIO_DATA_PATH}/a@uw.edu-song00.m4a", "wb") as f:
+        f.write(b"0123456789")
+
+    response = client.get("/get-recording-file/1")
+    assert response.status_code == 200
+    assert response.data == b"0123456789"
+    assert client.get("/get-recording-file/1", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    partial = client.get("/get-recording-file/1", headers={"Range": "bytes=2-5"})
+    assert partial.status_code == 206
+    assert partial.data == b"2345"
@@ -34,4 +34,68 @@ def test_audio_chunk_to_frequency(sample_audio_analyzer):
     ])
 def test_frequency_to_note_name(sample_audio_analyzer, frequency, note_name):
     # Test for converting the detected frequency to a standard note name
-    assert sample_audio_analyzer.frequency_to_note_name(frequency)  == note_name 
\ No newline at end of file
+    assert sample_audio_analyzer.frequency_to_note_name(frequency)  == note_name 
+
+def test_frame_audio(sample_audio_analyzer):
+    # frames are a view on the input and drop the incomplete trailing frame
+    data = np.arange(10, dtype=np.int16)
+    frames = sample_audio_analyzer.frame_audio(data, 4)
+    assert frames.shape == (2, 4)
+    assert np.shares_memory(frames, data)
+    assert frames[1].tolist() == [4, 5, 6, 7]
+
+
+def test_audio_frames_to_frequencies(sample_audio_analyzer):
+    # the batched path agrees with the per-chunk path
+    sampling_rate = 8000
+    t = np.arange(sampling_rate * 2) / sampling_rate
+    data = np.concatenate([np.sin(2 * np.pi * 440 * t), np.sin(2 * np.pi * 392 * t)])
+    frames = sample_audio_analyzer.frame_audio(data, 2000)
+    frequencies = sample_audio_analyzer.audio_frames_to_frequencies(frames, sampling_rate)
+    expected = [sample_audio_analyzer.audio_chunk_to_frequency(frame, sampling_rate) for frame in frames]
+    assert frequencies.tolist() == expected
+    assert frequencies[0] == pytest.approx(440.0)
+    assert frequencies[-1] == pytest.approx(392.0)
+
+
+def test_frequencies_to_note_names(sample_audio_analyzer):
+    frequencies = [440.0, 392.0, 49.0, 32.70, 4186.01, 10.0, np.nan]
+    assert sample_audio_analyzer.frequencies_to_note_names(frequencies) == [
+        "A4", "G4", "G1", "C1", "C8", "None", "None"]
+
+
+def test_frequencies_to_midi(sample_audio_analyzer):
+    frequencies = [440.0, 261.63, 49.0, 10.0, np.nan]
+    assert sample_audio_analyzer.frequencies_to_midi(frequencies).tolist() == [69, 60, 31, -1, -1]
+
+
+def test_reference_pitch():
+    # 450 Hz is closest to A#4 when A4 is tuned to 432 Hz, and to A4 at 440 Hz
+    analyzer = AudioAnalyzer(reference_pitch=432.0)
+    assert analyzer.frequency_to_note_name(432.0) == "A4"
+    assert analyzer.frequencies_to_midi([432.0, 450.0]).tolist() == [69, 70]
+    assert AudioAnalyzer().frequencies_to_midi([450.0]).tolist() == [69]
+
+
+def test_bin_note_table(sample_audio_analyzer):
+    table = sample_audio_analyzer.bin_note_table(2000, 8000)
+    assert table is sample_audio_analyzer.bin_note_table(2000, 8000)  # cached
+    assert not table.flags.writeable
+    assert len(table) == 1001
+    assert table[0] == -1  # 0 Hz
+    assert table[110] == 69  # 440 Hz
+
+
+def test_midi_to_note_names(sample_audio_analyzer):
+    assert sample_audio_analyzer.midi_to_note_names([69, 60, 31, -1, 150]) == ["A4", "C4", "G1", "None", "F#11"]
+
+
+def test_frame_audio_overlap(sample_audio_analyzer):
+    # overlapping frames are a view too, one frame per hop
+    data = np.arange(10, dtype=np.int16)
+    frames = sample_audio_analyzer.frame_audio(data, 4, hop_n_samples=2)
+    assert frames.shape == (4, 4)
+    assert np.shares_memory(frames, data)
+    assert frames[1].tolist() == [2, 3, 4, 5]
+    assert frames[3].tolist() == [6, 7, 8, 9]
+    assert sample_audio_analyzer.frame_audio(data[:3], 4, hop_n_samples=2).shape == (0, 4)
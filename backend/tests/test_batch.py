@@ -0,0 +1,62 @@
+import os
+import pytest
+import numpy as np
+from scipy.io import wavfile
+
+from audio_processing import Song, notes_to_text, read_notes
+from audio_processing.batch import find_recordings, main, run_batch, transcribe_file
+
+
+@pytest.fixture
+def recordings(tmp_path):
+    # two short tones and one corrupt upload
+    audio_dir = tmp_path / "audio_data"
+    audio_dir.mkdir()
+    t = np.arange(8000) / 8000
+    for name, frequency in (("a", 440.0), ("g", 392.0)):
+        wavfile.write(audio_dir / f"{name}.wav", 8000, (np.sin(2 * np.pi * frequency * t) * 10000).astype(np.int16))
+    (audio_dir / "corrupt.wav").write_bytes(b"not a wav file")
+    (audio_dir / "notes.txt").write_text("ignored")
+    return audio_dir
+
+
+def test_find_recordings(recordings, tmp_path):
+    assert [os.path.basename(path) for path in find_recordings(str(recordings))] == ["a.wav", "corrupt.wav", "g.wav"]
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# recordings\naudio_data/g.wav\n\naudio_data/a.wav\n")
+    assert find_recordings(str(manifest)) == [str(recordings / "g.wav"), str(recordings / "a.wav")]
+
+
+def test_transcribe_file(recordings, tmp_path):
+    result = transcribe_file(str(recordings / "a.wav"), str(tmp_path), output_format="text")
+    assert result.error is None
+    assert result.audio_seconds == 1.0
+    with open(result.output_path) as f:
+        assert f.read() == repr(Song(str(recordings / "a.wav")).audio_to_notes())
+
+    result = transcribe_file(str(recordings / "a.wav"), str(tmp_path))
+    assert result.output_path == str(tmp_path / "a.notes")
+    assert notes_to_text(read_notes(result.output_path)) == "A40.25,A40.25,A40.25,A40.25"
+
+    result = transcribe_file(str(recordings / "corrupt.wav"), str(tmp_path))
+    assert result.output_path is None
+    assert result.error.startswith("ValueError")
+
+
+def test_run_batch(recordings, tmp_path):
+    output_dir = tmp_path / "note_data"
+    paths = find_recordings(str(recordings))
+    results = list(run_batch(paths, str(output_dir), workers=2, tasks_per_submit=2))
+    assert [result.path for result in results] == paths
+    assert [result.error is None for result in results] == [True, False, True]
+    assert sorted(os.listdir(output_dir)) == ["a.notes", "g.notes"]
+    assert notes_to_text(read_notes(str(output_dir / "a.notes"))) == "A40.25,A40.25,A40.25,A40.25"
+
+
+def test_main(recordings, tmp_path, capsys):
+    timings = tmp_path / "timings.csv"
+    status = main([str(recordings), "--output", str(tmp_path / "note_data"), "--workers", "1",
+                   "--timings", str(timings)])
+    assert status == 1  # the corrupt file failed
+    assert "3 files (1 failed)" in capsys.readouterr().out
+    assert len(timings.read_text().splitlines()) == 4
@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks import bench_suite
+from benchmarks.synthetic import glissando, long_melody, noisy_hum, pure_tone, silence, to_stereo
+
+
+@pytest.mark.parametrize("generator", [pure_tone, glissando, noisy_hum, silence, long_melody])
+@pytest.mark.parametrize("sampling_rate", [8000, 44100])
+def test_generators(generator, sampling_rate):
+    pcm = generator(2.5, sampling_rate)
+    assert pcm.dtype == np.int16
+    assert pcm.shape == (int(2.5 * sampling_rate),)
+    assert np.array_equal(pcm, generator(2.5, sampling_rate))
+
+
+def test_generators_render_in_blocks(monkeypatch):
+    # the long-form generators give the same samples whatever the block size
+    pcm = glissando(3, 8000)
+    monkeypatch.setattr("benchmarks.synthetic.BLOCK_N_SAMPLES", 1000)
+    assert np.array_equal(glissando(3, 8000), pcm)
+
+
+def test_pure_tone_pitch():
+    pcm = pure_tone(1, 8000, frequency=440.0)
+    assert np.argmax(np.abs(np.fft.rfft(pcm))) == 440
+
+
+def test_to_stereo():
+    pcm = pure_tone(1, 8000)
+    stereo = to_stereo(pcm, sampling_rate=8000)
+    assert stereo.shape == (8000, 2)
+    assert np.array_equal(stereo[:, 0], pcm)
+
+
+def result(case, stage, throughput, peak_bytes):
+    return {"case": case, "stage": stage, "throughput": throughput, "peak_bytes": peak_bytes}
+
+
+def test_compare():
+    baseline = [result("tone", "audio_to_notes", 1000.0, 100 * 2 ** 20),
+                result("tone", "save_notes", 1000.0, 1000)]
+    assert bench_suite.compare([result("tone", "audio_to_notes", 850.0, 110 * 2 ** 20),
+                                result("tone", "save_notes", 1000.0, 100000),  # below MIN_PEAK_BYTES_CHANGE
+                                result("hum", "audio_to_notes", 1.0, 0)], baseline, 0.2) == []
+
+    regressions = bench_suite.compare([result("tone", "audio_to_notes", 700.0, 130 * 2 ** 20)], baseline, 0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("tone audio_to_notes: throughput")
+
+
+def test_main(tmp_path, monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "results.json"
+    monkeypatch.setattr(bench_suite, "CASES", [bench_suite.Case("tone", "tone", 1, 8000, channels=2)])
+    stages = ["--stages", "audio_to_notes", "save_to_file", "save_notes"]
+
+    monkeypatch.setattr("sys.argv", ["bench_suite", "--repeat", "1", "--output", str(baseline), *stages])
+    bench_suite.main()
+    results = json.loads(baseline.read_text())["results"]
+    assert [(result["case"], result["stage"]) for result in results] == [
+        ("tone", "audio_to_notes"), ("tone", "save_to_file"), ("tone", "save_notes")]
+    assert all(result["notes"] == 4 and result["throughput"] > 0 for result in results)
+
+    # an impossible baseline fails the comparison
+    for result in results:
+        result["throughput"] = float("inf")
+    baseline.write_text(json.dumps({"results": results}))
+    monkeypatch.setattr("sys.argv", ["bench_suite", "--repeat", "1", "--output", str(output),
+                                     "--baseline", str(baseline), *stages])
+    with pytest.raises(SystemExit) as exit_info:
+        bench_suite.main()
+    assert exit_info.value.code == 1
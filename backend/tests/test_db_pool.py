@@ -0,0 +1,219 @@
+import threading
+import time
+import pytest
+from flask import Flask
+
+from db_client import flask_pool
+from db_client.flask_pool import FlaskConnectionPool
+from db_client.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """A DB-API connection recording the calls made by the pool."""
+
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self):
+        if not self.healthy:
+            raise ConnectionError("MySQL server has gone away")
+
+    def rollback(self):
+        if not self.healthy:
+            raise ConnectionError("MySQL server has gone away")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connections():
+    return []
+
+
+@pytest.fixture
+def connect(connections):
+    def connect():
+        connection = FakeConnection()
+        connections.append(connection)
+        return connection
+    return connect
+
+
+def test_pool_min_size(connect, connections):
+    pool = ConnectionPool(connect, min_size=2, max_size=4)
+    assert len(connections) == 2
+    assert pool.stats()["idle"] == 2
+    assert pool.stats()["in_use"] == 0
+
+
+@pytest.mark.parametrize("min_size, max_size", [(-1, 2), (3, 2), (0, 0)])
+def test_pool_invalid_size(connect, min_size, max_size):
+    with pytest.raises(ValueError):
+        ConnectionPool(connect, min_size=min_size, max_size=max_size)
+
+
+def test_pool_reuses_connections(connect, connections):
+    pool = ConnectionPool(connect, min_size=1, max_size=2)
+
+    for _ in range(5):
+        with pool.connection() as connection:
+            assert connection is connections[0]
+
+    assert len(connections) == 1
+    assert connections[0].rollbacks == 5
+    assert pool.stats()["checkouts"] == 5
+
+
+def test_pool_timeout(connect, connections):
+    pool = ConnectionPool(connect, min_size=0, max_size=2, timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+    assert pool.stats()["in_use"] == 2
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    assert pool.stats()["timeouts"] == 1
+    assert len(connections) == 2
+
+    pool.release(first)
+    assert pool.acquire() is first
+
+
+def test_pool_waits_for_release(connect):
+    pool = ConnectionPool(connect, min_size=1, max_size=1, timeout=5)
+    connection = pool.acquire()
+    threading.Timer(0.05, pool.release, (connection,)).start()
+    assert pool.acquire() is connection
+    assert pool.stats()["wait_seconds_max"] >= 0.04
+
+
+def test_pool_health_check(connect, connections):
+    pool = ConnectionPool(connect, min_size=1, max_size=1, health_check_interval=0)
+    connections[0].healthy = False
+    time.sleep(0.01)
+
+    with pool.connection() as connection:
+        assert connection is connections[1]
+
+    assert connections[0].closed
+    assert pool.stats()["health_check_failures"] == 1
+    assert pool.stats()["size"] == 1
+
+
+def test_pool_discards_broken_connections(connect, connections):
+    pool = ConnectionPool(connect, min_size=0, max_size=2)
+
+    with pool.connection() as connection:
+        connection.healthy = False  # the rollback on release fails
+
+    assert connections[0].closed
+    assert pool.stats()["discarded"] == 1
+    assert pool.stats()["size"] == 0
+
+    pool.release(pool.acquire(), discard=True)
+    assert connections[1].closed
+    assert pool.stats()["discarded"] == 2
+
+
+def test_pool_trims_idle_connections(connect, connections):
+    pool = ConnectionPool(connect, min_size=1, max_size=3, idle_timeout=0)
+    checked_out = [pool.acquire() for _ in range(3)]
+
+    for connection in checked_out:
+        time.sleep(0.01)
+        pool.release(connection)
+
+    assert pool.stats()["size"] == 1
+    assert sum(connection.closed for connection in connections) == 2
+
+
+def test_pool_close(connect, connections):
+    pool = ConnectionPool(connect, min_size=2, max_size=2)
+    connection = pool.acquire()
+    pool.close()
+    assert connections[1].closed != connections[0].closed
+    pool.release(connection)
+    assert all(connection.closed for connection in connections)
+    assert pool.stats()["size"] == 0
+
+
+def test_pool_concurrency(connect, connections):
+    pool = ConnectionPool(connect, min_size=0, max_size=3, timeout=5)
+    in_use = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        for _ in range(20):
+            with pool.connection():
+                with lock:
+                    in_use.append(1)
+                    peak.append(len(in_use))
+                time.sleep(0.001)
+                with lock:
+                    in_use.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = pool.stats()
+    assert max(peak) <= 3
+    assert len(connections) <= 3
+    assert stats["checkouts"] == 160
+    assert stats["in_use"] == 0
+    assert stats["waiting"] == 0
+
+
+@pytest.fixture
+def flask_db(connect, monkeypatch):
+    def slow_connect(config):
+        time.sleep(0.01)  # so the first requests all find no pool
+        return connect()
+
+    monkeypatch.setattr(flask_pool, "_connect_mysql", slow_connect)
+    app = Flask(__name__)
+    return app, FlaskConnectionPool(app)
+
+
+def test_flask_pool_created_once(flask_db, connections):
+    app, db = flask_db
+    ready = threading.Barrier(8)
+
+    def first_request():
+        ready.wait()
+        with app.app_context():
+            db.connection.ping()
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # the connections of any other pool would be missing from it
+    assert db.pool.stats()["checkouts"] == 8
+    assert len(connections) == db.pool.stats()["idle"]
+
+
+def test_flask_pool_teardown(flask_db, connect):
+    # a connection goes back to the pool it came from, even if the pool was replaced since
+    app, db = flask_db
+
+    with app.app_context():
+        connection = db.connection
+        pool = db.pool
+        db.pool = ConnectionPool(connect, min_size=0)
+        assert db.connection is connection
+
+    assert pool.stats()["in_use"] == 0
+    assert pool.stats()["idle"] == 1
+    assert db.pool.stats()["idle"] == 0
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the API, and the audio_processing modules the batch jobs start from
+STARTUP_MODULES = {
+    "app": ["app"],
+    "audio_processing": ["audio_processing", "audio_processing.metering", "audio_processing.transcription_cache",
+                         "audio_processing.batch"],
+}
+
+# loaded on first use only: the FFTs and WAV reader, the M4A decoder, and unused libraries
+LAZY_MODULES = ["scipy", "pydub", "librosa", "midiutil", "pyaudio"]
+
+# import time of audio_processing itself, as a fraction of the import time of numpy in the same run
+IMPORT_TIME_BUDGET = 1.0
+
+
+def import_times(modules, cwd):
+    """Imports modules in a fresh interpreter and returns the cumulative import time of every module in secs."""
+    env = {**os.environ, "MYSQL_ROOT_PASSWORD": os.environ.get("MYSQL_ROOT_PASSWORD", "unused"),
+           "PYTHONPATH": os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")]))}
+    # run elsewhere, so the data directories created by the API do not land in the backend
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+                            cwd=cwd, env=env, capture_output=True, text=True, check=True).stderr
+    times = {}
+
+    for line in output.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.setdefault(name.strip(), int(cumulative) / 1e6)
+
+    return times
+
+
+@pytest.fixture(scope="module", params=sorted(STARTUP_MODULES))
+def startup_import_times(request, tmp_path_factory):
+    return import_times(STARTUP_MODULES[request.param], tmp_path_factory.mktemp("startup"))
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_heavy_modules_not_imported(startup_import_times, module):
+    assert not [name for name in startup_import_times if name == module or name.startswith(f"{module}.")]
+
+
+def test_import_time_budget(tmp_path):
+    # relative to numpy, which every run imports, so a slow or loaded machine does not fail it
+    times = import_times(STARTUP_MODULES["audio_processing"], tmp_path)
+    assert times["audio_processing"] - times["numpy"] < IMPORT_TIME_BUDGET * times["numpy"]
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from audio_processing import Song, instrumentation
+
+
+class RecordingObserver:
+    def __init__(self):
+        self.stages = []
+        self.audio_seconds = 0.0
+
+    def observe_stage(self, stage, seconds):
+        self.stages.append((stage, seconds))
+
+    def add_audio_seconds(self, seconds):
+        self.audio_seconds += seconds
+
+
+@pytest.fixture
+def observer():
+    observer = RecordingObserver()
+    instrumentation.set_observer(observer)
+    yield observer
+    instrumentation.set_observer(None)
+
+
+def test_stage(observer):
+    with instrumentation.stage("decode"):
+        pass
+
+    with pytest.raises(ZeroDivisionError):
+        with instrumentation.stage("analyze"):
+            1 / 0
+
+    assert [stage for stage, _ in observer.stages] == ["decode", "analyze"]
+    assert all(seconds >= 0 for _, seconds in observer.stages)
+
+
+def test_stage_without_observer():
+    assert instrumentation.get_observer() is None
+
+    with instrumentation.stage("decode"):
+        instrumentation.observe_stage("analyze", 1.0)
+        instrumentation.audio_processed(1.0)
+
+
+def test_song_stages(observer):
+    sampling_rate = 8000
+    data = np.sin(2 * np.pi * 440 * np.arange(3 * sampling_rate) / sampling_rate)
+    Song.from_pcm(sampling_rate, data).audio_to_notes()
+    assert [stage for stage, _ in observer.stages] == ["analyze", "audio_to_notes"]
+    assert observer.audio_seconds == 3.0
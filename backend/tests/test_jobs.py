@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+import pytest
+
+from jobs import BOOT_ID, JOB_DONE, JOB_FAILED, JOB_QUEUED, JobQueue, JobQueueFull, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "job_data"))
+
+
+def test_job_store(store):
+    job = store.create(filename="song")
+    assert job["status"] == JOB_QUEUED
+    assert store.get(job["id"]) == job
+    store.update(job["id"], status=JOB_DONE, result={"id": 1})
+    assert store.get(job["id"])["result"] == {"id": 1}
+    assert store.jobs() == [store.get(job["id"])]
+
+
+@pytest.mark.parametrize("job_id", ["", "0123", "../job_data", "ABC"])
+def test_job_store_missing(store, job_id):
+    assert store.get(job_id) is None
+
+
+def test_job_queue(store):
+    queue = JobQueue(store, max_workers=2)
+    done = queue.submit(lambda x: {"double": x * 2}, 21)
+    failed = queue.submit(lambda: 1 / 0)
+    queue.shutdown()
+    assert store.get(done["id"])["status"] == JOB_DONE
+    assert store.get(done["id"])["result"] == {"double": 42}
+    assert store.get(failed["id"])["status"] == JOB_FAILED
+    assert store.get(failed["id"])["error"].startswith("ZeroDivisionError")
+    assert queue.pending() == 0
+
+
+def test_job_queue_unserializable_result(store):
+    queue = JobQueue(store)
+    job = queue.submit(lambda: object())
+    queue.shutdown()
+    assert store.get(job["id"])["status"] == JOB_FAILED
+
+
+def test_job_queue_full(store):
+    release = threading.Event()
+    queue = JobQueue(store, max_workers=1, max_pending=2)
+    queue.submit(release.wait)
+    queue.submit(release.wait)
+    with pytest.raises(JobQueueFull):
+        queue.submit(release.wait)
+    release.set()
+    queue.shutdown()
+    assert queue.pending() == 0
+
+
+def test_job_queue_interrupted(store):
+    # jobs of a process that is gone are failed, those of a live one are left alone
+    orphan = store.create(pid=2 ** 22 + 1, boot_id="0")  # above the largest Linux pid
+    live = store.create(pid=os.getppid(), boot_id="0")
+    current = store.create(pid=os.getpid(), boot_id=BOOT_ID)
+    JobQueue(store).shutdown()
+    assert store.get(orphan["id"])["status"] == JOB_FAILED
+    assert store.get(live["id"])["status"] == JOB_QUEUED
+    assert store.get(current["id"])["status"] == JOB_QUEUED
+
+
+@pytest.mark.parametrize("boot_id", ["0", None])
+def test_job_queue_interrupted_same_pid(store, boot_id):
+    # a restarted server often gets the pid of the previous one back
+    job = store.create(pid=os.getpid(), boot_id=boot_id)
+    JobQueue(store).shutdown()
+    assert store.get(job["id"])["status"] == JOB_FAILED
+
+
+def test_job_queue_on_failure(store):
+    # called for jobs that fail and for those a previous server left unfinished
+    interrupted = store.create(pid=2 ** 22 + 1, boot_id="0", filename="song0")
+    failed_jobs = []
+    queue = JobQueue(store, on_failure=failed_jobs.append)
+    queue.submit(lambda: None, filename="song1")
+    failed = queue.submit(lambda: 1 / 0, filename="song2")
+    queue.shutdown()
+    assert [job["id"] for job in failed_jobs] == [interrupted["id"], failed["id"]]
+    assert [job["filename"] for job in failed_jobs] == ["song0", "song2"]
+    assert all(job["status"] == JOB_FAILED for job in failed_jobs)
+
+
+def test_job_store_update_missing(store):
+    with pytest.raises(KeyError):
+        store.update("0123", status=JOB_DONE)
+
+
+def test_job_queue_deleted_job(store):
+    # a job whose file is deleted while it runs still frees its slot
+    submitted = threading.Event()
+    queue = JobQueue(store)
+    job = queue.submit(lambda: submitted.wait() and os.remove(os.path.join(store.path, f"{job['id']}.json")))
+    submitted.set()
+    queue.shutdown()
+    assert store.get(job["id"]) is None
+    assert queue.pending() == 0
+
+
+def age(store, job, seconds):
+    path = os.path.join(store.path, f"{job['id']}.json")
+    os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+
+def test_job_store_purge(tmp_path):
+    store = JobStore(str(tmp_path / "job_data"), ttl=3600)
+    expired = store.create()
+    store.update(expired["id"], status=JOB_DONE, result={"notes": "A4"})
+    failed = store.create()
+    store.update(failed["id"], status=JOB_FAILED)
+    recent = store.create()
+    store.update(recent["id"], status=JOB_DONE)
+    queued = store.create(pid=os.getpid(), boot_id=BOOT_ID)
+    for job in (expired, failed, queued):
+        age(store, job, 7200)
+
+    assert store.purge() == 2
+    assert [job["id"] for job in store.jobs()] == sorted([recent["id"], queued["id"]])
+
+
+def test_job_store_purge_on_create(tmp_path):
+    store = JobStore(str(tmp_path / "job_data"), ttl=3600)
+    store.purge()
+    expired = store.create(status=JOB_DONE)
+    age(store, expired, 7200)
+    store.create()  # within PURGE_INTERVAL of the last purge
+    assert store.get(expired["id"]) is not None
+
+    store._next_purge = 0
+    store.create()
+    assert store.get(expired["id"]) is None
+
+
+def test_job_store_keep_forever(tmp_path):
+    store = JobStore(str(tmp_path / "job_data"), ttl=0)
+    job = store.create(status=JOB_DONE)
+    age(store, job, 10 ** 9)
+    JobQueue(store).shutdown()
+    assert store.get(job["id"]) is not None
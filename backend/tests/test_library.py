@@ -0,0 +1,154 @@
+import pytest
+
+from library import fetch_sequence, fetch_sequence_owners, fetch_user_library, set_folder_contents
+
+
+@pytest.fixture
+def connection(connect_sqlite):
+    connection = connect_sqlite()
+    connection.connection.executescript("""
+        CREATE TABLE Users (email TEXT PRIMARY KEY, display_name TEXT, created TEXT);
+        CREATE TABLE Sequences (sequence_id INTEGER PRIMARY KEY, instrument INT, bpm INT, creator TEXT,
+                                display_name TEXT, filename TEXT, created TEXT);
+        CREATE TABLE Folders (folder_id INTEGER PRIMARY KEY, display_name TEXT, owner TEXT, created TEXT);
+        CREATE TABLE Contains (folder INT, sequence INT, created TEXT);
+        INSERT INTO Users VALUES ('a@uw.edu', 'alice', 'today'), ('b@uw.edu', 'bob', 'today');
+        INSERT INTO Sequences VALUES (1, 1, 0, 'b@uw.edu', 'other', 'b-other0', 'today');
+        INSERT INTO Folders VALUES (1, 'other', 'b@uw.edu', 'today');
+        INSERT INTO Contains VALUES (1, 1, 'today');
+    """)
+    return connection
+
+
+def add_library(connection, num_folders, num_sequences):
+    # every sequence of alice is in the first folder, and every other one in the second
+    database = connection.connection  # set up directly, so the queries are not counted
+
+    for i in range(num_sequences):
+        database.execute("INSERT INTO Sequences (creator, display_name, filename, created) VALUES (?, ?, ?, ?)",
+                         ("a@uw.edu", f"song{i}", f"a@uw.edu-song{i}0", "today"))
+    sequence_ids = [row[0] for row in database.execute("SELECT sequence_id FROM Sequences WHERE creator = 'a@uw.edu'")]
+
+    for i in range(num_folders):
+        folder_id = database.execute("INSERT INTO Folders (display_name, owner, created) VALUES (?, ?, ?)",
+                                     (f"folder{i}", "a@uw.edu", "today")).lastrowid
+        members = sequence_ids if i == 0 else sequence_ids[::2] if i == 1 else []
+        database.executemany("INSERT INTO Contains (folder, sequence) VALUES (?, ?)",
+                             [(folder_id, sequence_id) for sequence_id in members])
+
+
+def test_fetch_user_library(connection):
+    add_library(connection, num_folders=3, num_sequences=3)
+    library = fetch_user_library(connection.cursor(), "a@uw.edu")
+    assert library["username"] == "alice"
+    assert [(folder["display_name"], sorted(folder["sequences"])) for folder in library["folders"]] == [
+        ("folder0", [2, 3, 4]), ("folder1", [2, 4]), ("folder2", [])]
+    assert library["sequences"][0] == {"id": 2, "display_name": "song0", "created": "today", "filename": "a@uw.edu-song00"}
+    assert len(library["sequences"]) == 3
+    assert library["next_cursor"] is None
+
+
+def test_fetch_user_library_missing(connection):
+    assert fetch_user_library(connection.cursor(), "c@uw.edu") is None
+
+
+@pytest.mark.parametrize("num_folders, num_sequences", [(0, 0), (1, 1), (50, 10), (200, 500)])
+def test_fetch_user_library_num_queries(connection, num_folders, num_sequences):
+    # the number of queries does not grow with the library
+    add_library(connection, num_folders, num_sequences)
+    cursor = connection.cursor()
+    library = fetch_user_library(cursor, "a@uw.edu")
+    assert len(library["folders"]) == num_folders
+    assert len(library["sequences"]) == num_sequences
+    assert cursor.num_queries == 4
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7])
+def test_fetch_user_library_pages(connection, limit):
+    # following next_cursor visits every sequence once, in order, and the
+    # folders of each page only list the sequences of that page
+    add_library(connection, num_folders=2, num_sequences=7)
+    sequence_ids = []
+    memberships = {}
+    after = None
+
+    while True:
+        cursor = connection.cursor()
+        library = fetch_user_library(cursor, "a@uw.edu", limit, after)
+        page_ids = [sequence["id"] for sequence in library["sequences"]]
+        assert len(page_ids) <= limit
+        assert len(library["folders"]) == 2
+        assert cursor.num_queries == 4
+        for folder in library["folders"]:
+            assert set(folder["sequences"]) <= set(page_ids)
+            memberships.setdefault(folder["display_name"], []).extend(folder["sequences"])
+        sequence_ids += page_ids
+        after = library["next_cursor"]
+        if after is None:
+            break
+
+    assert sequence_ids == list(range(2, 9))
+    assert {name: sorted(ids) for name, ids in memberships.items()} == {
+        "folder0": list(range(2, 9)), "folder1": [2, 4, 6, 8]}
+
+
+def test_fetch_user_library_empty_page(connection):
+    add_library(connection, num_folders=2, num_sequences=3)
+    library = fetch_user_library(connection.cursor(), "a@uw.edu", limit=2, after=100)
+    assert library["sequences"] == []
+    assert [folder["sequences"] for folder in library["folders"]] == [[], []]
+    assert library["next_cursor"] is None
+
+
+def test_fetch_sequence(connection):
+    assert fetch_sequence(connection.cursor(), 1) == {
+        "id": 1, "display_name": "other", "created": "today", "filename": "b-other0"}
+    assert fetch_sequence(connection.cursor(), 2) is None
+
+
+def folder_contents(connection, folder_id):
+    rows = connection.connection.execute("SELECT sequence FROM Contains WHERE folder = ?", (folder_id,))
+    return sorted(row[0] for row in rows)
+
+
+def test_fetch_sequence_owners(connection):
+    add_library(connection, num_folders=0, num_sequences=2)
+    cursor = connection.cursor()
+    assert fetch_sequence_owners(cursor, [1, 2, 3, 2, 9]) == {1: "b@uw.edu", 2: "a@uw.edu", 3: "a@uw.edu"}
+    assert cursor.num_queries == 1
+    assert fetch_sequence_owners(cursor, []) == {}
+    assert cursor.num_queries == 1
+
+
+@pytest.mark.parametrize("sequence_ids, added, removed", [
+    ([2, 3, 4], [], []),
+    ([4, 3], [], [2]),
+    ([], [], [2, 3, 4]),
+    ([5, 2, 6, 5], [5, 6], [3, 4]),
+])
+def test_set_folder_contents(connection, sequence_ids, added, removed):
+    add_library(connection, num_folders=2, num_sequences=5)
+    cursor = connection.cursor()
+    connection.connection.execute("DELETE FROM Contains WHERE folder = 2")
+    connection.connection.executemany("INSERT INTO Contains (folder, sequence) VALUES (2, ?)", [(2,), (3,), (4,)])
+    assert set_folder_contents(cursor, 2, sequence_ids) == (added, removed)
+    assert folder_contents(connection, 2) == sorted(set(sequence_ids))
+    assert cursor.num_queries <= 3
+
+
+def test_set_folder_contents_other_folders(connection):
+    # removing a sequence from a folder leaves it in the other folders
+    add_library(connection, num_folders=2, num_sequences=4)
+    set_folder_contents(connection.cursor(), 3, [])
+    assert folder_contents(connection, 2) == [2, 3, 4, 5]
+    assert folder_contents(connection, 1) == [1]
+
+
+@pytest.mark.parametrize("num_sequences", [10, 500])
+def test_set_folder_contents_num_queries(connection, num_sequences):
+    add_library(connection, num_folders=2, num_sequences=num_sequences)
+    sequence_ids = list(range(2, num_sequences + 2))
+    cursor = connection.cursor()
+    set_folder_contents(cursor, 3, sequence_ids[1::2])  # swap the odd and even sequences
+    assert folder_contents(connection, 3) == sequence_ids[1::2]
+    assert cursor.num_queries == 3
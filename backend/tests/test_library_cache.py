@@ -0,0 +1,120 @@
+import pytest
+
+from library_cache import LibraryCache, MemoryBackend, RedisBackend
+
+
+class FakeRedis:
+    """An in-memory stand-in for the hash commands of a redis.Redis client."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.expiries = {}
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def expire(self, key, ttl):
+        self.expiries[key] = ttl
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def info(self, section):
+        return {"used_memory": 1024}
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((getattr(self.client, name), args))
+
+    def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryBackend()
+    return RedisBackend(FakeRedis(), ttl=60)
+
+
+def test_library_cache(backend):
+    cache = LibraryCache(backend)
+    assert cache.get("a@uw.edu", "") is None
+    assert cache.put("a@uw.edu", "", '"etag"', b'{"username": "alice"}', cache.generation("a@uw.edu"))
+    assert cache.put("a@uw.edu", "limit=1", '"etag1"', b'{}', cache.generation("a@uw.edu"))
+    assert cache.put("b@uw.edu", "", '"etag2"', b'{}', cache.generation("b@uw.edu"))
+    assert cache.get("a@uw.edu", "") == ('"etag"', b'{"username": "alice"}')
+    assert cache.get("a@uw.edu", "limit=1") == ('"etag1"', b'{}')
+
+    cache.invalidate("a@uw.edu")
+    assert cache.get("a@uw.edu", "") is None
+    assert cache.get("a@uw.edu", "limit=1") is None
+    assert cache.get("b@uw.edu", "") == ('"etag2"', b'{}')
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (3, 3, 0.5)
+    assert stats["backend"] in ("memory", "redis")
+    assert stats["bytes"] > 0
+
+
+def test_library_cache_invalidated_while_reading(backend):
+    # a response read before a write must not be cached after it
+    cache = LibraryCache(backend)
+    generation = cache.generation("a@uw.edu")
+    cache.invalidate("a@uw.edu")
+    assert not cache.put("a@uw.edu", "", '"old"', b'{}', generation)
+    assert cache.get("a@uw.edu", "") is None
+    assert cache.put("a@uw.edu", "", '"new"', b'{}', cache.generation("a@uw.edu"))
+
+
+def test_library_cache_stats_empty():
+    assert LibraryCache(MemoryBackend()).stats()["hit_ratio"] is None
+
+
+def test_memory_backend_lru():
+    backend = MemoryBackend(max_bytes=100)
+    backend.set("a", "", "e", b"x" * 40)  # 42 bytes
+    backend.set("b", "", "e", b"x" * 40)
+    backend.get("a", "")  # b becomes the least recently used
+    backend.set("c", "", "e", b"x" * 40)
+    assert backend.get("b", "") is None
+    assert backend.get("a", "") is not None
+    assert backend.get("c", "") is not None
+    assert backend.stats() == {"backend": "memory", "entries": 2, "bytes": 84, "max_bytes": 100, "evictions": 1}
+
+
+def test_memory_backend_replace_and_invalidate():
+    backend = MemoryBackend()
+    backend.set("a", "", "e", b"x" * 10)
+    backend.set("a", "", "e", b"x" * 20)
+    backend.set("a", "limit=1", "e", b"x")
+    assert backend.stats()["bytes"] == 22 + 10
+    backend.invalidate("a")
+    backend.invalidate("b")
+    assert backend.stats()["entries"] == 0
+    assert backend.stats()["bytes"] == 0
+
+
+def test_memory_backend_oversized():
+    backend = MemoryBackend(max_bytes=10)
+    backend.set("a", "", "e", b"x" * 10)
+    assert backend.get("a", "") is None
+
+
+def test_redis_backend_expiry():
+    client = FakeRedis()
+    backend = RedisBackend(client, ttl=60, prefix="test:")
+    backend.set("a@uw.edu", "", '"etag"', b'{"notes": "A4\\n"}')
+    assert client.expiries == {"test:a@uw.edu": 60}
+    assert backend.get("a@uw.edu", "") == ('"etag"', b'{"notes": "A4\\n"}')
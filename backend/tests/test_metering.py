@@ -0,0 +1,62 @@
+import time
+
+import pytest
+import numpy as np
+
+from audio_processing.metering import (downsample_metering, load_metering, metering_to_strings, parse_metering,
+                                       save_metering)
+
+
+@pytest.mark.parametrize("text, values", [
+    ('["5.55", "9.23"]', [5.55, 9.23]),
+    ("['-160', '-35.5', '0']", [-160.0, -35.5, 0.0]),
+    ('[ "1e2" , ".5", "+3.",]', [100.0, 0.5, 3.0]),
+    ("[]", []),
+])
+def test_parse_metering(text, values):
+    metering = parse_metering(text)
+    assert metering.dtype == np.float32
+    assert metering.tolist() == pytest.approx(values)
+
+
+@pytest.mark.parametrize("text", ['', '["5.55", "9.23"', '[5.55, 9.23]', '["5.55" "9.23"]', '["five"]',
+                                  '["5.55\']', '{"5.55"}', '[,]', '["5.55"],'])
+def test_parse_metering_invalid(text):
+    with pytest.raises(ValueError):
+        parse_metering(text)
+
+
+
+@pytest.mark.parametrize("text", ['["1"' + " " * 200000 + "x", "[" + " " * 200000 + "x", '["1",' + " " * 200000 + "x",
+                                  '[" ' + "1" * 200000 + " x"],
+                         ids=["spaces after item", "spaces", "spaces after comma", "digits"])
+def test_parse_metering_long_invalid(text):
+    # failing to match takes linear time, whatever the length of the runs of whitespace or digits
+    start = time.perf_counter()
+    with pytest.raises(ValueError):
+        parse_metering(text)
+    assert time.perf_counter() - start < 1.0
+
+def test_save_load_metering(tmp_path):
+    path = str(tmp_path / "metering.npy")
+    save_metering(path, parse_metering('["-20.5", "-15", "0"]'))
+    metering = load_metering(path)
+    assert metering.dtype == np.float32
+    assert metering_to_strings(metering) == ["-20.5", "-15.0", "0.0"]
+
+
+@pytest.mark.parametrize("n_points, expected", [
+    (3, [2, 5, 9]),
+    (4, [1, 4, 6, 9]),
+    (10, list(range(10))),
+    (20, list(range(10))),
+])
+def test_downsample_metering(n_points, expected):
+    # the loudest value of each bucket is kept
+    values = np.arange(10, dtype=np.float32)
+    assert downsample_metering(values, n_points).tolist() == expected
+
+
+def test_downsample_metering_invalid():
+    with pytest.raises(ValueError):
+        downsample_metering(np.zeros(4), 0)
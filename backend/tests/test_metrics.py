@@ -0,0 +1,73 @@
+import pytest
+from flask import Flask
+
+from metrics import CallbackMetric, Counter, Histogram, Metrics
+
+
+def test_counter():
+    counter = Counter("echo_lookups_total", "Lookups.", ("result",))
+    counter.inc(result="hit")
+    counter.inc(2, result="hit")
+    counter.inc(result="miss")
+    assert counter.samples() == [("", {"result": "hit"}, 3), ("", {"result": "miss"}, 1)]
+
+
+def test_histogram():
+    histogram = Histogram("echo_latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, stage="analyze")
+    assert histogram.samples() == [
+        ("_bucket", {"stage": "analyze", "le": "0.1"}, 2),
+        ("_bucket", {"stage": "analyze", "le": "1"}, 3),
+        ("_bucket", {"stage": "analyze", "le": "+Inf"}, 4),
+        ("_sum", {"stage": "analyze"}, 2.65),
+        ("_count", {"stage": "analyze"}, 4),
+    ]
+
+
+@pytest.mark.parametrize("callback, label_names, samples", [
+    (lambda: 3, (), [("", {}, 3)]),
+    (lambda: None, (), []),
+    (lambda: {("idle",): 2, ("in_use",): 1}, ("state",), [("", {"state": "idle"}, 2), ("", {"state": "in_use"}, 1)]),
+])
+def test_callback_metric(callback, label_names, samples):
+    assert CallbackMetric("echo_pool", "Pool.", callback, label_names=label_names).samples() == samples
+
+
+def test_render():
+    metrics = Metrics()
+    metrics.counter("errors_total", "Errors\nby route.", ("route",)).inc(route='/a"b\\c')
+    metrics.callback("pending", "Pending jobs.", lambda: 2)
+    metrics.observe_stage("analyze", 0.2)
+    metrics.add_audio_seconds(1.5)
+    lines = metrics.render().splitlines()
+    assert "# HELP echo_errors_total Errors\\nby route." in lines
+    assert "# TYPE echo_errors_total counter" in lines
+    assert 'echo_errors_total{route="/a\\"b\\\\c"} 1' in lines
+    assert "# TYPE echo_pending gauge" in lines
+    assert "echo_pending 2" in lines
+    assert "# TYPE echo_stage_duration_seconds histogram" in lines
+    assert 'echo_stage_duration_seconds_bucket{stage="analyze",le="0.25"} 1' in lines
+    assert 'echo_stage_duration_seconds_count{stage="analyze"} 1' in lines
+    assert "echo_audio_processed_seconds_total 1.5" in lines
+
+
+def test_requests():
+    app = Flask(__name__)
+    metrics = Metrics()
+    metrics.init_app(app)
+
+    @app.route('/users/<name>')
+    def user(name):
+        with metrics.stage("lookup"):
+            return name
+
+    client = app.test_client()
+    client.get('/users/alice')
+    client.get('/users/bob')
+    client.get('/missing')
+    text = metrics.render()
+    assert 'echo_http_request_duration_seconds_count{route="/users/<name>",method="GET",status="200"} 2' in text
+    assert 'echo_http_request_duration_seconds_count{route="<unmatched>",method="GET",status="404"} 1' in text
+    assert 'echo_stage_duration_seconds_count{stage="lookup"} 2' in text
+    assert "echo_audio_processed_seconds_total 0" in text
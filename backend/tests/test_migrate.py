@@ -0,0 +1,81 @@
+import sqlite3
+import pytest
+
+from migrate import MIGRATIONS_PATH, load_migrations, migrate, split_statements
+
+
+@pytest.fixture
+def migrations_path(tmp_path):
+    (tmp_path / "0001_songs.sql").write_text("-- the songs\nCREATE TABLE Songs (id INT, name TEXT);\n")
+    (tmp_path / "0002_songs_name_index.sql").write_text("CREATE INDEX songs_name ON Songs (name);")
+    (tmp_path / "0010_albums.sql").write_text("CREATE TABLE Albums (id INT);\nCREATE TABLE Tracks (album INT, song INT);")
+    (tmp_path / "notes.txt").write_text("not a migration")
+    return str(tmp_path)
+
+
+def applied(connection):
+    return connection.connection.execute("SELECT version, name FROM schema_migrations ORDER BY version").fetchall()
+
+
+def tables(connection):
+    return {name for name, in connection.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+@pytest.mark.parametrize("sql, statements", [
+    ("", []),
+    ("SELECT 1", ["SELECT 1"]),
+    ("SELECT 1;\n\nSELECT 2;", ["SELECT 1", "SELECT 2"]),
+    ("-- a comment; with a semicolon\nSELECT 1; -- trailing\n;", ["SELECT 1"]),
+    ("INSERT INTO Instruments (display_name) VALUES ('dummy');  --instruments are unused",
+     ["INSERT INTO Instruments (display_name) VALUES ('dummy')"]),
+])
+def test_split_statements(sql, statements):
+    assert split_statements(sql) == statements
+
+
+def test_load_migrations(migrations_path):
+    assert [(migration.version, migration.name) for migration in load_migrations(migrations_path)] == [
+        (1, "songs"), (2, "songs_name_index"), (10, "albums")]
+    assert load_migrations(migrations_path)[2].statements() == [
+        "CREATE TABLE Albums (id INT)", "CREATE TABLE Tracks (album INT, song INT)"]
+
+
+def test_load_migrations_same_version(migrations_path, tmp_path):
+    (tmp_path / "01_other.sql").write_text("SELECT 1;")
+    with pytest.raises(ValueError):
+        load_migrations(migrations_path)
+
+
+def test_migrate(migrations_path, connect_sqlite):
+    connection = connect_sqlite()
+    assert [migration.version for migration in migrate(connection, migrations_path)] == [1, 2, 10]
+    assert applied(connection) == [(1, "songs"), (2, "songs_name_index"), (10, "albums")]
+    assert {"Songs", "Albums", "Tracks"} <= tables(connection)
+    assert migrate(connection, migrations_path) == []
+
+
+def test_migrate_target(migrations_path, connect_sqlite):
+    connection = connect_sqlite()
+    assert [migration.version for migration in migrate(connection, migrations_path, target=2)] == [1, 2]
+    assert "Albums" not in tables(connection)
+    assert [migration.version for migration in migrate(connection, migrations_path)] == [10]
+
+
+def test_migrate_failure(migrations_path, tmp_path, connect_sqlite):
+    # a failed migration is not recorded, so it is tried again on the next run
+    (tmp_path / "0003_broken.sql").write_text("CREATE TABLE Broken (id INT);\nCREATE INDEX x ON Missing (id);")
+    connection = connect_sqlite()
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(connection, migrations_path)
+
+    assert applied(connection) == [(1, "songs"), (2, "songs_name_index")]
+    (tmp_path / "0003_broken.sql").write_text("CREATE TABLE IF NOT EXISTS Broken (id INT);")
+    assert [migration.version for migration in migrate(connection, migrations_path)] == [3, 10]
+
+
+def test_migrations():
+    # the shipped migrations have distinct versions, counting up from 1
+    migrations = load_migrations(MIGRATIONS_PATH)
+    assert [migration.version for migration in migrations] == list(range(1, len(migrations) + 1))
+    assert all(migration.statements() for migration in migrations)
@@ -0,0 +1,95 @@
+import os
+import pytest
+import numpy as np
+
+from audio_processing import AnalyzedSong
+from audio_processing.note_format import (NOTE_RECORD_DTYPE, make_records, notes_to_text, read_notes,
+                                          text_to_records, write_notes)
+
+
+@pytest.fixture
+def sample_records():
+    return make_records([0.0, 0.25, 0.75, 1.0], [0.25, 0.5, 0.25, 0.1], [60, 62, -1, 70])
+
+
+def test_record_size():
+    assert NOTE_RECORD_DTYPE.itemsize == 10
+
+
+def test_write_read_notes(sample_records, tmp_path):
+    path = str(tmp_path / "song.notes")
+    write_notes(path, sample_records)
+    assert (tmp_path / "song.notes").stat().st_size == 16 + 10 * 4
+    records = read_notes(path)
+    assert isinstance(records, np.memmap)
+    assert np.array_equal(records, sample_records)
+    assert not records.flags.writeable
+
+
+
+def test_rewrite_mapped_notes(tmp_path):
+    # a mapping taken before the file is written again keeps reading the old records
+    path = str(tmp_path / "song.notes")
+    n = 200000
+    write_notes(path, make_records(np.arange(n) * 0.25, np.full(n, 0.25), np.full(n, 69)))
+    mapped = read_notes(path)
+    write_notes(path, make_records([0.0], [0.5], [71]))
+    assert mapped[-1]["onset"] == (n - 1) * 0.25
+    assert mapped[-1]["note"] == 69
+    assert read_notes(path).tolist() == make_records([0.0], [0.5], [71]).tolist()
+    assert os.listdir(tmp_path) == ["song.notes"]
+
+def test_read_empty_notes(tmp_path):
+    path = str(tmp_path / "empty.notes")
+    write_notes(path, make_records([], [], []))
+    assert len(read_notes(path)) == 0
+
+
+@pytest.mark.parametrize("content", [b"", b"C40.25,D40.5", b"ECHN\x02\x00\x0a\x00\x00\x00\x00\x00\x00\x00\x00\x00",
+                                     b"ECHN\x01\x00\x0a\x00\x02\x00\x00\x00\x00\x00\x00\x00" + bytes(10)])
+def test_read_invalid_notes(content, tmp_path):
+    # not a note file, an unknown version and a truncated file
+    path = tmp_path / "invalid.notes"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        read_notes(str(path))
+
+
+def test_notes_to_text(sample_records):
+    assert notes_to_text(sample_records) == "C40.25,D40.5,None0.25,A#40.1"
+    assert notes_to_text(make_records([], [], [])) == ""
+
+
+@pytest.mark.parametrize("text, note_numbers, durations, onsets", [
+    ("C40.25,D40.5", [60, 62], [0.25, 0.5], [0.0, 0.25]),
+    ("C#40.25,None1.0", [61, -1], [0.25, 1.0], [0.0, 0.25]),
+    ("C-10.5,C10.5,C100.5,C101", [0, 24, 132, 132], [0.5, 0.5, 0.5, 1.0], [0.0, 0.5, 1.0, 1.5]),
+    ("", [], [], []),
+])
+def test_text_to_records(text, note_numbers, durations, onsets):
+    records = text_to_records(text)
+    assert records["note"].tolist() == note_numbers
+    assert records["duration"].tolist() == durations
+    assert records["onset"].tolist() == onsets
+
+
+@pytest.mark.parametrize("text", ["H40.25", "C4", "C40.25,", "C40.25,,D40.5", "c40.25", "C40.25 D40.5", "None"])
+def test_text_to_records_invalid(text):
+    with pytest.raises(ValueError):
+        text_to_records(text)
+
+
+def test_text_round_trip():
+    text = "A41.0,G40.5,None0.25,G10.3,C#-10.25"
+    assert notes_to_text(text_to_records(text)) == text
+
+
+def test_save_notes(tmp_path):
+    song = AnalyzedSong()
+    song.add_point(time_stamp=0.0, frequency=440.0, note_name="A4", duration=0.25)
+    song.add_point(time_stamp=0.25, frequency=None, note_name="None", duration=0.25)
+    path = str(tmp_path / "song.notes")
+    song.save_notes(path)
+    records = read_notes(path)
+    assert records["onset"].tolist() == [0.0, 0.25]
+    assert notes_to_text(records) == repr(song)
@@ -0,0 +1,25 @@
+import pytest
+
+from audio_processing.notes import midi_to_note_name, midi_to_note_names, note_name_to_midi
+
+
+@pytest.mark.parametrize(('note_number', 'note_name'), [
+    (69, "A4"),
+    (60, "C4"),
+    (61, "C#4"),
+    (15, "D#0"),
+    (0, "C-1"),
+    (135, "D#10"),
+    (160, "E12"),  # beyond the precomputed table
+    (-1, "None"),
+    ])
+def test_round_trip(note_number, note_name):
+    assert midi_to_note_name(note_number) == note_name
+    assert midi_to_note_names([note_number]) == [note_name]
+    assert note_name_to_midi(note_name) == note_number
+
+
+@pytest.mark.parametrize('note_name', ["H4", "A", "C#", "4", "a4", "C-2", ""])
+def test_invalid_note_name(note_name):
+    with pytest.raises(ValueError):
+        note_name_to_midi(note_name)
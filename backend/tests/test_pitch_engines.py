@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+
+from audio_processing import (AudioAnalyzer, FFTPeakEstimator, PitchEstimator, Song, YinEstimator,
+    get_analysis_plan)
+from audio_processing.pitch_engines import get_pitch_engine
+
+
+def harmonic_frames(frequencies, sampling_rate=16000, frame_n_samples=4000, harmonics=(0.5, 1.0, 0.4)):
+    # one frame per frequency, with a second harmonic louder than the fundamental
+    t = np.arange(frame_n_samples) / sampling_rate
+    return np.stack([sum(amplitude * np.sin(2 * np.pi * (k + 1) * f * t) for k, amplitude in enumerate(harmonics))
+                     for f in frequencies])
+
+
+def test_get_pitch_engine():
+    assert isinstance(get_pitch_engine('fft'), FFTPeakEstimator)
+    assert isinstance(get_pitch_engine('yin'), YinEstimator)
+    engine = YinEstimator(fmin=60.0)
+    assert get_pitch_engine(engine) is engine
+    with pytest.raises(ValueError):
+        get_pitch_engine('pyin')
+
+
+def test_yin_estimate():
+    frequencies = [82.41, 110.0, 196.0, 261.63, 440.0, 880.0]
+    plan = get_analysis_plan(4000, 16000)
+    estimated = YinEstimator().estimate(harmonic_frames(frequencies), plan)
+    assert estimated == pytest.approx(frequencies, rel=5e-3)  # within 9 cents
+
+
+def test_yin_silence():
+    plan = get_analysis_plan(4000, 16000)
+    estimated = YinEstimator().estimate(np.zeros((2, 4000)), plan)
+    assert np.isnan(estimated).all()
+
+
+def test_engines_on_hummed_input():
+    # the FFT peak lands on the louder octave harmonic, YIN finds the fundamental
+    frames = harmonic_frames([220.0, 330.0])
+    _, fft_notes = AudioAnalyzer(pitch_engine='fft').audio_frames_to_notes(frames, 16000)
+    _, yin_notes = AudioAnalyzer(pitch_engine='yin').audio_frames_to_notes(frames, 16000)
+    assert fft_notes.tolist() == [69, 76]
+    assert yin_notes.tolist() == [57, 64]
+
+
+def test_custom_engine():
+    class ConstantEstimator(PitchEstimator):
+        def estimate(self, frames, plan):
+            return np.full(len(frames), 440.0)
+
+    frequencies, note_numbers = AudioAnalyzer(pitch_engine=ConstantEstimator()).audio_frames_to_notes(
+        np.zeros((3, 100)), 8000)
+    assert frequencies.tolist() == [440.0] * 3
+    assert note_numbers.tolist() == [69] * 3
+
+
+def test_song_pitch_engine():
+    sampling_rate = 16000
+    data = (harmonic_frames([220.0], sampling_rate, sampling_rate)[0] * 10000).astype(np.int16)
+    analyzed_song = Song.from_pcm(sampling_rate, data, pitch_engine='yin').audio_to_notes()
+    assert [point.note_name for point in analyzed_song.get_analysis()] == ["A3"] * 4
@@ -0,0 +1,86 @@
+import os
+import pstats
+import numpy as np
+import pytest
+from flask import Flask
+
+from audio_processing import Song
+from profiling import Profiler
+
+
+def make_app(profiler):
+    app = Flask(__name__)
+    profiler.init_app(app)
+
+    @app.route('/songs/<name>')
+    def song(name):
+        profiler.annotate(12.5, 44100)
+        return name
+
+    @app.route('/fail')
+    def fail():
+        raise RuntimeError("failed")
+
+    return app
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "profile_data")
+
+
+def test_profiler_disabled(path):
+    client = make_app(Profiler(path)).test_client()
+    client.get('/songs/a', headers={Profiler.HEADER: "anything"})
+    assert not os.path.exists(path)
+
+
+def test_profiler_sampled(path):
+    profiler = Profiler(path, sample_rate=1.0)
+    client = make_app(profiler).test_client()
+    assert client.get('/songs/a').data == b"a"
+    client.get('/missing')
+    names = [os.path.basename(profile) for profile in profiler.profiles()]
+    assert len(names) == 2
+    assert "_songs-name_" in names[0]
+    assert names[0].endswith("ms_audio12.5s_44100Hz.prof")
+    assert "_unmatched_" in names[1]
+    assert pstats.Stats(profiler.profiles()[0]).total_calls > 0
+
+
+@pytest.mark.parametrize("header, profiled", [(None, False), ("wrong", False), ("secret", True)])
+def test_profiler_header(path, header, profiled):
+    profiler = Profiler(path, header_token="secret")
+    client = make_app(profiler).test_client()
+    client.get('/songs/a', headers={Profiler.HEADER: header} if header else {})
+    assert len(profiler.profiles()) == int(profiled)
+
+
+def test_profiler_error(path):
+    # a profile is never left enabled, so the next requests are still profiled
+    profiler = Profiler(path, sample_rate=1.0)
+    app = make_app(profiler)
+    app.testing = False
+    client = app.test_client()
+    assert client.get('/fail').status_code == 500
+    client.get('/songs/a')
+    assert len(profiler.profiles()) == 2
+
+
+def test_profiler_rotation(path):
+    profiler = Profiler(path, sample_rate=1.0, max_files=3)
+    client = make_app(profiler).test_client()
+    for i in range(5):
+        client.get(f'/songs/{i}')
+    assert len(profiler.profiles()) == 3
+
+
+def test_profile_song(path):
+    sampling_rate = 8000
+    data = np.sin(2 * np.pi * 440 * np.arange(2 * sampling_rate) / sampling_rate)
+    profiler = Profiler(path)
+    analyzed_song = profiler.profile_song(Song.from_pcm(sampling_rate, data))
+    assert len(analyzed_song.time_stamps) == 8
+    [profile] = profiler.profiles()
+    assert profile.endswith("_audio2.0s_8000Hz.prof")
+    assert "_song_" in profile
@@ -1,9 +1,10 @@
 import os
 import pytest
+import numpy as np
 from pathlib import Path
 
 
-from audio_processing import Song, convert_m4a_to_wav
+from audio_processing import Song, convert_m4a_to_wav, decode_m4a_to_pcm
 
 
 
@@ -54,4 +55,55 @@ def test_audio_to_notes(sample_song_path, better_day):
     assert analyzed_song.data[0].time_stamp == 0.0
     assert analyzed_song.data[0].frequency == 68.0
     assert analyzed_song.data[0].note_name == "C#2"
-    assert analyzed_song.data[0].duration == 0.25
\ No newline at end of file
+    assert analyzed_song.data[0].duration == 0.25
+
+def test_stream_notes(sample_song_path, better_day):
+    # Test that streaming analysis yields the same points as audio_to_notes
+    for path in (sample_song_path, better_day):
+        expected = Song(file_path=path).audio_to_notes().get_analysis()
+        streamed = list(Song(file_path=path).stream_notes(block_duration=1.0))
+        assert len(streamed) == len(expected)
+        assert [repr(point) for point in streamed] == [repr(point) for point in expected]
+        assert [point.time_stamp for point in streamed] == [point.time_stamp for point in expected]
+        assert [point.frequency for point in streamed] == [point.frequency for point in expected]
+
+
+def test_from_pcm(better_day):
+    # Test that in-memory decoding matches the converted WAV file
+    sampling_rate, data = decode_m4a_to_pcm("tests/test_data/better_day")
+    song = Song.from_pcm(sampling_rate, data)
+    assert song.file_path is None
+    assert song.chunk_duration == 0.25
+    analyzed_song = song.audio_to_notes()
+    expected = Song(file_path=better_day).audio_to_notes()
+    assert repr(analyzed_song) == repr(expected)
+    assert len(analyzed_song.data) == 362
+
+    # M4A paths are decoded in memory without writing a WAV file
+    analyzed_song = Song(file_path="tests/test_data/better_day.m4a").audio_to_notes()
+    assert repr(analyzed_song) == repr(expected)
+
+
+def test_hop_duration():
+    # Test overlapping chunks: every 4th chunk lines up with a back-to-back chunk
+    sampling_rate = 8000
+    t = np.arange(sampling_rate * 2) / sampling_rate
+    data = (np.sin(2 * np.pi * np.where(t < 1, 440, 392) * t) * 10000).astype(np.int16)
+    back_to_back = Song.from_pcm(sampling_rate, data).audio_to_notes().get_analysis()
+    song = Song.from_pcm(sampling_rate, data, hop_duration=0.0625)
+    assert song.hop_duration == 0.0625
+    overlapping = song.audio_to_notes().get_analysis()
+    assert len(back_to_back) == 8
+    assert len(overlapping) == 29
+    assert overlapping[1].time_stamp == 0.0625
+    assert overlapping[1].duration == 0.0625
+    assert [repr(point) for point in overlapping[::4]] == [repr(point)[:2] + "0.0625" for point in back_to_back]
+    assert [point.frequency for point in overlapping[::4]] == [point.frequency for point in back_to_back]
+    streamed = list(song.stream_notes(block_duration=0.3))
+    assert [point.frequency for point in streamed] == [point.frequency for point in overlapping]
+
+
+@pytest.mark.parametrize("chunk_duration, hop_duration", [(0.25, 0), (0.25, -0.0625), (0.25, float("nan")), (0, None)])
+def test_invalid_hop_duration(chunk_duration, hop_duration):
+    with pytest.raises(ValueError):
+        Song.from_pcm(8000, np.zeros(8000, dtype=np.int16), chunk_duration, hop_duration=hop_duration)
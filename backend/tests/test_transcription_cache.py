@@ -0,0 +1,92 @@
+import os
+import pytest
+
+from audio_processing.note_format import make_records
+from audio_processing.transcription_cache import TranscriptionCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranscriptionCache(str(tmp_path / "cache"), max_bytes=100)
+
+
+@pytest.fixture
+def audio_files(tmp_path):
+    paths = []
+    for name, content in (("a.m4a", b"audio a"), ("copy.m4a", b"audio a"), ("b.m4a", b"audio b")):
+        path = tmp_path / name
+        path.write_bytes(content)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def sample_records():
+    return make_records([0.0, 0.25], [0.25, 0.25], [69, 67])  # 36 bytes as a note file
+
+
+def test_key(cache, audio_files):
+    a, copy, b = audio_files
+    assert cache.key(a, chunk_duration=0.25) == cache.key(copy, chunk_duration=0.25)
+    assert cache.key(a, chunk_duration=0.25) != cache.key(b, chunk_duration=0.25)
+    assert cache.key(a, chunk_duration=0.25) != cache.key(a, chunk_duration=0.5)
+    assert cache.key(a, chunk_duration=0.25, pitch_engine="fft") != cache.key(a, chunk_duration=0.25, pitch_engine="yin")
+
+
+def test_get_put(cache, audio_files, sample_records):
+    a, copy, _ = audio_files
+    assert cache.get(cache.key(a)) is None
+    cache.put(cache.key(a), sample_records)
+    records = cache.get(cache.key(copy))
+    assert records.tolist() == sample_records.tolist()
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5, "entries": 1, "bytes": 36}
+
+
+def test_eviction(cache, sample_records):
+    # two 36-byte entries fit in a 100-byte cache, the least recently used goes first
+    for i, key in enumerate(["a", "b"]):
+        cache.put(key, sample_records)
+        os.utime(os.path.join(cache.path, f"{key}.notes"), (i, i))
+    cache.get("a")  # now the most recently used
+    cache.put("c", sample_records)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["entries"] == 2
+
+
+def test_stats_empty(cache):
+    assert cache.stats() == {"hits": 0, "misses": 0, "hit_ratio": None, "entries": 0, "bytes": 0}
+
+
+def test_index_survives_restart(tmp_path, sample_records):
+    # a new cache over the same directory picks up the entries, least recently used first
+    path = str(tmp_path / "cache")
+    cache = TranscriptionCache(path, max_bytes=100)
+    for i, key in enumerate(["a", "b"]):
+        cache.put(key, sample_records)
+        os.utime(os.path.join(path, f"{key}.notes"), (10 - i, 10 - i))
+
+    cache = TranscriptionCache(path, max_bytes=100)
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 72
+    cache.put("c", sample_records)
+    assert sorted(os.listdir(path)) == ["a.notes", "c.notes"]
+
+
+def test_no_directory_scans(cache, sample_records, monkeypatch):
+    # lookups, writes and stats only use the index kept in memory
+    def scandir(path):
+        raise AssertionError("the cache directory was listed")
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    for key in ["a", "b", "c"]:
+        cache.put(key, sample_records)
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["entries"] == 2
+
+
+def test_entry_removed_externally(cache, sample_records):
+    cache.put("a", sample_records)
+    os.remove(os.path.join(cache.path, "a.notes"))
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0